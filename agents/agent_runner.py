@@ -2,7 +2,7 @@
 
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-import httpx, os, asyncio
+import httpx, os, asyncio, uuid
 from sales_agent import generate_followup, send_communication
 
 app = FastAPI(title="Agents Runner")
@@ -16,6 +16,12 @@ NAME_URL = f"{MCP}/name_check"
 COMPANY_URL = f"{MCP}/company_enrich"
 MESSAGE_URL = f"{MCP}/intent"
 
+# One-shot analysis: rule checks + a single combined LLM prompt for all five signals
+ANALYZE_URL = f"{MCP}/analyze_lead"
+
+# "per_tool" (five requests, five completions) or "analyze_lead" (one of each)
+QUALIFICATION_MODE = os.getenv("QUALIFICATION_MODE", "per_tool")
+
 # Aggregation tool
 AGG_URL = f"{MCP}/aggregate"
 
@@ -31,6 +37,8 @@ class LeadIn(BaseModel):
     name: str | None = None
     company: str | None = None
     message: str | None = None
+    # Set by the backend per queue job (or manual trigger); keys the result delivery
+    run_id: str | None = None
 
 
 def safe_json(response):
@@ -41,26 +49,78 @@ def safe_json(response):
         return {}
 
 
+async def post_result(client, result, run_id=None, attempts=3):
+    """
+    Deliver a result to the backend, retrying timeouts, 409 and 5xx. The
+    Idempotency-Key comes from the lead and the backend's run_id, so both a
+    retried delivery and a re-run of the same queue job are replayed by the
+    backend instead of re-applied (and re-emailed). Raises when every
+    attempt failed, so the backend's job is retried.
+    """
+    # Callers that send no run_id still get one key across this call's retries
+    run_id = run_id or uuid.uuid4().hex
+    headers = {"Idempotency-Key": f"agent-result-{result['lead_id']}-{run_id}"}
+    body = {**result, "run_id": run_id}
+    for attempt in range(attempts):
+        try:
+            r = await client.post(f"{BACKEND_URL}/api/internal/agent_result", json=body, headers=headers)
+            if r.status_code == 409:
+                # Another delivery of this run holds the key; the retry replays its response
+                print(f"⚠️ agent_result for lead {result['lead_id']} already in progress (attempt {attempt + 1})")
+            elif r.status_code < 400:
+                return r
+            elif r.status_code < 500:
+                print(f"❌ agent_result rejected for lead {result['lead_id']}: {r.status_code} {r.text}")
+                return r
+            else:
+                print(f"⚠️ agent_result delivery failed (attempt {attempt + 1}): {r.status_code}")
+        except httpx.HTTPError as e:
+            print(f"⚠️ agent_result delivery failed (attempt {attempt + 1}): {e}")
+        if attempt < attempts - 1:
+            await asyncio.sleep(2 ** attempt)
+    raise RuntimeError(f"agent_result for lead {result['lead_id']} not delivered after {attempts} attempts")
+
+
+async def collect_signals_per_tool(client, payload: LeadIn):
+    tasks = [
+        client.post(EMAIL_URL, json={"email": payload.email}),
+        client.post(PHONE_URL, json={"phone": payload.phone}),
+        client.post(NAME_URL, json={"name": payload.name}),
+        client.post(COMPANY_URL, json={"company": payload.company}),
+        client.post(MESSAGE_URL, json={"message": payload.message}),
+    ]
+
+    responses = await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Convert to JSON results
+    return [
+        safe_json(r) if not isinstance(r, Exception) else {}
+        for r in responses
+    ]
+
+
+async def collect_signals_one_shot(client, payload: LeadIn):
+    """Same five results from /tools/analyze_lead; falls back to per-tool calls if it fails."""
+    try:
+        r = await client.post(ANALYZE_URL, json=payload.dict(exclude={"lead_id", "run_id"}))
+        r.raise_for_status()
+        signals = r.json()["signals"]
+    except (httpx.HTTPError, KeyError, ValueError) as e:
+        print(f"⚠️ analyze_lead failed, falling back to per-tool calls: {e}")
+        return await collect_signals_per_tool(client, payload)
+    return [signals.get(k) or {} for k in ("email", "phone", "name", "company", "message")]
+
+
 @app.post("/run/qualification")
 async def run_qualification(payload: LeadIn):
 
     async with httpx.AsyncClient(timeout=40) as client:
 
-        tasks = [
-            client.post(EMAIL_URL, json={"email": payload.email}),
-            client.post(PHONE_URL, json={"phone": payload.phone}),
-            client.post(NAME_URL, json={"name": payload.name}),
-            client.post(COMPANY_URL, json={"company": payload.company}),
-            client.post(MESSAGE_URL, json={"message": payload.message}),
-        ]
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Convert to JSON results
-        email_res, phone_res, name_res, company_res, message_res = [
-            safe_json(r) if not isinstance(r, Exception) else {}
-            for r in responses
-        ]
+        if QUALIFICATION_MODE == "analyze_lead":
+            results = await collect_signals_one_shot(client, payload)
+        else:
+            results = await collect_signals_per_tool(client, payload)
+        email_res, phone_res, name_res, company_res, message_res = results
 
         # DEFAULT SCORES → prevents aggregator crash
         email_res.setdefault("score", 0.5)
@@ -83,12 +143,12 @@ async def run_qualification(payload: LeadIn):
         agg = (await client.post(AGG_URL, json=agg_payload)).json()
 
         # SEND RESULT TO BACKEND
-        await client.post(f"{BACKEND_URL}/api/internal/agent_result", json={
+        await post_result(client, {
             "lead_id": payload.lead_id,
             "decision": agg["decision"],
             "score": agg["total_score"],  # FIXED
             "signals": agg_payload
-        })
+        }, payload.run_id)
 
 
         return {
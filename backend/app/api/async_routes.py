@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from ..schemas.lead_schema import LeadCreate, LeadOut, LogOut, LeadLogsOut
+from ..crud import lead_crud_async as crud
+from ..core.database import get_async_db, get_async_read_db
+from ..workers.qualification_worker import notify_new_jobs
+from ..core.events import publish_lead_event
+from ..core.responses import LEADS_FAST_JSON
+from ..core.idempotency import idempotency_begin, idempotency_save, idempotency_release
+from ..core.admission import admission
+from fastapi.concurrency import run_in_threadpool
+from .routes import (
+    parse_lead_fields, parse_lead_ids, leads_response, fast_leads_response, conditional_get,
+    lead_source, shed_response, intake_response,
+)
+
+# Async versions of the hot lead routes. main.py mounts this router ahead
+# of routes.py when DB_ASYNC is enabled, so these paths are served without
+# tying up a threadpool worker; everything else falls through to routes.py.
+router = APIRouter(prefix="/api")
+
+
+@router.post("/leads", response_model=LeadOut)
+async def create_new_lead(
+    lead: LeadCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None),
+):
+    replay = await db.run_sync(idempotency_begin, "create_lead", idempotency_key, lead)
+    if replay:
+        return replay
+
+    decision = await run_in_threadpool(admission.admit, lead_source(request, lead))
+    if decision.action == "shed":
+        await db.run_sync(idempotency_release, "create_lead", idempotency_key)
+        return shed_response(decision)
+
+    try:
+        # Qualification job is written with the lead; wake a worker to pick it up
+        new_lead = await crud.create_lead(db, lead, defer_seconds=decision.defer_seconds)
+    except Exception:
+        await db.run_sync(idempotency_release, "create_lead", idempotency_key)
+        raise
+    notify_new_jobs()
+    publish_lead_event("lead_created", new_lead.id, status=new_lead.status, score=new_lead.score)
+
+    body, status_code, response = intake_response(new_lead, decision)
+    await db.run_sync(idempotency_save, "create_lead", idempotency_key, body, status_code)
+    return response
+
+
+@router.get("/leads", response_model=list[LeadOut])
+async def get_all_leads(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    status: Optional[list[str]] = Query(None),
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    selected = parse_lead_fields(fields)
+    not_modified, cache_headers = conditional_get(request, await crud.lead_list_validator(db))
+    if not_modified:
+        return not_modified
+
+    try:
+        if LEADS_FAST_JSON:
+            rows, next_cursor = await crud.list_lead_rows(
+                db, limit=limit, cursor=cursor, fields=selected,
+                status=status, min_score=min_score, max_score=max_score,
+            )
+            return fast_leads_response(rows, next_cursor, cache_headers)
+
+        leads, next_cursor = await crud.list_leads_page(
+            db,
+            limit=limit,
+            cursor=cursor,
+            fields=selected,
+            status=status,
+            min_score=min_score,
+            max_score=max_score,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return leads_response(leads, next_cursor, selected, response, cache_headers)
+
+
+@router.get("/leads/logs", response_model=dict[int, LeadLogsOut])
+async def get_logs_for_many_leads(
+    lead_ids: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    per_lead: int = Query(50, ge=1, le=500),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    if not lead_ids and limit is None:
+        raise HTTPException(status_code=400, detail="Pass lead_ids or limit")
+
+    try:
+        if lead_ids:
+            ids = parse_lead_ids(lead_ids)
+        else:
+            leads, _ = await crud.list_leads_page(db, limit=limit, cursor=cursor, fields={"id"})
+            ids = [lead.id for lead in leads]
+        return await crud.get_logs_for_leads(db, ids, per_lead=per_lead, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/leads/{lead_id}/logs", response_model=list[LogOut])
+async def get_lead_logs_endpoint(lead_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    return await crud.get_lead_logs(db, lead_id)
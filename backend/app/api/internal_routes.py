@@ -1,17 +1,45 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from typing import Optional
 from ..core.database import get_db
-from ..crud.lead_crud import update_lead_status, create_log
+from ..core.http_client import get_http_client, AGENTS_URL, HTTP_POOL_TIMEOUT
+from ..core.events import publish_lead_event
+from ..core.idempotency import idempotency_begin, idempotency_save, idempotency_release
+from ..crud.lead_crud import apply_agent_result, create_log, EMAIL_DECISIONS
 from ..models.lead import Lead
-import json
-import os
 import httpx
+import json
+import uuid
 
 router = APIRouter(prefix="/api/internal")
 
 
 @router.post("/agent_result")
-def agent_result(payload: dict, db: Session = Depends(get_db)):
+async def agent_result(
+    payload: dict,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+):
+    # The agents service re-posts a result with the same key when a call
+    # times out or the queue job re-runs; the replay skips re-applying it and
+    # re-sending the email. A re-run asks the LLMs again, so only the lead and
+    # run are compared, not the signals.
+    stable = {"lead_id": payload.get("lead_id"), "run_id": payload.get("run_id")}
+    replay = await run_in_threadpool(idempotency_begin, db, "agent_result", idempotency_key, stable)
+    if replay:
+        return replay
+
+    try:
+        response = await _apply_agent_result(payload, db)
+    except Exception:
+        await run_in_threadpool(idempotency_release, db, "agent_result", idempotency_key)
+        raise
+    await run_in_threadpool(idempotency_save, db, "agent_result", idempotency_key, response)
+    return response
+
+
+async def _apply_agent_result(payload: dict, db: Session):
     lead_id = payload.get("lead_id")
     decision = payload.get("decision")
     score = payload.get("score", 0.0)
@@ -19,111 +47,84 @@ def agent_result(payload: dict, db: Session = Depends(get_db)):
     confidence = payload.get("confidence", 0.0)
     risk_flags = payload.get("risk_flags", [])
 
-    AGENTS_URL = os.getenv("AGENTS_URL", "http://agents:8010")
-
     print(f"🔔 RESULT RECEIVED | ID: {lead_id} | DECISION: {decision} | SCORE: {score}")
 
-    # Update lead with confidence and risk_flags
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
-    if lead:
-        lead.confidence = confidence
-        lead.risk_flags = risk_flags
-        db.commit()
+    # Lead update + tier/result logs land in one transaction
+    lead = await run_in_threadpool(
+        apply_agent_result, db, lead_id, decision, score, confidence, risk_flags, signals
+    )
+    if lead is None:
+        return {"status": "not_found"}
+
+    for updated_id in [lead_id, *lead["duplicate_ids"]]:
+        publish_lead_event(
+            "lead_updated", updated_id,
+            status=lead["status"], score=score, confidence=confidence, action="agent_result",
+        )
 
-    # Handle different qualification tiers with AUTOMATIC email sending
-    if decision in ["HOT", "QUALIFIED", "WARM"]:
+    # Email goes out only after the result is committed
+    if decision in EMAIL_DECISIONS:
         print(f"⚡ AUTOMATIC TRIGGER: Sending email for {decision} lead...")
-        # High and medium priority leads - send email automatically
-        update_lead_status(db, lead_id, decision, score)
-        
-        # Extract detailed information from signals
-        email_data = signals.get("email", {})
-        company_data = signals.get("company", {})
-        name_data = signals.get("name", {})
-        message_data = signals.get("message", {})
-        
-        # TRIGGER AUTOMATIC EMAIL SENDING
-        try:
-            print(f"   -> Calling Agents Service: {AGENTS_URL}/run/sales_followup")
-            response = httpx.post(
-                f"{AGENTS_URL}/run/sales_followup",
-                json={
-                    "lead_id": lead_id,
-                    "name": lead.name if lead else None,
-                    "email": lead.email if lead else None,
-                    "company": lead.company if lead else None,
-                    "score": score,
-                    "decision": decision,
-                    "confidence": confidence,
-                    # Additional context for personalization
-                    "email_type": email_data.get("type"),
-                    "company_size": company_data.get("size"),
-                    "company_industry": company_data.get("industry"),
-                    "message_intent": message_data.get("intent"),
-                },
-                timeout=10
-            )
-            print(f"   -> Response Code: {response.status_code}")
-            
-            # Log email sending result
-            if response.status_code == 200:
-                result = response.json()
-                create_log(db, lead_id, "auto_email_sent", {
-                    "status": result.get("status"),
-                    "decision": decision,
-                    "score": score,
-                    "sent_by": "agent_automatic"
-                })
-            
-        except Exception as e:
-            print(f"Failed to trigger sales agent: {e}")
-            create_log(db, lead_id, "auto_email_failed", {
-                "error": str(e),
-                "decision": decision
-            })
-
-    elif decision == "NURTURE":
-        # Medium-priority leads - add to nurture campaign (no immediate email)
-        update_lead_status(db, lead_id, "NURTURE", score)
-        create_log(db, lead_id, "nurture_campaign_added", {
-            "score": score,
-            "confidence": confidence,
-            "risk_flags": risk_flags
-        })
-
-    elif decision == "REVIEW":
-        # Needs manual review
-        update_lead_status(db, lead_id, "REVIEW", score)
-        create_log(db, lead_id, "manual_review_required", {
-            "score": score,
-            "confidence": confidence,
-            "risk_flags": risk_flags
-        })
-    else:
-        # NOT_QUALIFIED
-        update_lead_status(db, lead_id, "NOT_QUALIFIED", score)
-
-    create_log(
-        db,
-        lead_id,
-        "agent_result",
-        {
-            "decision": decision, 
-            "score": score, 
-            "confidence": confidence,
-            "risk_flags": risk_flags,
-            "signals": signals
-        },
-    )
+        await send_followup_email(db, lead_id, lead, decision, score, confidence, signals)
 
     return {"status": "ok"}
 
 
-@router.post("/trigger_qualification/{lead_id}")
-def trigger_qualification(lead_id: int, db: Session = Depends(get_db)):
+async def send_followup_email(db: Session, lead_id: int, lead: dict, decision: str,
+                              score: float, confidence: float, signals: dict):
+    # Extract detailed information from signals
+    email_data = signals.get("email", {})
+    company_data = signals.get("company", {})
+    message_data = signals.get("message", {})
+
+    # TRIGGER AUTOMATIC EMAIL SENDING
+    try:
+        print(f"   -> Calling Agents Service: {AGENTS_URL}/run/sales_followup")
+        response = await get_http_client().post(
+            f"{AGENTS_URL}/run/sales_followup",
+            json={
+                "lead_id": lead_id,
+                "name": lead["name"],
+                "email": lead["email"],
+                "company": lead["company"],
+                "score": score,
+                "decision": decision,
+                "confidence": confidence,
+                # Additional context for personalization
+                "email_type": email_data.get("type"),
+                "company_size": company_data.get("size"),
+                "company_industry": company_data.get("industry"),
+                "message_intent": message_data.get("intent"),
+            },
+            timeout=httpx.Timeout(10, pool=HTTP_POOL_TIMEOUT)
+        )
+        print(f"   -> Response Code: {response.status_code}")
+
+        # Log email sending result
+        if response.status_code == 200:
+            result = response.json()
+            # Written now, not buffered: the UI reads these logs back right away
+            await run_in_threadpool(create_log, db, lead_id, "auto_email_sent", {
+                "status": result.get("status"),
+                "decision": decision,
+                "score": score,
+                "sent_by": "agent_automatic"
+            }, sync=True)
+            publish_lead_event("lead_log", lead_id, action="auto_email_sent", status=result.get("status"))
+
+    except Exception as e:
+        print(f"Failed to trigger sales agent: {e}")
+        await run_in_threadpool(create_log, db, lead_id, "auto_email_failed", {
+            "error": str(e),
+            "decision": decision
+        }, sync=True)
+        publish_lead_event("lead_log", lead_id, action="auto_email_failed")
+
+
+def _qualification_payload(db: Session, lead_id: int):
     lead = db.query(Lead).filter(Lead.id == lead_id).first()
     if not lead:
-        return {"error": "not found"}
+        return None
 
     # -----------------------------
     # NORMALIZE lead.data
@@ -162,24 +163,36 @@ def trigger_qualification(lead_id: int, db: Session = Depends(get_db)):
         "company": lead.company,
         "message": raw_data.get("message"),   # NOW ALWAYS SAFE
     }
+    return payload
+
+
+@router.post("/trigger_qualification/{lead_id}")
+async def trigger_qualification(lead_id: int, db: Session = Depends(get_db), job_id: Optional[int] = None):
+    payload = await run_in_threadpool(_qualification_payload, db, lead_id)
+    if payload is None:
+        return {"error": "not found"}
+    # The agents service keys its agent_result delivery on this, so a retried
+    # queue job re-delivers under the same Idempotency-Key as the first run
+    payload["run_id"] = f"job-{job_id}" if job_id is not None else f"manual-{uuid.uuid4().hex}"
 
     # -----------------------------
     # Send to agents service
     # -----------------------------
-    AGENTS_URL = os.getenv("AGENTS_URL", "http://agents:8010")
-
     try:
-        httpx.post(
+        response = await get_http_client().post(
             f"{AGENTS_URL}/run/qualification",
             json=payload,
-            timeout=60,
+            timeout=httpx.Timeout(60, pool=HTTP_POOL_TIMEOUT),
         )
+        # A 4xx/5xx from the agents service must fail the job so the queue retries it
+        response.raise_for_status()
     except Exception as e:
         print(f"⚠️ Failed to trigger agent qualification: {e}")
         # Build a safe signals object for the log
-        create_log(db, lead_id, "qualification_failed", {"error": str(e)})
+        await run_in_threadpool(create_log, db, lead_id, "qualification_failed", {"error": str(e)})
         return {"status": "triggered_but_failed", "error": str(e)}
 
-    create_log(db, lead_id, "qualification_triggered", payload)
+    await run_in_threadpool(create_log, db, lead_id, "qualification_triggered", payload)
 
     return {"status": "triggered"}
+
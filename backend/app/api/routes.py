@@ -1,52 +1,764 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from ..schemas.lead_schema import LeadCreate, LeadOut, LogOut
-from ..crud.lead_crud import create_lead, list_leads, get_lead_logs, create_log
-from ..core.database import get_db
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from ..schemas.lead_schema import (
+    LeadCreate, LeadOut, LogOut, LeadLogsOut, MessageCreate, MessageOut, LeadMessagesOut
+)
+from ..crud.lead_crud import (
+    create_lead, bulk_create_leads, list_leads_page, list_lead_rows, get_lead_logs, get_logs_for_leads,
+    iter_leads_for_export, search_leads, create_log, list_lead_changes, lead_list_validator,
+    LEAD_FIELDS, EXPORT_COLUMNS, CHANGES_SETTLE_SECONDS
+)
+from ..core.database import get_db, get_read_db, read_router, SessionLocal
+from ..crud.rollup_crud import get_summary
+from ..crud.message_crud import append_message, get_lead_messages
+from ..crud.job_crud import latest_job
+from ..core.events import bus, publish_lead_event
+from ..core.responses import FastJSONResponse, LEADS_FAST_JSON
+from ..core.idempotency import idempotency_begin, idempotency_save, idempotency_release
+from ..core.admission import admission
+from ..core.http_client import get_http_client, AGENTS_URL, HTTP_POOL_TIMEOUT
+from ..workers.qualification_worker import notify_new_jobs
 from ..models.lead import Lead
+import asyncio
+import codecs
+import csv
+import hashlib
+import io
+import json
 import httpx
 import os
+import time
 
 router = APIRouter(prefix="/api")
 
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "500"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+DECISION_MAX_WAIT = float(os.getenv("DECISION_MAX_WAIT", "60"))
+DECISION_RECHECK_SECONDS = float(os.getenv("DECISION_RECHECK_SECONDS", "5"))
+
+# ---------------------------
+# Lead intake (admission control: see core/admission.py)
+# ---------------------------
+def lead_source(request: Request, lead: LeadCreate) -> str:
+    """Token-bucket key: the lead's declared source, else the client address."""
+    if lead.source:
+        return f"source:{lead.source}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def shed_response(decision):
+    return JSONResponse(
+        {"detail": "Lead intake is over capacity, retry later", "reason": decision.reason},
+        status_code=429,
+        headers={"Retry-After": str(decision.retry_after)},
+    )
+
+
+def intake_response(new_lead, decision):
+    """
+    (body, status_code, response) for a stored lead. A lead whose
+    qualification was deferred gets 202 and the URL to follow it at.
+    """
+    body = jsonable_encoder(LeadOut.model_validate(new_lead))
+    if decision.action != "defer" or new_lead.duplicate_of is not None:
+        return body, 200, new_lead
+
+    status_url = f"/api/leads/{new_lead.id}/qualification"
+    body.update({"qualification": "deferred", "status_url": status_url})
+    return body, 202, JSONResponse(body, status_code=202, headers={"Location": status_url})
+
+
 @router.post("/leads", response_model=LeadOut)
-def create_new_lead(lead: LeadCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    
-    new_lead = create_lead(db, lead)
-    
-    # Trigger Qualification
-    from app.api.internal_routes import trigger_qualification
-    background_tasks.add_task(trigger_qualification, new_lead.id, db)
-    
-    return new_lead
+def create_new_lead(
+    lead: LeadCreate,
+    request: Request,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+):
+    # A retried submission with the same Idempotency-Key gets the first lead back
+    replay = idempotency_begin(db, "create_lead", idempotency_key, lead)
+    if replay:
+        return replay
+
+    decision = admission.admit(lead_source(request, lead))
+    if decision.action == "shed":
+        idempotency_release(db, "create_lead", idempotency_key)
+        return shed_response(decision)
+
+    try:
+        # Qualification job is written with the lead; wake a worker to pick it up
+        new_lead = create_lead(db, lead, defer_seconds=decision.defer_seconds)
+    except Exception:
+        idempotency_release(db, "create_lead", idempotency_key)
+        raise
+    notify_new_jobs()
+    publish_lead_event("lead_created", new_lead.id, status=new_lead.status, score=new_lead.score)
+
+    body, status_code, response = intake_response(new_lead, decision)
+    idempotency_save(db, "create_lead", idempotency_key, body, status_code=status_code)
+    return response
+
+# ---------------------------
+# Bulk ingestion
+# ---------------------------
+LEAD_CSV_COLUMNS = {"name", "email", "phone", "company", "budget", "source"}
+
+
+async def _iter_csv_records(request: Request):
+    """
+    Yield dicts from a streamed CSV body without buffering the whole upload.
+    Lines are joined while a quoted field is still open, so values that
+    contain newlines survive chunk boundaries.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    record = ""
+    header = None
+
+    async def lines():
+        nonlocal buffer
+        async for chunk in request.stream():
+            buffer += decoder.decode(chunk)
+            *complete, buffer = buffer.split("\n")
+            for line in complete:
+                yield line + "\n"
+        buffer += decoder.decode(b"", final=True)
+        if buffer:
+            yield buffer
+
+    async for line in lines():
+        record += line
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not values:
+            continue
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        yield dict(zip(header, values))
+
+
+def _csv_record_to_lead(record: dict) -> dict:
+    # Known columns map onto the lead; everything else goes into data
+    lead = {k: (v or None) for k, v in record.items() if k in LEAD_CSV_COLUMNS}
+    extra = {k: v for k, v in record.items() if k not in LEAD_CSV_COLUMNS and k}
+    lead["data"] = extra or None
+    return lead
+
+
+async def _iter_json_records(request: Request):
+    try:
+        items = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of leads")
+    for item in items:
+        yield item
+
+
+@router.post("/leads/bulk")
+async def create_leads_bulk(
+    request: Request,
+    batch_size: int = Query(BULK_INSERT_BATCH_SIZE, ge=1, le=5000),
+    qualify: bool = True,
+    db: Session = Depends(get_db),
+):
+    """
+    Import many leads at once from a JSON array or a CSV upload
+    (Content-Type: text/csv). Rows are validated with LeadCreate and
+    inserted in batches of `batch_size`; each batch's qualification jobs
+    are queued in the same transaction.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        records = (_csv_record_to_lead(r) async for r in _iter_csv_records(request))
+    else:
+        records = _iter_json_records(request)
+
+    results = []
+    created_ids = []
+    pending = []   # (row_number, LeadCreate)
+
+    async def flush():
+        if not pending:
+            return
+        ids = await run_in_threadpool(bulk_create_leads, db, [lead for _, lead in pending], qualify)
+        for (row, _), lead_id in zip(pending, ids):
+            results.append({"row": row, "status": "created", "id": lead_id})
+            publish_lead_event("lead_created", lead_id, status="NEW", score=0.0)
+        created_ids.extend(ids)
+        pending.clear()
+
+    row = 0
+    async for record in records:
+        try:
+            pending.append((row, LeadCreate.model_validate(record)))
+        except ValidationError as e:
+            results.append({
+                "row": row,
+                "status": "invalid",
+                "errors": jsonable_encoder(e.errors(include_url=False, include_context=False)),
+            })
+        row += 1
+        if len(pending) >= batch_size:
+            await flush()
+    await flush()
+
+    if qualify and created_ids:
+        notify_new_jobs()
+
+    results.sort(key=lambda r: r["row"])
+    return {
+        "received": row,
+        "created": len(created_ids),
+        "invalid": row - len(created_ids),
+        "results": results,
+    }
+
+
+def parse_lead_fields(fields: Optional[str]):
+    if not fields:
+        return None
+    selected = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = set(selected) - LEAD_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return selected
+
+
+def leads_response(leads, next_cursor, selected, response: Response, headers: dict = None):
+    headers = dict(headers or {})
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+
+    if selected:
+        rows = [{f: getattr(lead, f) for f in selected} for lead in leads]
+        return JSONResponse(jsonable_encoder(rows), headers=headers)
+
+    response.headers.update(headers)
+    return leads
+
+
+def conditional_get(request: Request, validator):
+    """
+    Build ETag/Last-Modified headers for a lead listing from
+    lead_list_validator() and the query string. Returns (304 response or
+    None, headers); on a 304 nothing is queried or serialized.
+    """
+    count, last_modified = validator
+    # updated_at may be stored to the second (MySQL DATETIME), so two updates
+    # within one second give the same validator; only hand one out once the
+    # second of the newest change is over
+    now = datetime.utcnow()
+    if last_modified and (now - last_modified).total_seconds() < 1:
+        return None, {"Cache-Control": "no-cache"}
+
+    digest = hashlib.sha1(f"{count}|{last_modified}|{request.url.query}".encode()).hexdigest()[:20]
+    etag = f'W/"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {t.strip() for t in if_none_match.split(",")}
+        matched = "*" in tags or etag in tags or etag[2:] in tags
+    elif request.headers.get("if-modified-since") and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+            matched = last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= since
+        except (TypeError, ValueError):
+            matched = False
+    else:
+        matched = False
+
+    if matched:
+        return Response(status_code=304, headers=headers), headers
+    return None, headers
+
+
+def parse_lead_ids(lead_ids: str):
+    ids = list(dict.fromkeys(int(i) for i in lead_ids.split(",") if i.strip()))
+    if len(ids) > 500:
+        raise HTTPException(status_code=400, detail="At most 500 lead ids per request")
+    return ids
+
 
 @router.get("/leads", response_model=list[LeadOut])
-def get_all_leads(db: Session = Depends(get_db)):
-    return list_leads(db)
+def get_all_leads(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    status: Optional[list[str]] = Query(None),
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    db: Session = Depends(get_read_db),
+):
+    """
+    List leads newest first.
+
+    Without `limit` the full list is returned (dashboard compatibility).
+    With `limit`, the next page's cursor is sent in the X-Next-Cursor header.
+    `fields=id,name,status` returns only those columns and skips loading
+    the `data` JSON blob unless it is asked for. With LEADS_FAST_JSON the
+    rows are selected as plain tuples and encoded with orjson.
+    Polls with If-None-Match / If-Modified-Since get a 304 when no lead changed.
+    """
+    selected = parse_lead_fields(fields)
+    not_modified, cache_headers = conditional_get(request, lead_list_validator(db))
+    if not_modified:
+        return not_modified
+
+    try:
+        if LEADS_FAST_JSON:
+            rows, next_cursor = list_lead_rows(
+                db, limit=limit, cursor=cursor, fields=selected,
+                status=status, min_score=min_score, max_score=max_score,
+            )
+            return fast_leads_response(rows, next_cursor, cache_headers)
+
+        leads, next_cursor = list_leads_page(
+            db,
+            limit=limit,
+            cursor=cursor,
+            fields=selected,
+            status=status,
+            min_score=min_score,
+            max_score=max_score,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return leads_response(leads, next_cursor, selected, response, cache_headers)
+
+
+def fast_leads_response(rows, next_cursor, headers: dict = None):
+    """LEADS_FAST_JSON path: column-value dicts go straight to orjson."""
+    headers = dict(headers or {})
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return FastJSONResponse(rows, headers=headers)
+
+
+# ---------------------------
+# Live updates (Server-Sent Events)
+# ---------------------------
+def _sse(event_id: int, event: dict) -> str:
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/leads/stream")
+async def stream_lead_events(request: Request, last_event_id: Optional[int] = None):
+    """
+    Server-Sent Events feed of lead changes (lead_created, lead_updated,
+    lead_log). Reconnecting clients resume from Last-Event-ID; if the
+    events they missed are gone, a `reset` event tells them to refetch.
+    """
+    header_id = request.headers.get("last-event-id")
+    if header_id and header_id.isdigit():
+        last_event_id = int(header_id)
+
+    q, backlog, complete = bus.subscribe(last_event_id)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            if not complete:
+                yield "event: reset\ndata: {}\n\n"
+            sent = last_event_id if complete and last_event_id else 0
+            for event_id, event in backlog:
+                yield _sse(event_id, event)
+                sent = event_id
+
+            while bus.is_subscribed(q):
+                try:
+                    event_id, event = await asyncio.wait_for(q.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n"
+                    continue
+                # An event published while subscribing may arrive in both backlog and queue
+                if event_id > sent:
+                    yield _sse(event_id, event)
+                    sent = event_id
+        finally:
+            bus.unsubscribe(q)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/leads/summary")
+def get_leads_summary(
+    hours: int = Query(24, ge=1, le=24 * 14),
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Dashboard numbers (status counts, score histogram, funnel and
+    hourly/daily created/qualified/emailed series) read from the rollup
+    table; cost does not depend on how many leads exist.
+    """
+    return get_summary(db, hours=hours, days=days)
+
+
+@router.get("/leads/search", response_model=list[LeadOut])
+def search_leads_endpoint(
+    request: Request,
+    response: Response,
+    sort: str = "-created_at",
+    status: Optional[str] = None,
+    email: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Filtered, sorted lead search. `sort` is one of created_at, -created_at,
+    score, -score; score sorts need a `status`. Only combinations an index
+    can serve are accepted (see search_leads_stmt).
+    """
+    selected = parse_lead_fields(fields)
+    not_modified, cache_headers = conditional_get(request, lead_list_validator(db))
+    if not_modified:
+        return not_modified
+
+    try:
+        leads, next_cursor = search_leads(
+            db,
+            sort=sort,
+            limit=limit,
+            status=status,
+            email=email,
+            min_score=min_score,
+            max_score=max_score,
+            created_after=created_after,
+            created_before=created_before,
+            cursor=cursor,
+            fields=selected,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return leads_response(leads, next_cursor, selected, response, cache_headers)
+
+
+@router.get("/leads/changes")
+def get_lead_changes(
+    request: Request,
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Leads created or updated after `since` (a cursor from the previous call,
+    or an ISO timestamp), oldest change first. Poll with the returned
+    `cursor`; keep paging while `has_more` is true. Changes show up once
+    they are CHANGES_SETTLE_SECONDS old.
+    """
+    selected = parse_lead_fields(fields)
+    validator = lead_list_validator(db)
+    _, last_modified = validator
+    # Changes still inside the settle window aren't in this response yet, so
+    # its validator must not turn the poll that would return them into a 304
+    if last_modified and (datetime.utcnow() - last_modified).total_seconds() < CHANGES_SETTLE_SECONDS + 1:
+        cache_headers = {"Cache-Control": "no-cache"}
+    else:
+        not_modified, cache_headers = conditional_get(request, validator)
+        if not_modified:
+            return not_modified
+
+    try:
+        leads, cursor, has_more = list_lead_changes(db, since=since, limit=limit, fields=selected)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if selected:
+        changes = [{f: getattr(lead, f) for f in selected} for lead in leads]
+    else:
+        changes = [LeadOut.model_validate(lead) for lead in leads]
+    return JSONResponse(
+        jsonable_encoder({"changes": changes, "cursor": cursor, "has_more": has_more}),
+        headers=cache_headers,
+    )
+
+
+# ---------------------------
+# Export
+# ---------------------------
+def _export_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _stream_export(fmt: str, include_result: bool):
+    # Own session: the request-scoped one may be closed before streaming ends
+    db = read_router.read_session()
+    try:
+        rows = iter_leads_for_export(db, include_result=include_result)
+
+        if fmt == "ndjson":
+            for row in rows:
+                yield json.dumps(row, default=_export_value) + "\n"
+            return
+
+        header = EXPORT_COLUMNS + (["agent_result"] if include_result else [])
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow([
+                json.dumps(v) if isinstance(v, (dict, list)) else _export_value(v)
+                for v in (row[c] for c in header)
+            ])
+            # Hand buffered text to the client in ~64 KB chunks
+            if out.tell() > 64 * 1024:
+                yield out.getvalue()
+                out.seek(0)
+                out.truncate()
+        yield out.getvalue()
+    finally:
+        db.close()
+
+
+@router.get("/leads/export")
+def export_leads(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    include_result: bool = False,
+):
+    """
+    Stream every lead as NDJSON or CSV. Rows come from a server-side cursor,
+    so memory use does not grow with the table.
+    """
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        _stream_export(format, include_result),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="leads.{format}"'},
+    )
+
+
+@router.get("/leads/logs", response_model=dict[int, LeadLogsOut])
+def get_logs_for_many_leads(
+    lead_ids: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    per_lead: int = Query(50, ge=1, le=500),
+    after: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Logs for many leads in one round trip.
+
+    Pass `lead_ids=1,2,3`, or `limit`/`cursor` to take the same page of
+    leads GET /api/leads would return. `after` continues each lead from its
+    previous next_cursor, as `lead_id:cursor` pairs (`after=12:abc,15:def`);
+    leads listed without a pair start from their first log.
+    """
+    if not lead_ids and limit is None:
+        raise HTTPException(status_code=400, detail="Pass lead_ids or limit")
+
+    try:
+        if lead_ids:
+            ids = parse_lead_ids(lead_ids)
+        else:
+            leads, _ = list_leads_page(db, limit=limit, cursor=cursor, fields={"id"})
+            ids = [lead.id for lead in leads]
+        return get_logs_for_leads(db, ids, per_lead=per_lead, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/leads/{lead_id}", response_model=LeadOut)
+def get_lead_endpoint(lead_id: int, db: Session = Depends(get_read_db)):
+    lead = db.get(Lead, lead_id)
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    return lead
+
 
 @router.get("/leads/{lead_id}/logs", response_model=list[LogOut])
-def get_lead_logs_endpoint(lead_id: int, db: Session = Depends(get_db)):
+def get_lead_logs_endpoint(lead_id: int, db: Session = Depends(get_read_db)):
     return get_lead_logs(db, lead_id)
 
+
+@router.get("/leads/{lead_id}/qualification")
+def get_qualification_status(lead_id: int, db: Session = Depends(get_db)):
+    """Where a lead's qualification stands: its latest job and current result."""
+    lead = db.get(Lead, lead_id)
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+
+    job = latest_job(db, lead_id)
+    return {
+        "lead_id": lead.id,
+        "status": lead.status,
+        "score": lead.score,
+        "duplicate_of": lead.duplicate_of,
+        "job": None if job is None else {
+            "status": job.status,
+            "attempts": job.attempts,
+            "available_at": job.available_at,
+            "last_error": job.last_error,
+        },
+    }
+
+
+# ---------------------------
+# Decision long-poll
+# ---------------------------
+def decision_snapshot(lead_id: int):
+    # Short-lived primary session: a parked request must not hold a pooled connection
+    db = SessionLocal()
+    try:
+        lead = db.get(Lead, lead_id)
+        if lead is None:
+            return None
+        job = latest_job(db, lead_id)
+        return {
+            "lead_id": lead.id,
+            "decided": lead.status != "NEW",
+            "status": lead.status,
+            "score": lead.score,
+            "confidence": lead.confidence,
+            "risk_flags": lead.risk_flags,
+            "duplicate_of": lead.duplicate_of,
+            "job_status": job.status if job else None,
+        }
+    finally:
+        db.close()
+
+
+@router.get("/leads/{lead_id}/decision")
+async def wait_for_decision(lead_id: int, wait: float = Query(0, ge=0)):
+    """
+    The lead's qualification result. With wait=N the request is held for up
+    to N seconds until agent_result is applied for the lead; "decided" says
+    whether it was. A failed job ends the wait early.
+    """
+    deadline = time.monotonic() + min(wait, DECISION_MAX_WAIT)
+    wake = bus.watch_lead(lead_id)
+    try:
+        while True:
+            wake.clear()
+            snapshot = await run_in_threadpool(decision_snapshot, lead_id)
+            if snapshot is None:
+                raise HTTPException(status_code=404, detail="Lead not found")
+
+            remaining = deadline - time.monotonic()
+            if snapshot["decided"] or snapshot["job_status"] == "FAILED" or remaining <= 0:
+                return snapshot
+
+            # Woken by this process's events; the periodic recheck covers
+            # results applied by another replica
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=min(remaining, DECISION_RECHECK_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        bus.unwatch_lead(lead_id, wake)
+
+
+# ---------------------------
+# Chat messages
+# ---------------------------
+@router.get("/leads/{lead_id}/messages", response_model=LeadMessagesOut)
+def get_lead_messages_endpoint(
+    lead_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    """A lead's chat history, newest first; pass next_cursor to load older messages."""
+    try:
+        messages, next_cursor = get_lead_messages(db, lead_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"messages": messages, "next_cursor": next_cursor}
+
+
+@router.post("/leads/{lead_id}/messages", response_model=MessageOut)
+def add_lead_message(lead_id: int, message: MessageCreate, db: Session = Depends(get_db)):
+    new_message = append_message(
+        db, lead_id, message.text, type=message.type, role=message.role, data=message.data
+    )
+    if new_message is None:
+        raise HTTPException(status_code=404, detail="Lead not found")
+
+    publish_lead_event("lead_message", lead_id, message_id=new_message.id, type=new_message.type)
+    return new_message
+
+def _get_detached_lead(db: Session, lead_id: int):
+    # Detached so later commits don't expire it and trigger lazy reloads on the event loop
+    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    if lead:
+        db.expunge(lead)
+    return lead
+
+
 @router.post("/leads/{lead_id}/send-email")
-def send_email_to_lead(lead_id: int, db: Session = Depends(get_db)):
+async def send_email_to_lead(
+    lead_id: int,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+):
     """
     Manually send email to a specific lead from the Email UI.
+    With an Idempotency-Key, a retry after a successful send replays the
+    first response instead of emailing the lead again.
     """
+    replay = await run_in_threadpool(idempotency_begin, db, "send_email", idempotency_key, {"lead_id": lead_id})
+    if replay:
+        return replay
+
+    try:
+        result = await _send_email(lead_id, db)
+    except Exception:
+        await run_in_threadpool(idempotency_release, db, "send_email", idempotency_key)
+        raise
+
+    if result["success"]:
+        await run_in_threadpool(idempotency_save, db, "send_email", idempotency_key, result)
+    else:
+        # Nothing was sent, so a retry with the same key should try again
+        await run_in_threadpool(idempotency_release, db, "send_email", idempotency_key)
+    return result
+
+
+async def _send_email(lead_id: int, db: Session):
     # Get lead from database
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    lead = await run_in_threadpool(_get_detached_lead, db, lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     
     if not lead.email:
         raise HTTPException(status_code=400, detail="Lead has no email address")
     
-    # Get agents service URL
-    AGENTS_URL = os.getenv("AGENTS_URL", "http://agents:8010")
-    
     try:
         # Call sales agent to send email
-        response = httpx.post(
+        response = await get_http_client().post(
             f"{AGENTS_URL}/run/sales_followup",
             json={
                 "lead_id": lead.id,
@@ -57,19 +769,21 @@ def send_email_to_lead(lead_id: int, db: Session = Depends(get_db)):
                 "decision": lead.status or "QUALIFIED",
                 "confidence": lead.confidence or 0.8,
             },
-            timeout=15
+            timeout=httpx.Timeout(15, pool=HTTP_POOL_TIMEOUT)
         )
         
         result = response.json()
         
         if result.get("status") == "sent":
             # Log email sending success
-            create_log(db, lead_id, "manual_email_sent", {
+            # Written now, not buffered: the UI reads these logs back right away
+            await run_in_threadpool(create_log, db, lead_id, "manual_email_sent", {
                 "status": "sent",
                 "to": lead.email,
                 "decision": lead.status,
                 "sent_from": "email_ui"
-            })
+            }, sync=True)
+            publish_lead_event("lead_log", lead_id, action="manual_email_sent")
             
             return {
                 "success": True,
@@ -79,11 +793,12 @@ def send_email_to_lead(lead_id: int, db: Session = Depends(get_db)):
         else:
             # Handle failure
             error_msg = result.get("error", "Unknown error")
-            create_log(db, lead_id, "manual_email_failed", {
+            await run_in_threadpool(create_log, db, lead_id, "manual_email_failed", {
                 "error": error_msg,
                 "to": lead.email,
                 "sent_from": "email_ui"
-            })
+            }, sync=True)
+            publish_lead_event("lead_log", lead_id, action="manual_email_failed")
             
             return {
                 "success": False,
@@ -92,10 +807,11 @@ def send_email_to_lead(lead_id: int, db: Session = Depends(get_db)):
             }
         
     except httpx.HTTPError as e:
-        create_log(db, lead_id, "manual_email_failed", {
+        await run_in_threadpool(create_log, db, lead_id, "manual_email_failed", {
             "error": str(e),
             "to": lead.email,
             "sent_from": "email_ui"
-        })
+        }, sync=True)
+        publish_lead_event("lead_log", lead_id, action="manual_email_failed")
         raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
 
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# ---------------------------
+# Admission control for lead intake
+# ---------------------------
+# POST /api/leads asks admit() before writing a lead:
+#   shed   -> 429 + Retry-After (source over its token bucket, running +
+#             ready jobs at ADMISSION_MAX_CONCURRENT, or the whole backlog,
+#             deferred jobs included, at ADMISSION_SHED_QUEUE)
+#   defer  -> ready jobs past ADMISSION_DEFER_QUEUE: the lead is stored but
+#             its qualification job only becomes available after
+#             ADMISSION_DEFER_SECONDS; 202 + status URL
+#   accept -> normal path
+# Deferred jobs are not "ready", so they don't keep pushing new leads into
+# deferral; defer < concurrency < shed by default.
+# Token buckets are per replica; the job limits read the shared queue, so
+# they hold across replicas. 0 disables a limit.
+
+ADMISSION_SOURCE_RATE = float(os.getenv("ADMISSION_SOURCE_RATE", "10"))     # leads/second per source
+ADMISSION_SOURCE_BURST = float(os.getenv("ADMISSION_SOURCE_BURST", "50"))
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "1000"))  # running + ready jobs
+ADMISSION_DEFER_QUEUE = int(os.getenv("ADMISSION_DEFER_QUEUE", "200"))      # ready jobs before deferring
+ADMISSION_SHED_QUEUE = int(os.getenv("ADMISSION_SHED_QUEUE", "2000"))       # pending + deferred jobs before shedding
+ADMISSION_DEFER_SECONDS = float(os.getenv("ADMISSION_DEFER_SECONDS", "60"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "30"))       # when shedding on queue depth
+ADMISSION_QUEUE_TTL = float(os.getenv("ADMISSION_QUEUE_TTL", "1.0"))        # queue depth cache seconds
+MAX_TRACKED_SOURCES = 10000
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token; returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Decision:
+    __slots__ = ("action", "reason", "retry_after", "defer_seconds")
+
+    def __init__(self, action: str, reason: str = None, retry_after: int = None, defer_seconds: float = 0):
+        self.action = action
+        self.reason = reason
+        self.retry_after = retry_after
+        self.defer_seconds = defer_seconds
+
+
+class AdmissionController:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self._queue = {"PENDING": 0, "DEFERRED": 0, "RUNNING": 0}
+        self._queue_checked = 0.0
+        self.stats = {"accepted": 0, "deferred": 0, "shed_rate_limited": 0,
+                      "shed_concurrency": 0, "shed_queue": 0}
+
+    def _queue_depth(self) -> dict:
+        """PENDING/DEFERRED/RUNNING job counts, re-read at most every ADMISSION_QUEUE_TTL seconds."""
+        now = time.monotonic()
+        if now - self._queue_checked >= ADMISSION_QUEUE_TTL:
+            from app.core.database import SessionLocal
+            from app.crud.job_crud import active_job_counts
+
+            self._queue_checked = now
+            db = SessionLocal()
+            try:
+                self._queue = active_job_counts(db)
+            finally:
+                db.close()
+        return self._queue
+
+    def _bucket_wait(self, source: str) -> float:
+        if ADMISSION_SOURCE_RATE <= 0:
+            return 0.0
+        with self._lock:
+            bucket = self._buckets.get(source)
+            if bucket is None:
+                bucket = self._buckets[source] = TokenBucket(ADMISSION_SOURCE_RATE, ADMISSION_SOURCE_BURST)
+                if len(self._buckets) > MAX_TRACKED_SOURCES:
+                    self._buckets.popitem(last=False)
+            self._buckets.move_to_end(source)
+            return bucket.take()
+
+    def _shed(self, reason: str, retry_after: float) -> Decision:
+        self.stats[f"shed_{reason}"] += 1
+        return Decision("shed", reason, retry_after=max(1, int(retry_after + 0.999)))
+
+    def admit(self, source: str) -> Decision:
+        """Decide for one intake request."""
+        wait = self._bucket_wait(source)
+        if wait:
+            return self._shed("rate_limited", wait)
+
+        queue = self._queue_depth()
+        ready = queue["PENDING"]
+        # Each accepted lead becomes a qualification job, so the work in
+        # flight is what the workers are running plus what is ready for them
+        if ADMISSION_MAX_CONCURRENT and queue["RUNNING"] + ready >= ADMISSION_MAX_CONCURRENT:
+            return self._shed("concurrency", ADMISSION_RETRY_AFTER)
+        if ADMISSION_SHED_QUEUE and ready + queue["DEFERRED"] >= ADMISSION_SHED_QUEUE:
+            return self._shed("queue", ADMISSION_RETRY_AFTER)
+        if ADMISSION_DEFER_QUEUE and ready >= ADMISSION_DEFER_QUEUE:
+            self.stats["deferred"] += 1
+            return Decision("defer", "queue", defer_seconds=ADMISSION_DEFER_SECONDS)
+
+        self.stats["accepted"] += 1
+        return Decision("accept")
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "queue": dict(self._queue),
+            "tracked_sources": len(self._buckets),
+        }
+
+
+admission = AdmissionController()
+
+
+def admission_stats() -> dict:
+    return admission.snapshot()
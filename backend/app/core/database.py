@@ -1,18 +1,37 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import itertools
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from datetime import datetime
+from fastapi import Request
+from sqlalchemy import create_engine, Table, Column, Integer, DateTime, select, update, insert
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool
+
+from app.core.db_pool import engine_options, instrument_engine
 
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-connect_args = {}
-if "sqlite" in DATABASE_URL:
-    connect_args = {"check_same_thread": False}
+# DB_ASYNC=true serves the hot lead routes from an AsyncEngine
+# (aiomysql / aiosqlite) instead of the threadpool + sync engine.
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+def engine_connect_args(url: str) -> dict:
+    if "sqlite" in url:
+        return {"check_same_thread": False}
+    return {}
+
+
+connect_args = engine_connect_args(DATABASE_URL)
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args, pool_pre_ping=True)
+engine = instrument_engine(
+    create_engine(DATABASE_URL, connect_args=connect_args, **engine_options(DATABASE_URL, "primary")),
+    "primary",
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -24,3 +43,264 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ---------------------------
+# Async engine (optional)
+# ---------------------------
+ASYNC_DRIVERS = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Swap the sync driver in a DATABASE_URL for its asyncio counterpart."""
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = instrument_engine(
+        create_async_engine(
+            to_async_url(DATABASE_URL), **engine_options(DATABASE_URL, "async_primary", is_async=True)
+        ),
+        "async_primary",
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# ---------------------------
+# Read replicas (optional)
+# ---------------------------
+# DATABASE_READ_URL is a comma-separated list of replica URLs. Read-only GET
+# routes take their session from get_read_db / get_async_read_db, which
+# picks a replica round-robin. A replica is only used while its measured
+# lag is within DATABASE_READ_MAX_LAG; otherwise, and whenever no replica
+# is usable, reads fall back to the primary.
+#
+# Lag comes from a heartbeat row: the primary stamps db_heartbeat every
+# DATABASE_HEARTBEAT_SECONDS and the monitor reads the stamp back from each
+# replica, so it works for any replication setup (including two SQLite
+# files kept in sync by scripts/sqlite_replica.py).
+#
+# Read-your-writes: a lead written by this process in the last
+# DATABASE_READ_MAX_LAG seconds is read from the primary on routes that
+# take a lead_id, and any request can send "X-Read-Consistency: primary".
+READ_URLS = [u.strip() for u in os.getenv("DATABASE_READ_URL", "").split(",") if u.strip()]
+READ_MAX_LAG = float(os.getenv("DATABASE_READ_MAX_LAG", "5"))
+HEARTBEAT_SECONDS = float(os.getenv("DATABASE_HEARTBEAT_SECONDS", "1"))
+
+heartbeat_table = Table(
+    "db_heartbeat",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("beat_at", DateTime, nullable=False),
+)
+
+
+def replica_options(url: str, name: str, is_async: bool = False) -> dict:
+    options = engine_options(url, name, is_async)
+    if "sqlite" in url:
+        # SQLite replicas get swapped on disk by a copier; open the current file every time
+        options["poolclass"] = NullPool
+    return options
+
+
+class Replica:
+    def __init__(self, url: str, name: str):
+        self.url = url
+        self.name = name
+        self.engine = instrument_engine(
+            create_engine(url, connect_args=engine_connect_args(url), **replica_options(url, name)),
+            name,
+        )
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        self.lag = None          # seconds; None until the first check succeeds
+        self.healthy = False
+        self.error = None
+        self.reads = 0
+
+    @property
+    def usable(self) -> bool:
+        return self.healthy and self.lag is not None and self.lag <= READ_MAX_LAG
+
+    def check(self):
+        try:
+            with self.engine.connect() as conn:
+                beat_at = conn.execute(
+                    select(heartbeat_table.c.beat_at).where(heartbeat_table.c.id == 1)
+                ).scalar()
+        except Exception as e:
+            self.healthy, self.lag, self.error = False, None, str(e)[:200]
+            return
+        self.healthy, self.error = True, None
+        # No heartbeat yet means the replica hasn't caught up with the primary at all.
+        # The newest beat on the primary can itself be one interval old.
+        if beat_at is None:
+            self.lag = None
+        else:
+            age = (datetime.utcnow() - beat_at).total_seconds()
+            self.lag = max(0.0, age - HEARTBEAT_SECONDS)
+
+    def describe(self) -> dict:
+        return {
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "healthy": self.healthy,
+            "lag": None if self.lag is None else round(self.lag, 3),
+            "usable": self.usable,
+            "reads": self.reads,
+            "error": self.error,
+        }
+
+
+class ReadRouter:
+    def __init__(self, urls):
+        self.replicas = [Replica(u, f"replica_{i}") for i, u in enumerate(urls)]
+        self._next = itertools.count()
+        self._recent = {}        # lead_id -> monotonic time of its last write
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.primary_reads = 0
+        self.fallbacks = 0
+
+    # ---- read-your-writes ----
+    def note_write(self, lead_id: int):
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._recent[lead_id] = now
+            if len(self._recent) > 10000:
+                cutoff = now - READ_MAX_LAG
+                self._recent = {k: t for k, t in self._recent.items() if t > cutoff}
+
+    def recently_written(self, lead_id: int) -> bool:
+        written = self._recent.get(lead_id)
+        return written is not None and time.monotonic() - written <= READ_MAX_LAG
+
+    # ---- routing ----
+    def pick(self, request: Request = None):
+        """The replica to read from for `request`, or None for the primary."""
+        if not self.replicas:
+            return None
+        if request is not None:
+            if request.headers.get("x-read-consistency", "").lower() == "primary":
+                self.primary_reads += 1
+                return None
+            lead_id = request.path_params.get("lead_id")
+            if lead_id is not None and self.recently_written(int(lead_id)):
+                self.primary_reads += 1
+                return None
+
+        start = next(self._next)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if replica.usable:
+                replica.reads += 1
+                return replica
+        self.fallbacks += 1
+        return None
+
+    def read_session(self, request: Request = None):
+        replica = self.pick(request)
+        return replica.SessionLocal() if replica else SessionLocal()
+
+    # ---- heartbeat / lag monitor ----
+    def beat(self):
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            if not conn.execute(
+                update(heartbeat_table).where(heartbeat_table.c.id == 1).values(beat_at=now)
+            ).rowcount:
+                conn.execute(insert(heartbeat_table).values(id=1, beat_at=now))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.beat()
+            except Exception as e:
+                print(f"⚠️ Replica heartbeat failed: {e}")
+            for replica in self.replicas:
+                replica.check()
+            self._stop.wait(HEARTBEAT_SECONDS)
+
+    def start(self):
+        if not self.replicas or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-monitor", daemon=True)
+        self._thread.start()
+        print(f"📚 Routing reads to {len(self.replicas)} replica(s), max lag {READ_MAX_LAG}s")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "replicas": [r.describe() for r in self.replicas],
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+            "max_lag": READ_MAX_LAG,
+        }
+
+
+read_router = ReadRouter(READ_URLS)
+
+
+def start_replica_monitor():
+    read_router.start()
+
+
+def stop_replica_monitor():
+    read_router.stop()
+
+
+def get_read_db(request: Request):
+    db = read_router.read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+if DB_ASYNC:
+    for replica in read_router.replicas:
+        name = f"async_{replica.name}"
+        replica.async_engine = instrument_engine(
+            create_async_engine(to_async_url(replica.url), **replica_options(replica.url, name, is_async=True)),
+            name,
+        )
+        replica.AsyncSessionLocal = async_sessionmaker(
+            replica.async_engine, autoflush=False, expire_on_commit=False
+        )
+
+
+async def get_async_read_db(request: Request):
+    replica = read_router.pick(request)
+    factory = replica.AsyncSessionLocal if replica else AsyncSessionLocal
+    async with factory() as db:
+        yield db
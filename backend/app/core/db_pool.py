@@ -0,0 +1,166 @@
+import os
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+
+# ---------------------------
+# Pool settings
+# ---------------------------
+# Applied to every MySQL engine (primary, replicas, sync and async), so
+# each replica process holds at most DB_POOL_SIZE + DB_MAX_OVERFLOW
+# connections per engine. SQLite keeps SQLAlchemy's own pool choice.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))     # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))     # keep below MySQL wait_timeout
+# With DB_POOL_RECYCLE under the server's idle timeout, pre-ping mostly
+# guards against server restarts; turn it off to save a round trip per checkout.
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", str(DB_POOL_SIZE)))  # connections opened at startup
+
+
+class PoolStats:
+    """Counters for one engine's pool, fed by pool events and the timed checkout."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.max_checked_out = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.waits = 0
+
+    def record_wait(self, seconds: float):
+        self.waits += 1
+        self.wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        checked_out = pool.checkedout() if hasattr(pool, "checkedout") else None
+        return {
+            "pool": type(pool).__name__ if pool is not None else None,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_out": checked_out,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "max_checked_out": self.max_checked_out,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.wait_seconds / self.waits * 1000, 3) if self.waits else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+        }
+
+
+_stats = {}
+
+
+def timed_pool_class(base, stats: PoolStats):
+    """A subclass of `base` that times how long each checkout waits for a connection."""
+
+    class TimedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                stats.timeouts += 1
+                raise
+            finally:
+                stats.record_wait(time.perf_counter() - start)
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def engine_options(url: str, name: str, is_async: bool = False) -> dict:
+    """create_engine / create_async_engine pool arguments for `url`, reported as `name`."""
+    stats = _stats[name] = PoolStats(name)
+    if "sqlite" in url:
+        return {"pool_pre_ping": DB_POOL_PRE_PING}
+    return {
+        "poolclass": timed_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, stats),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def instrument_engine(engine, name: str):
+    """Count checkouts/connects/invalidations on `engine` (sync or async)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    stats = _stats.setdefault(name, PoolStats(name))
+    stats.pool = sync_engine.pool
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_conn, record):
+        stats.connects += 1
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_conn, record, proxy):
+        stats.checkouts += 1
+        # dispose() swaps in a new pool; follow it
+        stats.pool = sync_engine.pool
+        if hasattr(stats.pool, "checkedout"):
+            stats.max_checked_out = max(stats.max_checked_out, stats.pool.checkedout())
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(dbapi_conn, record, exception):
+        stats.invalidations += 1
+
+    @event.listens_for(sync_engine, "soft_invalidate")
+    def on_soft_invalidate(dbapi_conn, record, exception):
+        stats.invalidations += 1
+
+    return engine
+
+
+# ---------------------------
+# Warm-up
+# ---------------------------
+def warm_pool(engine, count: int = DB_POOL_WARMUP) -> int:
+    """Open `count` connections at once and hand them back, so the pool starts full."""
+    if count <= 0 or engine.dialect.name == "sqlite":
+        return 0
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.connect())
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+async def warm_async_pool(engine, count: int = DB_POOL_WARMUP) -> int:
+    if count <= 0 or engine.dialect.name == "sqlite":
+        return 0
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(await engine.connect())
+    finally:
+        for conn in connections:
+            await conn.close()
+    return len(connections)
+
+
+def pool_stats() -> dict:
+    return {
+        "settings": {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pre_ping": DB_POOL_PRE_PING,
+        },
+        **{name: stats.snapshot() for name, stats in _stats.items()},
+    }
@@ -0,0 +1,116 @@
+import asyncio
+import itertools
+import os
+import threading
+from collections import deque
+
+from app.core.database import read_router
+
+
+# ---------------------------
+# In-process lead event bus
+# ---------------------------
+# Routes publish small lead deltas after they commit; SSE clients of
+# GET /api/leads/stream subscribe. Events are per process: behind several
+# replicas each client sees the events of the replica it is connected to.
+
+EVENTS_BUFFER = int(os.getenv("EVENTS_BUFFER", "1000"))            # replay window for Last-Event-ID
+EVENTS_SUBSCRIBER_QUEUE = int(os.getenv("EVENTS_SUBSCRIBER_QUEUE", "500"))
+
+
+class EventBus:
+    def __init__(self, buffer_size=EVENTS_BUFFER):
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._watchers = {}      # lead_id -> asyncio.Events of requests waiting on that lead
+        self._loop = None
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def bind(self, loop):
+        self._loop = loop
+
+    def publish(self, event: dict):
+        """Thread-safe: callable from the event loop or from threadpool routes."""
+        with self._lock:
+            item = (next(self._ids), event)
+            self._last_id = item[0]
+            self._buffer.append(item)
+        self.published += 1
+        if self._loop is not None and self._subscribers:
+            self._loop.call_soon_threadsafe(self._deliver, item)
+        if self._loop is not None and event.get("lead_id") in self._watchers:
+            self._loop.call_soon_threadsafe(self._wake, event["lead_id"])
+
+    def _deliver(self, item):
+        for q in list(self._subscribers):
+            try:
+                q.put_nowait(item)
+            except asyncio.QueueFull:
+                # A client this far behind reconnects and resumes from its Last-Event-ID
+                self._subscribers.discard(q)
+                self.dropped_subscribers += 1
+
+    def subscribe(self, last_event_id: int = None):
+        """
+        Register a subscriber. Returns (queue, backlog, complete) where
+        backlog holds buffered events newer than last_event_id and complete
+        is False when some of them already fell out of the buffer.
+        """
+        q = asyncio.Queue(maxsize=EVENTS_SUBSCRIBER_QUEUE)
+        with self._lock:
+            backlog = []
+            complete = True
+            if last_event_id is not None:
+                backlog = [item for item in self._buffer if item[0] > last_event_id]
+                oldest = self._buffer[0][0] if self._buffer else self._last_id + 1
+                # Either events fell out of the buffer, or the id is from before a restart
+                complete = oldest <= last_event_id + 1 and last_event_id <= self._last_id
+            self._subscribers.add(q)
+        return q, backlog, complete
+
+    def unsubscribe(self, q):
+        self._subscribers.discard(q)
+
+    def is_subscribed(self, q) -> bool:
+        return q in self._subscribers
+
+    def watch_lead(self, lead_id: int) -> asyncio.Event:
+        """An Event set whenever something is published for `lead_id`. Call from the loop."""
+        wake = asyncio.Event()
+        self._watchers.setdefault(lead_id, set()).add(wake)
+        return wake
+
+    def unwatch_lead(self, lead_id: int, wake: asyncio.Event):
+        watchers = self._watchers.get(lead_id)
+        if watchers is not None:
+            watchers.discard(wake)
+            if not watchers:
+                del self._watchers[lead_id]
+
+    def _wake(self, lead_id: int):
+        for wake in self._watchers.get(lead_id, ()):
+            wake.set()
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "lead_watchers": sum(len(w) for w in self._watchers.values()),
+            "published": self.published,
+            "buffered": len(self._buffer),
+            "dropped_subscribers": self.dropped_subscribers,
+        }
+
+
+bus = EventBus()
+
+
+def publish_lead_event(event_type: str, lead_id: int, **fields):
+    """Publish a lead delta, e.g. publish_lead_event("lead_updated", 7, status="HOT")."""
+    # Every committed lead write is published here, so this is also where
+    # replica routing learns which leads must be read from the primary
+    read_router.note_write(lead_id)
+    bus.publish({"type": event_type, "lead_id": lead_id, **fields})
@@ -0,0 +1,107 @@
+import os
+import time
+import httpx
+
+
+# ---------------------------
+# Pool settings
+# ---------------------------
+AGENTS_URL = os.getenv("AGENTS_URL", "http://agents:8010")
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+HTTP2 = os.getenv("HTTP2", "false").lower() in ("1", "true", "yes")   # needs the h2 package
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that counts requests so the pool can be sized from data."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.pool_timeouts = 0
+        self.total_seconds = 0.0
+
+    async def handle_async_request(self, request):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            return await super().handle_async_request(request)
+        except httpx.PoolTimeout:
+            self.pool_timeouts += 1
+            self.errors += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_seconds += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        connections = list(getattr(self._pool, "connections", []))
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "max_connections": HTTP_MAX_CONNECTIONS,
+            "max_keepalive": HTTP_MAX_KEEPALIVE,
+            "http2": HTTP2,
+            "connections_open": len(connections),
+            "connections_idle": idle,
+            "connections_active": len(connections) - idle,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "pool_timeouts": self.pool_timeouts,
+            "avg_request_ms": round(self.total_seconds / self.requests * 1000, 2) if self.requests else 0.0,
+        }
+
+
+# ---------------------------
+# Application-lifetime client
+# ---------------------------
+_client = None
+_transport = None
+
+
+def start_http_client() -> httpx.AsyncClient:
+    """Create the shared client. Called once from the app lifespan."""
+    global _client, _transport
+    _transport = InstrumentedTransport(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        http2=HTTP2,
+    )
+    _client = httpx.AsyncClient(
+        transport=_transport,
+        timeout=httpx.Timeout(30, pool=HTTP_POOL_TIMEOUT),
+    )
+    return _client
+
+
+async def stop_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    # Fall back to a lazily created client for scripts/tests that skip the lifespan
+    if _client is None:
+        start_http_client()
+    return _client
+
+
+def http_client_stats() -> dict:
+    return _transport.stats() if _transport is not None else {}
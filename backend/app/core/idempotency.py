@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.idempotency import IdempotencyKey
+
+
+# ---------------------------
+# Idempotency-Key support
+# ---------------------------
+# begin() claims a key before the work runs, save() stores the response,
+# release() drops the claim when the work failed so a retry can run it.
+# Finished responses are also kept in a per-process LRU, so most replays
+# never reach the database. Without a key all three are no-ops.
+
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+# An IN_PROGRESS claim older than this is assumed abandoned (crashed worker)
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+PURGE_EVERY = 1000
+
+_cache = OrderedDict()   # (scope, key) -> (request_hash, status_code, body, expires_at)
+_lock = threading.Lock()
+_stats = {"replayed_memory": 0, "replayed_db": 0, "claimed": 0, "conflicts": 0, "purged": 0}
+
+
+def request_hash(payload) -> str:
+    raw = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _replay(status_code: int, body):
+    return JSONResponse(body, status_code=status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def _check_hash(stored_hash: str, req_hash: str):
+    if stored_hash != req_hash:
+        _stats["conflicts"] += 1
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+
+
+def _cache_get(scope: str, key: str, now: datetime):
+    with _lock:
+        entry = _cache.get((scope, key))
+        if entry is None:
+            return None
+        if entry[3] <= now:
+            del _cache[(scope, key)]
+            return None
+        _cache.move_to_end((scope, key))
+        return entry
+
+
+def _cache_put(scope: str, key: str, entry):
+    with _lock:
+        _cache[(scope, key)] = entry
+        _cache.move_to_end((scope, key))
+        while len(_cache) > IDEMPOTENCY_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _purge_expired(db: Session, now: datetime):
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+    db.commit()
+    _stats["purged"] += result.rowcount or 0
+
+
+def idempotency_begin(db: Session, scope: str, key: str, payload):
+    """
+    Claim `key` for this request. Returns a JSONResponse replaying the
+    stored response when the key was already completed, or None if the
+    caller should do the work (and then save() or release()).
+    Raises 409 while another request holds the key, 422 on a payload mismatch.
+    """
+    if not key:
+        return None
+    now = datetime.utcnow()
+    req_hash = request_hash(payload)
+
+    cached = _cache_get(scope, key, now)
+    if cached is not None:
+        _check_hash(cached[0], req_hash)
+        _stats["replayed_memory"] += 1
+        return _replay(cached[1], cached[2])
+
+    db.add(IdempotencyKey(
+        scope=scope, key=key, request_hash=req_hash, status="IN_PROGRESS",
+        created_at=now, expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+    ))
+    try:
+        db.commit()
+        _stats["claimed"] += 1
+        if _stats["claimed"] % PURGE_EVERY == 0:
+            _purge_expired(db, now)
+        return None
+    except IntegrityError:
+        db.rollback()
+
+    row = db.scalar(select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key))
+    if row is None:
+        # Purged between our insert and this read; treat as a fresh claim
+        return idempotency_begin(db, scope, key, payload)
+
+    if row.expires_at <= now or (
+        row.status == "IN_PROGRESS" and row.created_at <= now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+    ):
+        # Expired, or abandoned mid-request: take it over with a conditional update
+        taken = db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == row.id, IdempotencyKey.created_at == row.created_at)
+            .values(request_hash=req_hash, status="IN_PROGRESS", response_code=None, response_body=None,
+                    created_at=now, expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS))
+        ).rowcount
+        db.commit()
+        if taken:
+            _stats["claimed"] += 1
+            return None
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+
+    _check_hash(row.request_hash, req_hash)
+    if row.status != "DONE":
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+
+    _cache_put(scope, key, (row.request_hash, row.response_code, row.response_body, row.expires_at))
+    _stats["replayed_db"] += 1
+    return _replay(row.response_code, row.response_body)
+
+
+def idempotency_save(db: Session, scope: str, key: str, body, status_code: int = 200):
+    """Store the response for `key`; replays of the key return exactly this."""
+    if not key:
+        return
+    body = jsonable_encoder(body)
+    row = db.scalar(select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key))
+    if row is None:
+        return
+    row.status = "DONE"
+    row.response_code = status_code
+    row.response_body = body
+    db.commit()
+    _cache_put(scope, key, (row.request_hash, status_code, body, row.expires_at))
+
+
+def idempotency_release(db: Session, scope: str, key: str):
+    """Drop an IN_PROGRESS claim after a failure so the client's retry runs the work."""
+    if not key:
+        return
+    db.rollback()
+    db.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.scope == scope, IdempotencyKey.key == key, IdempotencyKey.status == "IN_PROGRESS",
+    ))
+    db.commit()
+
+
+def idempotency_stats() -> dict:
+    return {**_stats, "cached": len(_cache)}
@@ -0,0 +1,165 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+
+# ---------------------------
+# Settings
+# ---------------------------
+LOG_WRITER_ENABLED = os.getenv("LOG_WRITER_ENABLED", "true").lower() in ("1", "true", "yes")
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_MS = float(os.getenv("LOG_FLUSH_MS", "50"))
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", "10000"))
+
+
+class LogWriter:
+    """
+    Collects Log rows in a bounded in-memory queue and writes them with one
+    executemany INSERT every LOG_BATCH_SIZE rows or LOG_FLUSH_MS, whichever
+    comes first. Runs on its own thread since all DB access is sync.
+    """
+
+    def __init__(self, engine, batch_size=LOG_BATCH_SIZE, flush_ms=LOG_FLUSH_MS, max_queue=LOG_QUEUE_MAX):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._stopping = threading.Event()
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.rejected = 0      # queue full -> caller wrote synchronously
+        self.errors = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    # ---------- producer side ----------
+    def submit(self, row: dict) -> bool:
+        """Queue a row; False means the queue is full or stopped and the caller must write it."""
+        if self._thread is None or self._stopping.is_set():
+            return False
+        try:
+            self.queue.put_nowait((time.monotonic(), row))
+        except queue.Full:
+            self.rejected += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    # ---------- consumer side ----------
+    def _insert(self, rows):
+        from app.models.log import Log
+        from app.crud.rollup_crud import apply_rollups, log_deltas
+
+        # Email counters for the dashboard ride along in the same transaction
+        with self.engine.begin() as conn:
+            conn.execute(insert(Log), rows)
+            apply_rollups(conn, log_deltas(rows))
+
+    def _write(self, batch):
+        rows = [row for _, row in batch]
+        try:
+            self._insert(rows)
+        except Exception as e:
+            # One bad row (e.g. a deleted lead) must not drop the whole batch
+            print(f"⚠️ Log writer batch of {len(rows)} failed, retrying row by row: {e}")
+            written = []
+            for row in rows:
+                try:
+                    self._insert([row])
+                    written.append(row)
+                except Exception:
+                    self.errors += 1
+            rows = written
+
+        lag = (time.monotonic() - batch[0][0]) * 1000
+        self.written += len(rows)
+        self.batches += 1
+        self.max_batch = max(self.max_batch, len(rows))
+        self.last_lag_ms = lag
+        self.max_lag_ms = max(self.max_lag_ms, lag)
+
+    def _run(self):
+        while not (self._stopping.is_set() and self.queue.empty()):
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = first[0] + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop accepting rows and flush everything still queued."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._thread is not None,
+            "queue_size": self.queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch": round(self.written / self.batches, 1) if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "rejected_to_sync": self.rejected,
+            "errors": self.errors,
+            "last_lag_ms": round(self.last_lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+        }
+
+
+_writer = None
+
+
+def start_log_writer(engine):
+    global _writer
+    if LOG_WRITER_ENABLED:
+        _writer = LogWriter(engine)
+        _writer.start()
+
+
+def stop_log_writer():
+    if _writer is not None:
+        _writer.stop()
+
+
+def submit_log(lead_id: int, action: str, details: dict) -> bool:
+    """Buffer a log row. Returns False when the caller should write it directly."""
+    if _writer is None:
+        return False
+    return _writer.submit({
+        "lead_id": lead_id,
+        "action": action,
+        "details": details,
+        "timestamp": datetime.utcnow(),
+    })
+
+
+def log_writer_stats() -> dict:
+    return _writer.stats() if _writer is not None else {"enabled": False}
@@ -0,0 +1,221 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import inspect, text, select, insert, update, null
+
+from app.core.database import Base
+
+
+# ---------------------------
+# Lightweight schema upgrades
+# ---------------------------
+# create_all() only creates missing tables. These helpers bring tables
+# that already exist (e.g. a long-lived MySQL volume) up to the columns
+# and indexes declared on the models, so they ship with a normal deploy.
+
+
+MIGRATION_LOCK = "matrixlead_startup_migrations"
+MIGRATION_LOCK_TIMEOUT = 600   # seconds a replica waits for another one's migrations
+
+
+@contextmanager
+def migration_lock(engine):
+    """
+    Run startup migrations one replica at a time: MySQL GET_LOCK or a
+    Postgres advisory lock, held on its own connection. The next replica
+    re-checks the schema once it gets the lock and finds nothing to do.
+    SQLite (one local file) needs no lock.
+    """
+    dialect = engine.dialect.name
+    if dialect not in ("mysql", "postgresql"):
+        yield
+        return
+
+    with engine.connect() as conn:
+        if dialect == "mysql":
+            got = conn.execute(text("SELECT GET_LOCK(:name, :timeout)"),
+                               {"name": MIGRATION_LOCK, "timeout": MIGRATION_LOCK_TIMEOUT}).scalar()
+            if got != 1:
+                raise RuntimeError("Timed out waiting for another replica's schema migrations")
+        else:
+            conn.execute(text(f"SET LOCAL lock_timeout = '{MIGRATION_LOCK_TIMEOUT}s'"))
+            conn.execute(text("SELECT pg_advisory_lock(hashtext(:name))"), {"name": MIGRATION_LOCK})
+        try:
+            yield
+        finally:
+            if dialect == "mysql":
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATION_LOCK})
+            else:
+                conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": MIGRATION_LOCK})
+
+
+def ensure_columns(engine):
+    """ALTER TABLE ... ADD COLUMN for model columns missing from an existing table (added as NULLable)."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = engine.dialect.identifier_preparer
+    added = []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            print(f"🛠 Adding column {column.name} on {table.name}...")
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"ALTER TABLE {preparer.quote(table.name)} "
+                    f"ADD COLUMN {preparer.quote(column.name)} {column.type.compile(dialect=engine.dialect)}"
+                ))
+            added.append(f"{table.name}.{column.name}")
+
+    return added
+
+
+def ensure_indexes(engine):
+    """Create any model-declared index that is missing from an existing table."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                print(f"🛠 Adding index {index.name} on {table.name}...")
+                index.create(bind=engine)
+                created.append(index.name)
+
+    return created
+
+
+def reshard_rollups(engine):
+    """
+    lead_rollups from before counters were sharded has a (period, bucket,
+    metric) unique key. The table only holds derived counters, so recreate
+    it; backfill_rollups() on startup rebuilds it from leads and logs.
+    Run under migration_lock(), so a second replica starting at the same
+    time sees the sharded table instead of dropping it again.
+    """
+    from app.models.rollup import LeadRollup
+
+    table = LeadRollup.__table__
+    inspector = inspect(engine)
+    if table.name not in inspector.get_table_names():
+        return False
+    unique = {c["name"] for c in inspector.get_unique_constraints(table.name)}
+    unique |= {ix["name"] for ix in inspector.get_indexes(table.name) if ix.get("unique")}
+    if "uq_lead_rollups_period_bucket_metric_shard" in unique:
+        return False
+
+    print("🛠 Recreating lead_rollups with sharded counters...")
+    table.drop(bind=engine)
+    table.create(bind=engine)
+    return True
+
+
+def backfill_updated_at(engine):
+    """Rows from before updated_at was maintained may be NULL; the change feed skips NULLs."""
+    with engine.begin() as conn:
+        result = conn.execute(text("UPDATE leads SET updated_at = created_at WHERE updated_at IS NULL"))
+        if result.rowcount:
+            print(f"🛠 Backfilled updated_at on {result.rowcount} leads")
+
+
+def migrate_message_history(engine, batch_size: int = 500):
+    """
+    Move Lead.messages JSON histories into lead_messages, batch by batch.
+    Each lead's rows, its last_message fields and clearing its JSON copy
+    commit together, so an interrupted run simply resumes.
+    """
+    from app.models.lead import Lead
+    from app.models.message import LeadMessage
+    from app.crud.message_crud import legacy_message_rows
+
+    leads = Lead.__table__
+    moved = 0
+    while True:
+        with engine.begin() as conn:
+            batch = conn.execute(
+                select(leads.c.id, leads.c.messages, leads.c.updated_at)
+                .where(leads.c.messages.is_not(None))
+                .order_by(leads.c.id)
+                .limit(batch_size)
+            ).all()
+            if not batch:
+                break
+
+            for lead_id, messages, updated_at in batch:
+                rows = legacy_message_rows(lead_id, messages)
+                for row in rows:
+                    row["created_at"] = row["created_at"] or updated_at or datetime.utcnow()
+                if rows:
+                    conn.execute(insert(LeadMessage), rows)
+                last = rows[-1] if rows else None
+                conn.execute(
+                    update(leads)
+                    .where(leads.c.id == lead_id)
+                    .values(
+                        messages=null(),
+                        message_count=len(rows),
+                        last_message=last["text"] if last else None,
+                        last_message_at=last["created_at"] if last else None,
+                        updated_at=leads.c.updated_at,   # not a user-visible change
+                    )
+                )
+                moved += len(rows)
+
+    if moved:
+        print(f"🛠 Moved {moved} chat messages into lead_messages")
+    return moved
+
+
+def backfill_fingerprints(engine, batch_size: int = 1000):
+    """Fill duplicate-detection fingerprints on leads created before they existed."""
+    from app.models.lead import Lead
+    from app.crud.dedupe_crud import lead_fingerprints
+
+    leads = Lead.__table__
+    last_id, filled = 0, 0
+    while True:
+        with engine.begin() as conn:
+            batch = conn.execute(
+                select(leads.c.id, leads.c.email, leads.c.phone, leads.c.company)
+                .where(
+                    leads.c.id > last_id,
+                    leads.c.email_fp.is_(None),
+                    leads.c.phone_fp.is_(None),
+                    leads.c.company_fp.is_(None),
+                )
+                .order_by(leads.c.id)
+                .limit(batch_size)
+            ).all()
+            if not batch:
+                break
+            for lead_id, email, phone, company in batch:
+                fps = lead_fingerprints(email, phone, company)
+                if any(fps.values()):
+                    conn.execute(
+                        update(leads).where(leads.c.id == lead_id)
+                        .values(updated_at=leads.c.updated_at, **fps)
+                    )
+                    filled += 1
+            last_id = batch[-1][0]
+
+    if filled:
+        print(f"🛠 Fingerprinted {filled} leads for duplicate detection")
+    return filled
+
+
+def upgrade_schema(engine):
+    reshard_rollups(engine)
+    ensure_columns(engine)
+    created = ensure_indexes(engine)
+    backfill_updated_at(engine)
+    migrate_message_history(engine)
+    backfill_fingerprints(engine)
+    return created
@@ -0,0 +1,36 @@
+import json
+import os
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+# ---------------------------
+# Fast JSON responses
+# ---------------------------
+# Used by the row-tuple listing path (LEADS_FAST_JSON): the content is
+# already plain dicts of column values, so it goes straight to orjson
+# without jsonable_encoder or response_model validation.
+
+LEADS_FAST_JSON = os.getenv("LEADS_FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+
+def _default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
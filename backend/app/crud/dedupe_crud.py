@@ -0,0 +1,191 @@
+import hashlib
+import os
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, exists, and_
+from sqlalchemy.orm import Session
+from app.models.lead import Lead
+from app.models.log import Log
+from app.models.job import QualificationJob
+from app.crud.rollup_crud import status_change_deltas
+
+
+# -----------------------------
+# DUPLICATE LEADS
+# -----------------------------
+# A lead whose normalized email (or phone + company) matches an original
+# lead created within DEDUPE_WINDOW_HOURS is linked to it via duplicate_of
+# and gets no qualification job: it copies the original's result, or
+# receives it from apply_agent_result when the original's job finishes.
+# If that job fails for good, the waiting duplicates get jobs of their own
+# (job_crud.fail_job).
+
+DEDUPE_WINDOW_HOURS = float(os.getenv("DEDUPE_WINDOW_HOURS", "720"))   # 0 disables
+# Groq-backed tool calls one qualification fans out to (agents/agent_runner.py)
+LLM_CALLS_PER_QUALIFICATION = int(os.getenv("LLM_CALLS_PER_QUALIFICATION", "5"))
+
+RESULT_FIELDS = ("status", "score", "confidence", "risk_flags", "enriched")
+COMPANY_SUFFIXES = {"inc", "llc", "ltd", "limited", "corp", "corporation", "co", "company", "gmbh", "plc", "sa", "ag", "bv"}
+GMAIL_DOMAINS = {"gmail.com", "googlemail.com"}
+
+
+def normalize_email(email: str):
+    email = (email or "").strip().lower()
+    if "@" not in email:
+        return None
+    local, _, domain = email.rpartition("@")
+    local = local.split("+", 1)[0]
+    if domain in GMAIL_DOMAINS:
+        local, domain = local.replace(".", ""), "gmail.com"
+    return f"{local}@{domain}" if local else None
+
+
+def normalize_phone(phone: str):
+    digits = re.sub(r"\D", "", phone or "")
+    # Last 10 digits so +1 555..., 001555... and 555... agree
+    return digits[-10:] if len(digits) >= 7 else None
+
+
+def normalize_company(company: str):
+    words = re.findall(r"[a-z0-9]+", (company or "").lower())
+    while words and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words) or None
+
+
+def fingerprint(value: str):
+    return hashlib.sha1(value.encode()).hexdigest() if value else None
+
+
+def lead_fingerprints(email: str, phone: str, company: str) -> dict:
+    return {
+        "email_fp": fingerprint(normalize_email(email)),
+        "phone_fp": fingerprint(normalize_phone(phone)),
+        "company_fp": fingerprint(normalize_company(company)),
+    }
+
+
+def _match_keys(fps: dict) -> list:
+    keys = []
+    if fps.get("email_fp"):
+        keys.append(("email", fps["email_fp"]))
+    if fps.get("phone_fp") and fps.get("company_fp"):
+        keys.append(("phone_company", fps["phone_fp"], fps["company_fp"]))
+    return keys
+
+
+def _has_active_job():
+    return exists().where(
+        QualificationJob.lead_id == Lead.id,
+        QualificationJob.status.in_(("PENDING", "RUNNING")),
+    )
+
+
+# -----------------------------
+# FIND ORIGINALS
+# -----------------------------
+def find_originals(db: Session, fps_list: list, now: datetime = None) -> list:
+    """
+    For each fingerprint dict, the newest original lead in the window it
+    duplicates, or None. Only originals whose result can be reused count:
+    already qualified, or with a qualification job still pending.
+    """
+    if DEDUPE_WINDOW_HOURS <= 0 or not fps_list:
+        return [None] * len(fps_list)
+
+    since = (now or datetime.utcnow()) - timedelta(hours=DEDUPE_WINDOW_HOURS)
+    reusable = and_(
+        Lead.duplicate_of.is_(None),
+        Lead.created_at >= since,
+        (Lead.status != "NEW") | _has_active_job(),
+    )
+
+    email_fps = {fps["email_fp"] for fps in fps_list if fps.get("email_fp")}
+    phone_fps = {fps["phone_fp"] for fps in fps_list if fps.get("phone_fp") and fps.get("company_fp")}
+    candidates = {}
+    if email_fps:
+        for lead in db.scalars(select(Lead).where(Lead.email_fp.in_(email_fps), reusable)):
+            candidates.setdefault(("email", lead.email_fp), []).append(lead)
+    if phone_fps:
+        for lead in db.scalars(select(Lead).where(Lead.phone_fp.in_(phone_fps), reusable)):
+            candidates.setdefault(("phone_company", lead.phone_fp, lead.company_fp), []).append(lead)
+
+    originals = []
+    for fps in fps_list:
+        matches = [lead for key in _match_keys(fps) for lead in candidates.get(key, [])]
+        originals.append(max(matches, key=lambda l: (l.created_at, l.id)) if matches else None)
+    return originals
+
+
+def find_original(db: Session, fps: dict, now: datetime = None):
+    return find_originals(db, [fps], now)[0]
+
+
+# -----------------------------
+# LINK / PROPAGATE (caller commits)
+# -----------------------------
+def copy_result(target, original):
+    """Copy the original's qualification onto a new lead (ORM object or row dict)."""
+    if original.status == "NEW":
+        return False
+    for field in RESULT_FIELDS:
+        value = getattr(original, field)
+        if isinstance(target, dict):
+            target[field] = value
+        else:
+            setattr(target, field, value)
+    return True
+
+
+def duplicate_log(lead_id: int, original_id: int, reused: bool) -> dict:
+    return {"lead_id": lead_id, "action": "duplicate_detected",
+            "details": {"original_id": original_id, "result_reused": reused}}
+
+
+def propagate_result(db: Session, original: Lead, deltas) -> list:
+    """
+    Give the original's fresh result to duplicates that were waiting on it.
+    Status/score rollups are added to `deltas`; returns the updated ids.
+    """
+    waiting = db.scalars(
+        select(Lead).where(
+            Lead.duplicate_of == original.id,
+            Lead.status == "NEW",
+            ~_has_active_job(),
+        )
+    ).all()
+
+    for dup in waiting:
+        status_change_deltas(dup.status, dup.score, original.status, original.score, deltas)
+        copy_result(dup, original)
+        db.add(Log(lead_id=dup.id, action="duplicate_result_reused", details={"original_id": original.id}))
+    return [dup.id for dup in waiting]
+
+
+def waiting_duplicate_ids(db: Session, original_id: int) -> list:
+    """Duplicates still NEW and without a job of their own, waiting on `original_id`."""
+    return db.scalars(
+        select(Lead.id).where(
+            Lead.duplicate_of == original_id,
+            Lead.status == "NEW",
+            ~_has_active_job(),
+        )
+    ).all()
+
+
+def dedupe_matches_within(fps_list: list, originals: list) -> list:
+    """
+    For a batch with no DB original, link later leads to the first lead in
+    the same batch sharing a key. Returns batch indexes (or None).
+    """
+    first_seen = {}
+    in_batch = []
+    for i, (fps, original) in enumerate(zip(fps_list, originals)):
+        keys = _match_keys(fps)
+        match = next((first_seen[k] for k in keys if k in first_seen), None)
+        in_batch.append(match if original is None else None)
+        if original is None and match is None:
+            for k in keys:
+                first_seen.setdefault(k, i)
+    return in_batch
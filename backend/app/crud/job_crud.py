@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, case, func, insert, update, select
+from sqlalchemy.orm import Session
+from app.models.job import QualificationJob
+from app.models.log import Log
+from app.crud.dedupe_crud import waiting_duplicate_ids
+
+
+# -----------------------------
+# ENQUEUE (caller commits)
+# -----------------------------
+def enqueue_qualification(db: Session, lead_id: int, delay: float = 0):
+    """Add a job to the session; it commits together with the caller's lead."""
+    job = QualificationJob(lead_id=lead_id)
+    if delay:
+        job.available_at = datetime.utcnow() + timedelta(seconds=delay)
+    db.add(job)
+    return job
+
+
+def enqueue_qualifications(db: Session, lead_ids: list):
+    if not lead_ids:
+        return
+    now = datetime.utcnow()
+    db.execute(
+        insert(QualificationJob),
+        [
+            {"lead_id": lead_id, "status": "PENDING", "attempts": 0,
+             "available_at": now, "created_at": now, "updated_at": now}
+            for lead_id in lead_ids
+        ],
+    )
+
+
+# -----------------------------
+# LEASE
+# -----------------------------
+def _ready_condition(now: datetime):
+    return or_(
+        and_(QualificationJob.status == "PENDING", QualificationJob.available_at <= now),
+        and_(QualificationJob.status == "RUNNING", QualificationJob.leased_until < now),
+    )
+
+
+def lease_jobs(db: Session, worker_id: str, limit: int, visibility_timeout: float):
+    """
+    Claim up to `limit` ready jobs for `worker_id` and return them as
+    (job_id, lead_id, attempts) tuples.
+
+    Databases with SKIP LOCKED (MySQL 8, Postgres) lock candidate rows so
+    concurrent replicas never see the same job. Elsewhere (SQLite) each
+    candidate is claimed with a conditional UPDATE on the lease columns and
+    only the rows this worker actually won are returned.
+    """
+    now = datetime.utcnow()
+    leased_until = now + timedelta(seconds=visibility_timeout)
+    claim = {
+        "status": "RUNNING",
+        "leased_by": worker_id,
+        "leased_until": leased_until,
+        "attempts": QualificationJob.attempts + 1,
+        "updated_at": now,
+    }
+
+    candidates = (
+        select(QualificationJob.id)
+        .where(_ready_condition(now))
+        .order_by(QualificationJob.available_at, QualificationJob.id)
+        .limit(limit)
+    )
+
+    if db.get_bind().dialect.name in ("mysql", "postgresql"):
+        ids = db.scalars(candidates.with_for_update(skip_locked=True)).all()
+        if ids:
+            db.execute(update(QualificationJob).where(QualificationJob.id.in_(ids)).values(**claim))
+    else:
+        ids = []
+        for job_id in db.scalars(candidates).all():
+            won = db.execute(
+                update(QualificationJob)
+                .where(QualificationJob.id == job_id, _ready_condition(now))
+                .values(**claim)
+            ).rowcount
+            if won:
+                ids.append(job_id)
+
+    db.commit()
+    if not ids:
+        return []
+    return db.execute(
+        select(QualificationJob.id, QualificationJob.lead_id, QualificationJob.attempts)
+        .where(QualificationJob.id.in_(ids), QualificationJob.leased_by == worker_id)
+    ).all()
+
+
+# -----------------------------
+# COMPLETE / RETRY
+# -----------------------------
+def complete_job(db: Session, job_id: int, worker_id: str):
+    db.execute(
+        update(QualificationJob)
+        .where(QualificationJob.id == job_id, QualificationJob.leased_by == worker_id)
+        .values(status="DONE", leased_until=None, updated_at=datetime.utcnow())
+    )
+    db.commit()
+
+
+def fail_job(db: Session, job_id: int, worker_id: str, error: str, retry_in: float = None):
+    """
+    Put the job back with a delay, or mark it FAILED when retry_in is None.
+    Duplicates that were waiting on a FAILED lead's result are queued for
+    their own qualification in the same commit.
+    """
+    now = datetime.utcnow()
+    values = {"last_error": error[:2000], "leased_until": None, "updated_at": now}
+    if retry_in is None:
+        values["status"] = "FAILED"
+    else:
+        values["status"] = "PENDING"
+        values["available_at"] = now + timedelta(seconds=retry_in)
+    failed = db.execute(
+        update(QualificationJob)
+        .where(QualificationJob.id == job_id, QualificationJob.leased_by == worker_id)
+        .values(**values)
+    ).rowcount
+    if failed and retry_in is None:
+        lead_id = db.scalar(select(QualificationJob.lead_id).where(QualificationJob.id == job_id))
+        waiting = waiting_duplicate_ids(db, lead_id)
+        enqueue_qualifications(db, waiting)
+        for dup_id in waiting:
+            db.add(Log(lead_id=dup_id, action="duplicate_requeued", details={"original_id": lead_id}))
+    db.commit()
+
+
+# -----------------------------
+# QUEUE DEPTH
+# -----------------------------
+def job_counts(db: Session) -> dict:
+    rows = db.execute(
+        select(QualificationJob.status, func.count()).group_by(QualificationJob.status)
+    ).all()
+    counts = {"PENDING": 0, "RUNNING": 0, "DONE": 0, "FAILED": 0}
+    counts.update({status: count for status, count in rows})
+
+    oldest = db.scalar(
+        select(func.min(QualificationJob.available_at)).where(QualificationJob.status == "PENDING")
+    )
+    counts["oldest_pending_age_s"] = (
+        max(0.0, round((datetime.utcnow() - oldest).total_seconds(), 1)) if oldest else 0.0
+    )
+    return counts
+
+
+def active_job_counts(db: Session) -> dict:
+    """
+    PENDING/RUNNING counts only; served by ix_qualification_jobs_status_available.
+    PENDING jobs not yet available (deferred or backing off) are counted
+    as DEFERRED instead.
+    """
+    now = datetime.utcnow()
+    status = case(
+        (and_(QualificationJob.status == "PENDING", QualificationJob.available_at > now), "DEFERRED"),
+        else_=QualificationJob.status,
+    )
+    rows = db.execute(
+        select(status, func.count())
+        .where(QualificationJob.status.in_(("PENDING", "RUNNING")))
+        .group_by(status)
+    ).all()
+    counts = {"PENDING": 0, "DEFERRED": 0, "RUNNING": 0}
+    counts.update({status: count for status, count in rows})
+    return counts
+
+
+def latest_job(db: Session, lead_id: int):
+    return db.scalar(
+        select(QualificationJob)
+        .where(QualificationJob.lead_id == lead_id)
+        .order_by(QualificationJob.id.desc())
+        .limit(1)
+    )
@@ -21,16 +21,37 @@
 #     return db.query(Lead).all()
 
 
-from sqlalchemy.orm import Session
+import base64
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_, func, insert, select, update
+from sqlalchemy.orm import Session, load_only, aliased
 from app.models.lead import Lead
 from app.models.log import Log
 from app.schemas.lead_schema import LeadCreate
+from app.crud.job_crud import enqueue_qualification, enqueue_qualifications
+from app.core.log_writer import submit_log
+from app.crud.rollup_crud import (
+    apply_rollups, lead_created_deltas, status_change_deltas, log_deltas, duplicate_deltas,
+)
+from app.crud.dedupe_crud import (
+    lead_fingerprints, find_original, find_originals, dedupe_matches_within, copy_result,
+    duplicate_log, propagate_result, LLM_CALLS_PER_QUALIFICATION
+)
 
 
 # -----------------------------
 # CREATE NEW LEAD
 # -----------------------------
-def create_lead(db: Session, lead: LeadCreate):
+def new_lead_with_dedupe(db: Session, lead: LeadCreate):
+    """
+    Build (but don't add) the Lead for `lead`, linked to the original it
+    duplicates, if any, with that original's result copied when it has one.
+    Returns (new_lead, original). Shared with lead_crud_async via run_sync.
+    """
+    fps = lead_fingerprints(lead.email, lead.phone, lead.company)
     new_lead = Lead(
         name=lead.name,
         email=lead.email,
@@ -38,45 +59,552 @@ def create_lead(db: Session, lead: LeadCreate):
         company=lead.company,
         budget=lead.budget,
         source=lead.source,
-        data=lead.data
+        data=lead.data,
+        status="NEW",
+        score=0.0,
+        **fps,
     )
+    original = find_original(db, fps)
+    if original is not None:
+        new_lead.duplicate_of = original.id
+        copy_result(new_lead, original)
+    return new_lead, original
+
+
+def new_lead_deltas(db: Session, new_lead: Lead, original: Lead, qualify: bool):
+    """Rollups (and the duplicate log) for a flushed lead from new_lead_with_dedupe."""
+    deltas = lead_created_deltas([("NEW", 0.0, new_lead.created_at)])
+    if original is not None:
+        status_change_deltas("NEW", 0.0, new_lead.status, new_lead.score, deltas)
+        duplicate_deltas(1, int(qualify), LLM_CALLS_PER_QUALIFICATION, deltas)
+        db.add(Log(**duplicate_log(new_lead.id, original.id, new_lead.status != "NEW")))
+    return deltas
+
+
+def create_lead(db: Session, lead: LeadCreate, qualify: bool = True, defer_seconds: float = 0):
+    new_lead, original = new_lead_with_dedupe(db, lead)
     db.add(new_lead)
+    db.flush()
+    # Dashboard counters and the qualification job commit atomically with the lead
+    apply_rollups(db, new_lead_deltas(db, new_lead, original, qualify))
+    # A duplicate reuses its original's qualification instead of running its own
+    if qualify and original is None:
+        enqueue_qualification(db, new_lead.id, delay=defer_seconds)
     db.commit()
     db.refresh(new_lead)
     return new_lead
 
 
 # -----------------------------
-# LIST ALL LEADS
+# BULK CREATE LEADS
+# -----------------------------
+def bulk_create_leads(db: Session, leads: list, qualify: bool = True):
+    """
+    Insert a batch of LeadCreate rows in one transaction and return their ids
+    in input order. With qualify, their qualification jobs are inserted in
+    the same transaction.
+
+    Uses a single executemany INSERT ... RETURNING where the driver supports
+    it (SQLite, Postgres, MariaDB); MySQL has no RETURNING, so there the ORM
+    flushes the batch and we commit once.
+    """
+    if not leads:
+        return []
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "name": lead.name,
+            "email": lead.email,
+            "phone": lead.phone,
+            "company": lead.company,
+            "budget": lead.budget,
+            "source": lead.source,
+            "data": lead.data,
+            "message_count": 0,
+            "status": "NEW",
+            "score": 0.0,
+            "confidence": 0.0,
+            "enriched": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for lead in leads
+    ]
+
+    # Duplicates of existing leads, then of earlier rows in this batch
+    fps_list = [lead_fingerprints(row["email"], row["phone"], row["company"]) for row in rows]
+    originals = find_originals(db, fps_list, now)
+    in_batch = dedupe_matches_within(fps_list, originals)
+    for row, fps, original in zip(rows, fps_list, originals):
+        row.update(fps)
+        row["duplicate_of"] = original.id if original is not None else None
+        if original is not None:
+            copy_result(row, original)
+
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = db.execute(
+            insert(Lead).returning(Lead.id, sort_by_parameter_order=True), rows
+        )
+        ids = [row[0] for row in result]
+    else:
+        objs = [Lead(**row) for row in rows]
+        db.add_all(objs)
+        db.flush()
+        ids = [obj.id for obj in objs]
+
+    batch_links = [{"id": ids[i], "duplicate_of": ids[first]} for i, first in enumerate(in_batch) if first is not None]
+    if batch_links:
+        db.execute(update(Lead), batch_links)
+
+    deltas = lead_created_deltas(("NEW", 0.0, row["created_at"]) for row in rows)
+    duplicates = []
+    for i, row in enumerate(rows):
+        original_id = row["duplicate_of"] if in_batch[i] is None else ids[in_batch[i]]
+        if original_id is None:
+            continue
+        status_change_deltas("NEW", 0.0, row["status"], row["score"], deltas)
+        duplicates.append(duplicate_log(ids[i], original_id, row["status"] != "NEW"))
+    if duplicates:
+        duplicate_deltas(len(duplicates), len(duplicates) if qualify else 0, LLM_CALLS_PER_QUALIFICATION, deltas)
+        db.execute(insert(Log), duplicates)
+    apply_rollups(db, deltas)
+
+    if qualify:
+        enqueue_qualifications(db, [
+            lead_id for lead_id, row, first in zip(ids, rows, in_batch)
+            if row["duplicate_of"] is None and first is None
+        ])
+    db.commit()
+    return ids
+
+
+# -----------------------------
+# LIST LEADS (KEYSET PAGINATED)
+# -----------------------------
+# Columns a client may ask for via ?fields=. "lastMessage" reads the
+# denormalized last_message column; chat history has its own endpoint.
+LEAD_FIELDS = {
+    "id", "name", "email", "phone", "company", "budget", "source", "data",
+    "lastMessage", "last_message_at", "message_count", "status", "score",
+    "confidence", "risk_flags", "enriched", "duplicate_of", "created_at", "updated_at",
+}
+
+
+def lead_load_only(fields, *keys):
+    """load_only() for the requested fields plus the columns a query sorts/pages on."""
+    columns = set(fields) | set(keys)
+    if "lastMessage" in columns:
+        columns.add("last_message")
+    columns.discard("lastMessage")
+    return load_only(*[getattr(Lead, c) for c in columns])
+
+
+def encode_cursor(value, row_id: int) -> str:
+    raw = json.dumps([value.isoformat() if hasattr(value, "isoformat") else value, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, as_datetime: bool = True):
+    """Return (value, id) from an opaque cursor, or raise ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if as_datetime and value is not None:
+            value = datetime.fromisoformat(value)
+        return value, int(row_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def encode_lead_cursor(lead: Lead) -> str:
+    return encode_cursor(lead.created_at, lead.id)
+
+
+def decode_lead_cursor(cursor: str):
+    return decode_cursor(cursor)
+
+
+def lead_page_stmt(
+    limit: int = None,
+    cursor: str = None,
+    fields: set = None,
+    status: list = None,
+    min_score: float = None,
+    max_score: float = None,
+):
+    """Build the keyset SELECT shared by the sync and async lead listings."""
+    stmt = select(Lead)
+
+    # Only load the requested columns; the JSON blobs stay deferred
+    if fields:
+        stmt = stmt.options(lead_load_only(fields, "id", "created_at"))
+
+    if status:
+        stmt = stmt.where(Lead.status.in_(status))
+    if min_score is not None:
+        stmt = stmt.where(Lead.score >= min_score)
+    if max_score is not None:
+        stmt = stmt.where(Lead.score <= max_score)
+
+    if cursor:
+        created_at, lead_id = decode_lead_cursor(cursor)
+        if created_at is None:
+            stmt = stmt.where(Lead.id < lead_id)
+        else:
+            stmt = stmt.where(
+                or_(
+                    Lead.created_at < created_at,
+                    and_(Lead.created_at == created_at, Lead.id < lead_id),
+                )
+            )
+
+    stmt = stmt.order_by(Lead.created_at.desc(), Lead.id.desc())
+
+    # Fetch one extra row to know whether another page exists
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def split_lead_page(rows: list, limit: int = None):
+    """Trim the look-ahead row and return (rows, next_cursor)."""
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_lead_cursor(rows[-1])
+    return rows, None
+
+
+# Row-tuple variant for the fast JSON path: same keys and order as LeadOut,
+# selected as plain columns so no ORM objects or per-row validation.
+LEAD_ROW_COLUMNS = {
+    "id": Lead.id, "name": Lead.name, "email": Lead.email, "phone": Lead.phone,
+    "company": Lead.company, "budget": Lead.budget, "source": Lead.source, "data": Lead.data,
+    "lastMessage": Lead.last_message, "last_message_at": Lead.last_message_at,
+    "message_count": Lead.message_count, "status": Lead.status, "score": Lead.score,
+    "confidence": Lead.confidence, "risk_flags": Lead.risk_flags, "enriched": Lead.enriched,
+    "duplicate_of": Lead.duplicate_of, "created_at": Lead.created_at, "updated_at": Lead.updated_at,
+}
+
+
+def lead_rows_stmt(fields: list = None, **page_args):
+    """lead_page_stmt() selecting only column values; the last two are the cursor keys."""
+    keys = list(fields or LEAD_ROW_COLUMNS)
+    stmt = lead_page_stmt(**page_args).with_only_columns(
+        *[LEAD_ROW_COLUMNS[k] for k in keys], Lead.created_at, Lead.id
+    )
+    return stmt, keys
+
+
+def split_lead_rows(rows: list, keys: list, limit: int = None):
+    """Return (list of dicts, next cursor) from lead_rows_stmt() rows."""
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1])
+    n = len(keys)
+    return [dict(zip(keys, row[:n])) for row in rows], next_cursor
+
+
+def list_lead_rows(db: Session, limit: int = None, fields: list = None, **filters):
+    stmt, keys = lead_rows_stmt(fields, limit=limit, **filters)
+    return split_lead_rows(db.execute(stmt).all(), keys, limit)
+
+
+def list_leads_page(db: Session, limit: int = None, **filters):
+    """
+    Newest-first lead listing using a (created_at, id) keyset.
+
+    Accepts cursor, fields, status, min_score and max_score filters.
+    Returns (leads, next_cursor). next_cursor is None on the last page
+    or when no limit was given.
+    """
+    rows = db.scalars(lead_page_stmt(limit=limit, **filters)).all()
+    return split_lead_page(list(rows), limit)
+
+
+# -----------------------------
+# SEARCH LEADS (INDEX-BACKED)
+# -----------------------------
+SEARCH_SORTS = {"created_at", "-created_at", "score", "-score"}
+
+
+def search_leads_stmt(
+    sort: str = "-created_at",
+    status: str = None,
+    email: str = None,
+    min_score: float = None,
+    max_score: float = None,
+    created_after: datetime = None,
+    created_before: datetime = None,
+    limit: int = 50,
+    cursor: str = None,
+    fields: set = None,
+):
+    """
+    Build a lead search that an index can always serve:
+
+      email=...               -> ix_leads_email
+      sort=score / -score     -> ix_leads_status_score (needs one status)
+      sort=created_at / -...  -> ix_leads_status_created_at_id with a status,
+                                 ix_leads_created_at_id without
+
+    Combinations no index can order (score sort across statuses) raise
+    ValueError instead of silently falling back to a filesort.
+    """
+    if sort not in SEARCH_SORTS:
+        raise ValueError(f"sort must be one of {', '.join(sorted(SEARCH_SORTS))}")
+
+    key = sort.lstrip("-")
+    descending = sort.startswith("-")
+    if key == "score" and not status:
+        raise ValueError("sort=score needs a status filter (index is on status, score)")
+    if key == "score" and (created_after or created_before):
+        raise ValueError("Date filters can only be combined with sort=created_at")
+    if key == "created_at" and status and (min_score is not None or max_score is not None):
+        raise ValueError("A score range within a status needs sort=score or -score")
+
+    stmt = select(Lead)
+    if fields:
+        stmt = stmt.options(lead_load_only(fields, "id", "created_at", "score"))
+
+    if email:
+        stmt = stmt.where(Lead.email == email)
+    if status:
+        stmt = stmt.where(Lead.status == status)
+    if min_score is not None:
+        stmt = stmt.where(Lead.score >= min_score)
+    if max_score is not None:
+        stmt = stmt.where(Lead.score <= max_score)
+    if created_after:
+        stmt = stmt.where(Lead.created_at >= created_after)
+    if created_before:
+        stmt = stmt.where(Lead.created_at < created_before)
+
+    column = Lead.score if key == "score" else Lead.created_at
+    if cursor:
+        value, lead_id = decode_cursor(cursor, as_datetime=(key == "created_at"))
+        if descending:
+            stmt = stmt.where(or_(column < value, and_(column == value, Lead.id < lead_id)))
+        else:
+            stmt = stmt.where(or_(column > value, and_(column == value, Lead.id > lead_id)))
+
+    if descending:
+        stmt = stmt.order_by(column.desc(), Lead.id.desc())
+    else:
+        stmt = stmt.order_by(column.asc(), Lead.id.asc())
+
+    return stmt.limit(limit + 1)
+
+
+def search_leads(db: Session, sort: str = "-created_at", limit: int = 50, **filters):
+    """Returns (leads, next_cursor) for search_leads_stmt()."""
+    rows = list(db.scalars(search_leads_stmt(sort=sort, limit=limit, **filters)).all())
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        value = last.score if sort.lstrip("-") == "score" else last.created_at
+        return rows, encode_cursor(value, last.id)
+    return rows, None
+
+
+# -----------------------------
+# STREAM LEADS FOR EXPORT
 # -----------------------------
-def list_leads(db: Session):
-    return db.query(Lead).all()
+EXPORT_COLUMNS = [
+    "id", "name", "email", "phone", "company", "budget", "source", "data",
+    "status", "score", "confidence", "risk_flags", "enriched",
+    "created_at", "updated_at",
+]
+
+
+def iter_leads_for_export(db: Session, include_result: bool = False, batch_size: int = 1000):
+    """
+    Yield one dict per lead, oldest first, using a server-side cursor so
+    only `batch_size` rows are held in memory at a time.
+
+    With include_result, each row also carries the details of the lead's
+    most recent agent_result log (or None).
+    """
+    columns = [getattr(Lead, c) for c in EXPORT_COLUMNS]
+
+    if include_result:
+        latest = (
+            select(Log.lead_id, func.max(Log.id).label("log_id"))
+            .where(Log.action == "agent_result")
+            .group_by(Log.lead_id)
+            .subquery()
+        )
+        stmt = (
+            select(*columns, Log.details.label("agent_result"))
+            .outerjoin(latest, latest.c.lead_id == Lead.id)
+            .outerjoin(Log, Log.id == latest.c.log_id)
+        )
+    else:
+        stmt = select(*columns)
+
+    stmt = stmt.order_by(Lead.id)
+    result = db.execute(stmt, execution_options={"yield_per": batch_size})
+    for row in result:
+        yield dict(row._mapping)
 
 
 # -----------------------------
-# UPDATE LEAD STATUS + SCORE
+# CHANGE FEED
 # -----------------------------
-def update_lead_status(db: Session, lead_id: int, status: str, score: float):
+# Rows become visible to the feed once they are this old, so a slower
+# transaction that stamped updated_at earlier can't commit behind a
+# client's cursor. Must exceed the longest lead-writing transaction.
+CHANGES_SETTLE_SECONDS = float(os.getenv("CHANGES_SETTLE_SECONDS", "2"))
+
+
+def decode_changes_since(since: str):
+    """`since` is a cursor from a previous call or an ISO timestamp."""
+    try:
+        value = datetime.fromisoformat(since)
+    except ValueError:
+        return decode_cursor(since)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value, 0
+
+
+def lead_changes_stmt(since: str = None, limit: int = 100, fields: set = None, now: datetime = None):
+    """Leads updated after `since`, oldest change first, on ix_leads_updated_at_id."""
+    settled = (now or datetime.utcnow()) - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+    stmt = select(Lead).where(Lead.updated_at <= settled)
+
+    if fields:
+        stmt = stmt.options(lead_load_only(fields, "id", "updated_at"))
+
+    if since:
+        updated_at, lead_id = decode_changes_since(since)
+        stmt = stmt.where(
+            or_(
+                Lead.updated_at > updated_at,
+                and_(Lead.updated_at == updated_at, Lead.id > lead_id),
+            )
+        )
+
+    return stmt.order_by(Lead.updated_at.asc(), Lead.id.asc()).limit(limit + 1)
+
+
+def list_lead_changes(db: Session, since: str = None, limit: int = 100, fields: set = None):
+    """
+    Return (leads, cursor, has_more). The cursor is always set (it is `since`
+    when nothing changed) so clients can keep polling from it.
+    """
+    rows = db.scalars(lead_changes_stmt(since, limit, fields)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        cursor = encode_cursor(rows[-1].updated_at, rows[-1].id)
+    else:
+        cursor = since
+    return rows, cursor, has_more
+
+
+def lead_list_validator_stmts():
+    """
+    COUNT(*) and MAX(updated_at) over leads. The count is answered from the
+    smallest index and the max from the end of ix_leads_updated_at_id, and
+    nothing is written to maintain them.
+    """
+    return select(func.count()).select_from(Lead), select(func.max(Lead.updated_at))
+
+
+def lead_list_validator(db: Session):
+    """
+    (lead count, last_modified) for conditional GETs on lead listings. New
+    leads move the count; every update bumps updated_at.
+    """
+    count_stmt, max_stmt = lead_list_validator_stmts()
+    return db.scalar(count_stmt), db.scalar(max_stmt)
+
+
+# -----------------------------
+# APPLY AGENT RESULT (ONE TRANSACTION)
+# -----------------------------
+EMAIL_DECISIONS = {"HOT", "QUALIFIED", "WARM"}
+
+
+def apply_agent_result(
+    db: Session,
+    lead_id: int,
+    decision: str,
+    score: float,
+    confidence: float,
+    risk_flags: list,
+    signals: dict,
+):
+    """
+    Write a qualification result with a single lead fetch and a single
+    commit: confidence, risk flags, status and score on the lead, plus the
+    tier log and the agent_result log.
+
+    Returns the lead's contact fields (for the follow-up email), new status
+    and the duplicates that received the same result, or None if the lead
+    does not exist.
+    """
     lead = db.query(Lead).filter(Lead.id == lead_id).first()
     if not lead:
         return None
-    
+
+    status = decision if decision in EMAIL_DECISIONS | {"NURTURE", "REVIEW"} else "NOT_QUALIFIED"
+    deltas = status_change_deltas(lead.status, lead.score, status, score)
+    lead.confidence = confidence
+    lead.risk_flags = risk_flags
     lead.status = status
     lead.score = score
+    # Duplicates submitted while this lead was queued take the same result
+    duplicate_ids = propagate_result(db, lead, deltas)
+    apply_rollups(db, deltas)
+
+    tier_log = {
+        "NURTURE": "nurture_campaign_added",     # no immediate email
+        "REVIEW": "manual_review_required",
+    }.get(status)
+    if tier_log:
+        db.add(Log(lead_id=lead_id, action=tier_log, details={
+            "score": score,
+            "confidence": confidence,
+            "risk_flags": risk_flags
+        }))
+
+    db.add(Log(lead_id=lead_id, action="agent_result", details={
+        "decision": decision,
+        "score": score,
+        "confidence": confidence,
+        "risk_flags": risk_flags,
+        "signals": signals
+    }))
+
     db.commit()
-    return lead
+    return {
+        "name": lead.name, "email": lead.email, "company": lead.company,
+        "status": status, "duplicate_ids": duplicate_ids,
+    }
 
 
 # -----------------------------
 # CREATE LOG ENTRY
 # -----------------------------
-def create_log(db: Session, lead_id: int, action: str, details: dict):
+def create_log(db: Session, lead_id: int, action: str, details: dict, sync: bool = False):
+    """
+    Record a log entry. By default it is handed to the buffered log writer
+    and inserted in the next batch (returns None). Pass sync=True when the
+    caller reads the log back straight away; that writes and commits now.
+    """
+    if not sync and submit_log(lead_id, action, details):
+        return None
+
     log = Log(
         lead_id=lead_id,
         action=action,
         details=details
     )
     db.add(log)
+    apply_rollups(db, log_deltas([{"action": action, "details": details, "timestamp": None}]))
     db.commit()
     return log
 
@@ -86,3 +614,88 @@ def create_log(db: Session, lead_id: int, action: str, details: dict):
 # -----------------------------
 def get_lead_logs(db: Session, lead_id: int):
     return db.query(Log).filter(Log.lead_id == lead_id).order_by(Log.timestamp.asc()).all()
+
+
+# -----------------------------
+# GET LOGS FOR MANY LEADS
+# -----------------------------
+def parse_log_cursors(after: str, lead_ids: list) -> dict:
+    """
+    {lead_id: (timestamp, id)} from `after`: comma-separated
+    `lead_id:cursor` pairs, one per lead still being paged (each cursor is
+    that lead's next_cursor). A bare cursor is accepted for a single lead.
+    Raises ValueError.
+    """
+    if not after:
+        return {}
+    if ":" not in after:
+        if len(lead_ids) != 1:
+            raise ValueError("With several lead_ids, pass after as lead_id:cursor pairs")
+        return {lead_ids[0]: decode_cursor(after)}
+
+    cursors = {}
+    for pair in after.split(","):
+        lead_id, sep, cursor = pair.strip().partition(":")
+        if not sep or not lead_id.strip().isdigit():
+            raise ValueError("Invalid after; expected lead_id:cursor pairs")
+        cursors[int(lead_id)] = decode_cursor(cursor)
+    return cursors
+
+
+def logs_for_leads_stmt(lead_ids: list, per_lead: int = 50, after: dict = None):
+    """
+    SELECT at most per_lead + 1 logs per lead, oldest first, using a
+    row_number() window. The extra row per lead signals another page.
+    `after` maps a lead id to its own (timestamp, id) cursor.
+    """
+    rank = func.row_number().over(
+        partition_by=Log.lead_id,
+        order_by=(Log.timestamp.asc(), Log.id.asc()),
+    ).label("rn")
+
+    ranked = select(Log, rank).where(Log.lead_id.in_(lead_ids))
+    if after:
+        from_start = [lead_id for lead_id in lead_ids if lead_id not in after]
+        ranked = ranked.where(or_(
+            Log.lead_id.in_(from_start),
+            *(
+                and_(Log.lead_id == lead_id,
+                     or_(Log.timestamp > ts, and_(Log.timestamp == ts, Log.id > log_id)))
+                for lead_id, (ts, log_id) in after.items()
+            ),
+        ))
+    ranked = ranked.subquery()
+
+    log_alias = aliased(Log, ranked)
+    return (
+        select(log_alias)
+        .where(ranked.c.rn <= per_lead + 1)
+        .order_by(ranked.c.lead_id, ranked.c.timestamp, ranked.c.id)
+    )
+
+
+def group_logs_by_lead(lead_ids: list, rows: list, per_lead: int):
+    result = {lead_id: {"logs": [], "next_cursor": None} for lead_id in lead_ids}
+    for log in rows:
+        bucket = result[log.lead_id]
+        if len(bucket["logs"]) < per_lead:
+            bucket["logs"].append(log)
+        else:
+            last = bucket["logs"][-1]
+            bucket["next_cursor"] = encode_cursor(last.timestamp, last.id)
+    return result
+
+
+def get_logs_for_leads(db: Session, lead_ids: list, per_lead: int = 50, after: str = None):
+    """
+    Fetch logs for several leads in one IN (...) query.
+
+    Each lead gets at most `per_lead` logs, oldest first, starting after its
+    own cursor in `after` (see parse_log_cursors) if given. Returns
+    {lead_id: {"logs": [...], "next_cursor": str | None}}.
+    """
+    if not lead_ids:
+        return {}
+    cursors = parse_log_cursors(after, lead_ids)
+    rows = db.scalars(logs_for_leads_stmt(lead_ids, per_lead, cursors)).all()
+    return group_logs_by_lead(lead_ids, rows, per_lead)
@@ -0,0 +1,69 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.lead import Lead
+from app.models.log import Log
+from app.schemas.lead_schema import LeadCreate
+from app.crud.job_crud import enqueue_qualification
+from app.crud.rollup_crud import apply_rollups
+from app.crud.lead_crud import (
+    lead_page_stmt, split_lead_page, lead_rows_stmt, split_lead_rows,
+    new_lead_with_dedupe, new_lead_deltas,
+    logs_for_leads_stmt, parse_log_cursors, group_logs_by_lead,
+    lead_list_validator as _lead_list_validator,
+)
+
+
+# Async counterparts of lead_crud.py, used when DB_ASYNC is enabled.
+# Query building is shared with the sync module so both paths stay in step.
+
+
+# -----------------------------
+# CREATE NEW LEAD
+# -----------------------------
+async def create_lead(db: AsyncSession, lead: LeadCreate, qualify: bool = True, defer_seconds: float = 0):
+    new_lead, original = await db.run_sync(new_lead_with_dedupe, lead)
+    db.add(new_lead)
+    await db.flush()
+    deltas = await db.run_sync(new_lead_deltas, new_lead, original, qualify)
+    await db.run_sync(apply_rollups, deltas)
+    if qualify and original is None:
+        enqueue_qualification(db, new_lead.id, delay=defer_seconds)
+    await db.commit()
+    await db.refresh(new_lead)
+    return new_lead
+
+
+# -----------------------------
+# LIST LEADS (KEYSET PAGINATED)
+# -----------------------------
+async def list_leads_page(db: AsyncSession, limit: int = None, **filters):
+    rows = (await db.scalars(lead_page_stmt(limit=limit, **filters))).all()
+    return split_lead_page(list(rows), limit)
+
+
+async def list_lead_rows(db: AsyncSession, limit: int = None, fields: list = None, **filters):
+    stmt, keys = lead_rows_stmt(fields, limit=limit, **filters)
+    return split_lead_rows((await db.execute(stmt)).all(), keys, limit)
+
+
+async def lead_list_validator(db: AsyncSession):
+    return await db.run_sync(_lead_list_validator)
+
+
+# -----------------------------
+# GET LEAD LOGS
+# -----------------------------
+async def get_lead_logs(db: AsyncSession, lead_id: int):
+    stmt = select(Log).where(Log.lead_id == lead_id).order_by(Log.timestamp.asc())
+    return (await db.scalars(stmt)).all()
+
+
+# -----------------------------
+# GET LOGS FOR MANY LEADS
+# -----------------------------
+async def get_logs_for_leads(db: AsyncSession, lead_ids: list, per_lead: int = 50, after: str = None):
+    if not lead_ids:
+        return {}
+    cursors = parse_log_cursors(after, lead_ids)
+    rows = (await db.scalars(logs_for_leads_stmt(lead_ids, per_lead, cursors))).all()
+    return group_logs_by_lead(lead_ids, rows, per_lead)
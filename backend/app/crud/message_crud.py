@@ -0,0 +1,85 @@
+from datetime import datetime
+
+from sqlalchemy import func, update, select
+from sqlalchemy.orm import Session
+from app.models.lead import Lead
+from app.models.message import LeadMessage
+from app.crud.lead_crud import encode_cursor, decode_cursor
+
+
+# -----------------------------
+# APPEND MESSAGE
+# -----------------------------
+def append_message(db: Session, lead_id: int, text: str, type: str = "chat",
+                   role: str = None, data: dict = None):
+    """
+    Insert one message and bump the lead's last_message/message_count with a
+    single UPDATE; the existing history is never read. Returns None if the
+    lead does not exist.
+    """
+    now = datetime.utcnow()
+    result = db.execute(
+        update(Lead)
+        .where(Lead.id == lead_id)
+        .values(
+            last_message=text,
+            last_message_at=now,
+            message_count=func.coalesce(Lead.message_count, 0) + 1,
+        )
+    )
+    if not result.rowcount:
+        db.rollback()
+        return None
+
+    message = LeadMessage(lead_id=lead_id, type=type, role=role, text=text, data=data, created_at=now)
+    db.add(message)
+    db.commit()
+    db.refresh(message)
+    return message
+
+
+# -----------------------------
+# GET MESSAGES (PAGINATED)
+# -----------------------------
+def get_lead_messages(db: Session, lead_id: int, limit: int = 50, cursor: str = None):
+    """Newest first on ix_lead_messages_lead_id_id; next_cursor pages back in time."""
+    stmt = select(LeadMessage).where(LeadMessage.lead_id == lead_id)
+    if cursor:
+        _, before_id = decode_cursor(cursor, as_datetime=False)
+        stmt = stmt.where(LeadMessage.id < before_id)
+
+    rows = db.scalars(stmt.order_by(LeadMessage.id.desc()).limit(limit + 1)).all()
+    next_cursor = encode_cursor(None, rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+# -----------------------------
+# LEGACY JSON HISTORY
+# -----------------------------
+def _parse_timestamp(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+        except ValueError:
+            return None
+    return None
+
+
+def legacy_message_rows(lead_id: int, messages) -> list:
+    """Turn a Lead.messages JSON list into lead_messages rows, keeping unknown keys in data."""
+    rows = []
+    for message in messages if isinstance(messages, list) else []:
+        if not isinstance(message, dict):
+            message = {"text": str(message)}
+        extra = {k: v for k, v in message.items()
+                 if k not in ("text", "type", "role", "timestamp", "created_at")}
+        text = message.get("text")
+        rows.append({
+            "lead_id": lead_id,
+            "type": message.get("type") or "chat",
+            "role": message.get("role"),
+            "text": text if text is None or isinstance(text, str) else str(text),
+            "data": extra or None,
+            "created_at": _parse_timestamp(message.get("timestamp") or message.get("created_at")),
+        })
+    return rows
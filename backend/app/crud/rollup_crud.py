@@ -0,0 +1,219 @@
+import os
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, delete
+from sqlalchemy.orm import Session
+from app.models.rollup import LeadRollup
+
+
+ALL_BUCKET = datetime(1970, 1, 1)
+QUALIFIED_STATUSES = {"HOT", "QUALIFIED", "WARM"}
+EMAIL_ACTIONS = {"auto_email_sent", "manual_email_sent"}
+# Rows each counter is spread over; more shards = less lock contention
+# between concurrent lead writes, a few more rows to sum on read
+ROLLUP_SHARDS = max(1, int(os.getenv("ROLLUP_SHARDS", "16")))
+
+
+# -----------------------------
+# DELTA BUILDERS
+# -----------------------------
+def score_bucket(score) -> int:
+    """Histogram bucket 0..9 for a 0..1 score."""
+    return min(max(int((score or 0.0) * 10), 0), 9)
+
+
+def _timed(deltas: Counter, metric: str, at: datetime, n: int = 1):
+    at = at or datetime.utcnow()
+    deltas[("all", ALL_BUCKET, metric)] += n
+    deltas[("hour", at.replace(minute=0, second=0, microsecond=0), metric)] += n
+    deltas[("day", at.replace(hour=0, minute=0, second=0, microsecond=0), metric)] += n
+
+
+def lead_created_deltas(leads: list, deltas: Counter = None) -> Counter:
+    """leads: iterable of (status, score, created_at)."""
+    deltas = deltas if deltas is not None else Counter()
+    for status, score, created_at in leads:
+        deltas[("all", ALL_BUCKET, f"status:{status or 'NEW'}")] += 1
+        deltas[("all", ALL_BUCKET, f"score:{score_bucket(score)}")] += 1
+        _timed(deltas, "created", created_at)
+    return deltas
+
+
+def status_change_deltas(old_status, old_score, new_status, new_score,
+                         deltas: Counter = None, at: datetime = None) -> Counter:
+    deltas = deltas if deltas is not None else Counter()
+    old_status = old_status or "NEW"
+    if old_status != new_status:
+        deltas[("all", ALL_BUCKET, f"status:{old_status}")] -= 1
+        deltas[("all", ALL_BUCKET, f"status:{new_status}")] += 1
+    if score_bucket(old_score) != score_bucket(new_score):
+        deltas[("all", ALL_BUCKET, f"score:{score_bucket(old_score)}")] -= 1
+        deltas[("all", ALL_BUCKET, f"score:{score_bucket(new_score)}")] += 1
+    # Count a lead as qualified when it first enters a qualified tier
+    if new_status in QUALIFIED_STATUSES and old_status not in QUALIFIED_STATUSES:
+        _timed(deltas, "qualified", at)
+    return deltas
+
+
+def duplicate_deltas(duplicates: int, skipped: int, calls_per_qualification: int,
+                     deltas: Counter = None) -> Counter:
+    """Duplicate leads linked, and qualifications (and their LLM calls) not run for them."""
+    deltas = deltas if deltas is not None else Counter()
+    deltas[("all", ALL_BUCKET, "duplicates")] += duplicates
+    deltas[("all", ALL_BUCKET, "qualifications_skipped")] += skipped
+    deltas[("all", ALL_BUCKET, "llm_calls_saved")] += skipped * calls_per_qualification
+    return deltas
+
+
+def log_deltas(rows: list, deltas: Counter = None) -> Counter:
+    """rows: log dicts with action/details/timestamp."""
+    deltas = deltas if deltas is not None else Counter()
+    for row in rows:
+        if row["action"] not in EMAIL_ACTIONS:
+            continue
+        details = row.get("details") or {}
+        if row["action"] == "auto_email_sent" and details.get("status") != "sent":
+            continue
+        _timed(deltas, "emailed", row.get("timestamp"))
+    return deltas
+
+
+# -----------------------------
+# APPLY (caller commits)
+# -----------------------------
+def _upsert_insert(dialect_name: str):
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def rollup_statements(dialect_name: str, deltas: Counter, shard: int = 0) -> list:
+    """One atomic 'count = count + delta' upsert per touched counter, all on `shard`."""
+    insert = _upsert_insert(dialect_name)
+    statements = []
+    for (period, bucket, metric), delta in sorted(deltas.items(), key=lambda kv: (kv[0][0], kv[0][2], kv[0][1])):
+        if not delta:
+            continue
+        stmt = insert(LeadRollup).values(period=period, bucket=bucket, metric=metric, shard=shard, count=delta)
+        if dialect_name == "mysql":
+            stmt = stmt.on_duplicate_key_update(count=LeadRollup.count + delta)
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["period", "bucket", "metric", "shard"],
+                set_={"count": LeadRollup.count + delta},
+            )
+        statements.append(stmt)
+    return statements
+
+
+def apply_rollups(db_or_conn, deltas: Counter):
+    """
+    Run the upserts on a Session or Connection inside the caller's
+    transaction. One random shard per call: the transaction locks at most
+    one row per counter, in a fixed order, and rarely the one another
+    writer holds.
+    """
+    dialect_name = db_or_conn.get_bind().dialect.name if isinstance(db_or_conn, Session) else db_or_conn.dialect.name
+    shard = random.randrange(ROLLUP_SHARDS)
+    for stmt in rollup_statements(dialect_name, deltas, shard):
+        db_or_conn.execute(stmt)
+
+
+# -----------------------------
+# READ
+# -----------------------------
+def get_summary(db: Session, hours: int = 24, days: int = 30) -> dict:
+    now = datetime.utcnow()
+    since_hour = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    since_day = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+
+    # SUM() comes back as DECIMAL on MySQL
+    totals = {metric: int(count) for metric, count in db.execute(
+        select(LeadRollup.metric, func.sum(LeadRollup.count))
+        .where(LeadRollup.period == "all", LeadRollup.bucket == ALL_BUCKET)
+        .group_by(LeadRollup.metric)
+    )}
+
+    def series(period, since):
+        out = {}
+        for bucket, metric, count in db.execute(
+            select(LeadRollup.bucket, LeadRollup.metric, func.sum(LeadRollup.count))
+            .where(LeadRollup.period == period, LeadRollup.bucket >= since)
+            .group_by(LeadRollup.bucket, LeadRollup.metric)
+            .order_by(LeadRollup.bucket)
+        ):
+            out.setdefault(bucket.isoformat(), {"created": 0, "qualified": 0, "emailed": 0})[metric] = int(count)
+        return [{"bucket": b, **counts} for b, counts in out.items()]
+
+    by_status = {m.split(":", 1)[1]: c for m, c in totals.items() if m.startswith("status:") and c}
+    histogram = [totals.get(f"score:{i}", 0) for i in range(10)]
+
+    return {
+        "total": totals.get("created", 0),
+        "by_status": by_status,
+        "score_histogram": [
+            {"min": i / 10, "max": (i + 1) / 10, "count": c} for i, c in enumerate(histogram)
+        ],
+        "funnel": {
+            "created": totals.get("created", 0),
+            "qualified": totals.get("qualified", 0),
+            "emailed": totals.get("emailed", 0),
+        },
+        "dedupe": {
+            "duplicates": totals.get("duplicates", 0),
+            "qualifications_skipped": totals.get("qualifications_skipped", 0),
+            "llm_calls_saved": totals.get("llm_calls_saved", 0),
+        },
+        "hourly": series("hour", since_hour),
+        "daily": series("day", since_day),
+    }
+
+
+# -----------------------------
+# REBUILD (one-off backfill)
+# -----------------------------
+def rebuild_rollups(db: Session):
+    """Recompute every counter from leads and logs. Scans both tables once."""
+    from app.models.lead import Lead
+    from app.models.log import Log
+    from app.models.job import QualificationJob
+    from app.crud.dedupe_crud import LLM_CALLS_PER_QUALIFICATION
+
+    leads = db.execute(select(Lead.status, Lead.score, Lead.created_at)).all()
+    deltas = lead_created_deltas(("NEW", 0.0, created_at) for _, _, created_at in leads)
+    # Move each lead from the NEW/0.0 it was created with to where it is now;
+    # the real qualification time isn't stored, so created_at stands in for it
+    for status, score, created_at in leads:
+        status_change_deltas("NEW", 0.0, status or "NEW", score, deltas, at=created_at)
+    log_deltas(
+        [{"action": a, "details": d, "timestamp": t} for a, d, t in db.execute(
+            select(Log.action, Log.details, Log.timestamp).where(Log.action.in_(EMAIL_ACTIONS))
+        )],
+        deltas,
+    )
+    # A duplicate without a job of its own skipped qualification
+    duplicates = db.scalar(select(func.count()).where(Lead.duplicate_of.is_not(None)))
+    skipped = db.scalar(
+        select(func.count()).where(
+            Lead.duplicate_of.is_not(None),
+            ~select(QualificationJob.id).where(QualificationJob.lead_id == Lead.id).exists(),
+        )
+    )
+    duplicate_deltas(duplicates, skipped, LLM_CALLS_PER_QUALIFICATION, deltas)
+
+    db.execute(delete(LeadRollup))
+    apply_rollups(db, deltas)
+    db.commit()
+
+
+def rollups_missing(db: Session) -> bool:
+    from app.models.lead import Lead
+    has_rollups = db.scalar(select(func.count()).select_from(LeadRollup)) > 0
+    has_leads = db.scalar(select(Lead.id).limit(1)) is not None
+    return has_leads and not has_rollups
@@ -1,13 +1,53 @@
 print("🎉 MAIN.PY IS RUNNING")
 
+import asyncio
+import os
+import random
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.exc import OperationalError
 import time
 
+# ---------------------------
+# Lifespan (startup / shutdown)
+# ---------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.core.http_client import start_http_client, stop_http_client
+    from app.core.db_pool import warm_async_pool
+    from app.core.database import async_engine, read_router, start_replica_monitor, stop_replica_monitor
+    from app.core.log_writer import start_log_writer, stop_log_writer
+    from app.workers.qualification_worker import start_workers, stop_workers
+
+    from app.core.events import bus
+
+    await run_in_threadpool(startup_event)
+    if async_engine is not None:
+        await warm_async_pool(async_engine)
+    bus.bind(asyncio.get_running_loop())
+    start_log_writer(engine)
+    start_http_client()
+    start_workers()
+    start_replica_monitor()
+    try:
+        yield
+    finally:
+        await stop_workers()
+        await run_in_threadpool(stop_replica_monitor)
+        await stop_http_client()
+        # Flush buffered logs last so everything above gets recorded
+        await run_in_threadpool(stop_log_writer)
+        if async_engine is not None:
+            await async_engine.dispose()
+        for replica in read_router.replicas:
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+
 # ---------------------------
 # Initialize App
 # ---------------------------
-app = FastAPI(title="Agentic Lead System")
+app = FastAPI(title="Agentic Lead System", lifespan=lifespan)
 
 # ---------------------------
 # CORS (MUST come before routers)
@@ -20,16 +60,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Location", "Retry-After"],
 )
 
+# ---------------------------
+# Response compression
+# ---------------------------
+# Brotli (with gzip fallback) when brotli-asgi is installed, gzip otherwise.
+# Bodies under COMPRESSION_MIN_SIZE bytes are sent as-is; the SSE stream is
+# never compressed so events aren't held back in the compressor.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+if COMPRESSION_MIN_SIZE > 0:
+    try:
+        from brotli_asgi import BrotliMiddleware
+        app.add_middleware(
+            BrotliMiddleware,
+            quality=4,
+            minimum_size=COMPRESSION_MIN_SIZE,
+            excluded_handlers=[r"^/api/leads/stream"],
+        )
+    except ImportError:
+        from fastapi.middleware.gzip import GZipMiddleware
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=6)
+
 # ---------------------------
 # IMPORT ROUTES AFTER CORS
 # ---------------------------
-from app.core.database import Base, engine
+from app.core.database import Base, engine, DB_ASYNC
 from app.api.routes import router as public_routes
 from app.api.internal_routes import router as internal_routes
 
 # REGISTER ROUTES (once)
+if DB_ASYNC:
+    # Async lead routes shadow their sync twins; registered first so they match first
+    from app.api.async_routes import router as async_routes
+    app.include_router(async_routes)
 app.include_router(public_routes)
 app.include_router(internal_routes)
 
@@ -40,9 +106,37 @@ app.include_router(internal_routes)
 def home():
     return {"message": "Backend is running!"}
 
+# ---------------------------
+# Metrics
+# ---------------------------
+@app.get("/metrics")
+def metrics():
+    from app.core.http_client import http_client_stats
+    from app.core.log_writer import log_writer_stats
+    from app.core.events import bus
+    from app.core.idempotency import idempotency_stats
+    from app.core.admission import admission_stats
+    from app.core.database import read_router
+    from app.core.db_pool import pool_stats
+    from app.workers.qualification_worker import queue_stats
+    return {
+        "admission": admission_stats(),
+        "db_pool": pool_stats(),
+        "events": bus.stats(),
+        "http_client": http_client_stats(),
+        "idempotency": idempotency_stats(),
+        "qualification_queue": queue_stats(),
+        "read_replicas": read_router.stats(),
+        "log_writer": log_writer_stats(),
+    }
+
 # ---------------------------
 # MySQL Wait
 # ---------------------------
+DB_WAIT_TIMEOUT = float(os.getenv("DB_WAIT_TIMEOUT", "60"))      # give up after this many seconds
+DB_WAIT_MAX_DELAY = float(os.getenv("DB_WAIT_MAX_DELAY", "5"))   # backoff cap between attempts
+
+
 def wait_for_mysql():
     from app.core.database import DATABASE_URL
     if "sqlite" in DATABASE_URL:
@@ -50,29 +144,74 @@ def wait_for_mysql():
         return True
 
     print("⏳ Waiting for MySQL to be ready...")
-    retries = 20
+    deadline = time.monotonic() + DB_WAIT_TIMEOUT
+    delay = 0.25
 
-    while retries > 0:
+    while True:
         try:
-            with engine.connect() as conn:
+            with engine.connect():
                 print("✅ MySQL is ready!")
                 return True
         except OperationalError:
-            retries -= 1
-            print("❌ MySQL not ready, retrying in 3 seconds...")
-            time.sleep(3)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Exponential backoff with jitter: quick when MySQL is nearly up,
+            # gentle when it is still initializing
+            sleep = min(delay * random.uniform(0.5, 1.0), remaining)
+            print(f"❌ MySQL not ready, retrying in {sleep:.1f} seconds...")
+            time.sleep(sleep)
+            delay = min(delay * 2, DB_WAIT_MAX_DELAY)
 
     print("❌ Could not connect to MySQL")
     return False
 
 # ---------------------------
-# Startup Event
+# Dashboard rollups backfill
+# ---------------------------
+def backfill_rollups():
+    # Databases that predate the rollup table get their counters built once
+    from app.core.database import SessionLocal
+    from app.crud.rollup_crud import rollups_missing, rebuild_rollups
+
+    db = SessionLocal()
+    try:
+        if rollups_missing(db):
+            print("🛠 Building dashboard rollups from existing leads...")
+            rebuild_rollups(db)
+    finally:
+        db.close()
+
+# ---------------------------
+# Connection pool warm-up
+# ---------------------------
+def warm_pools():
+    # Open the pools now so the first requests don't pay for connection setup
+    from app.core.database import read_router
+    from app.core.db_pool import warm_pool
+
+    warmed = warm_pool(engine)
+    for replica in read_router.replicas:
+        try:
+            warmed += warm_pool(replica.engine)
+        except OperationalError as e:
+            print(f"⚠️ Could not warm replica pool {replica.name}: {e}")
+    if warmed:
+        print(f"🔥 Warmed {warmed} database connections")
+
+# ---------------------------
+# Startup
 # ---------------------------
-@app.on_event("startup")
 def startup_event():
     if wait_for_mysql():
-        print("🛠 Creating tables...")
-        Base.metadata.create_all(bind=engine)
+        from app.core.migrations import migration_lock, upgrade_schema
+        # Replicas starting together take turns; later ones find nothing to do
+        with migration_lock(engine):
+            print("🛠 Creating tables...")
+            Base.metadata.create_all(bind=engine)
+            upgrade_schema(engine)
+            backfill_rollups()
+        warm_pools()
         print("✅ Tables created successfully.")
     else:
         raise Exception("Database not ready - startup failed")
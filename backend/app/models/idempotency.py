@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, UniqueConstraint, Index
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Stored outcome of a request sent with an Idempotency-Key header, so a
+    retry gets the first response back instead of running the work again.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    scope = Column(String(50), nullable=False)          # which endpoint the key belongs to
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)   # same key + different payload is rejected
+
+    status = Column(String(20), default="IN_PROGRESS", nullable=False)  # IN_PROGRESS / DONE
+    response_code = Column(Integer, nullable=True)
+    response_body = Column(JSON, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
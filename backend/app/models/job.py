@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class QualificationJob(Base):
+    """
+    Outbox row asking a worker to run qualification for a lead.
+    Written in the same transaction as the lead, so a committed lead
+    always has its job, and survives restarts.
+    """
+    __tablename__ = "qualification_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    lead_id = Column(Integer, ForeignKey("leads.id"), nullable=False, index=True)
+
+    status = Column(String(20), default="PENDING", nullable=False)  # PENDING / RUNNING / DONE / FAILED
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # not picked up before this
+
+    # Lease: a RUNNING job whose lease expired is up for grabs again
+    leased_by = Column(String(100), nullable=True)
+    leased_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_qualification_jobs_status_available", "status", "available_at"),
+    )
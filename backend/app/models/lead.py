@@ -1,8 +1,8 @@
 from sqlalchemy import (
-    Column, Integer, String, DateTime, JSON, Float, Boolean
+    Column, Integer, String, Text, DateTime, JSON, Float, Boolean, Index, ForeignKey
 )
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 
 from app.core.database import Base
@@ -25,23 +25,42 @@ class Lead(Base):
     data = Column(JSON)
 
     # AI / Agent status tracking
-    messages = Column(JSON, default=[])         # Chat history
+    # Chat history lives in lead_messages; this legacy JSON copy is emptied
+    # by migrations.migrate_message_history and never loaded by default
+    messages = deferred(Column(JSON, nullable=True))
+    last_message = Column(Text, nullable=True)          # text of the newest lead_messages row
+    last_message_at = Column(DateTime, nullable=True)
+    message_count = Column(Integer, default=0)
     status = Column(String(50), default="NEW")  # NEW / QUALIFIED / IN_PROGRESS / NOT_QUALIFIED
     score = Column(Float, default=0.0)          # final aggregated score 0..1
     confidence = Column(Float, default=0.0)     # AI confidence score
     risk_flags = Column(JSON, nullable=True)    # e.g. {"email":"disposable","phone":"invalid"}
     enriched = Column(Boolean, default=False)   # enrichment completed or not
 
+    # Duplicate detection (see crud/dedupe_crud.py): sha1 of normalized values
+    email_fp = Column(String(40), nullable=True)
+    phone_fp = Column(String(40), nullable=True)
+    company_fp = Column(String(40), nullable=True)
+    duplicate_of = Column(Integer, ForeignKey("leads.id"), nullable=True)   # original lead
+
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationship to logs
     logs = relationship("Log", back_populates="lead")
 
+    # Every list/search query in lead_crud.py is served by one of these
+    __table_args__ = (
+        Index("ix_leads_status_score", "status", "score"),
+        Index("ix_leads_created_at_id", "created_at", "id"),
+        Index("ix_leads_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_leads_email", "email"),
+        Index("ix_leads_updated_at_id", "updated_at", "id"),   # change feed
+        Index("ix_leads_email_fp_created_at", "email_fp", "created_at"),
+        Index("ix_leads_phone_fp_company_fp", "phone_fp", "company_fp", "created_at"),
+        Index("ix_leads_duplicate_of", "duplicate_of"),
+    )
+
     @property
     def lastMessage(self):
-        if self.messages and isinstance(self.messages, list) and len(self.messages) > 0:
-            last = self.messages[-1]
-            if isinstance(last, dict):
-                return last.get("text")
-        return None
+        return self.last_message
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -16,3 +16,7 @@ class Log(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     lead = relationship("Lead", back_populates="logs")
+
+    __table_args__ = (
+        Index("ix_logs_lead_id_timestamp", "lead_id", "timestamp"),
+    )
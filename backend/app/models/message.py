@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, ForeignKey, Index
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class LeadMessage(Base):
+    """
+    One chat message for a lead. Append-only: new messages are inserted,
+    never rewritten, and Lead.last_message keeps the latest text for lists.
+    """
+    __tablename__ = "lead_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    lead_id = Column(Integer, ForeignKey("leads.id"), nullable=False)
+
+    type = Column(String(50), default="chat")   # chat / email / note ...
+    role = Column(String(50), nullable=True)    # lead / agent / user
+    text = Column(Text, nullable=True)
+    data = Column(JSON, nullable=True)          # any other keys of the original message
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_lead_messages_lead_id_id", "lead_id", "id"),
+    )
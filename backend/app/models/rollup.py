@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+
+from app.core.database import Base
+
+
+class LeadRollup(Base):
+    """
+    Pre-aggregated dashboard counters, bumped in the same transaction as the
+    write they describe so GET /api/leads/summary never scans leads.
+
+    period "all" holds running totals (status:<S>, score:<0-9>, created,
+    qualified, emailed) with bucket = ALL_BUCKET; "hour" / "day" hold
+    created/qualified/emailed counts per time bucket.
+
+    Each counter is split over ROLLUP_SHARDS rows (`shard`); a write bumps
+    one of them at random so concurrent lead writes rarely wait on the same
+    row lock, and reads sum the shards.
+    """
+    __tablename__ = "lead_rollups"
+
+    id = Column(Integer, primary_key=True)
+    period = Column(String(10), nullable=False)
+    bucket = Column(DateTime, nullable=False)
+    metric = Column(String(50), nullable=False)
+    shard = Column(Integer, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("period", "bucket", "metric", "shard", name="uq_lead_rollups_period_bucket_metric_shard"),
+    )
@@ -23,14 +23,17 @@ class LeadOut(BaseModel):
     source: Optional[str]
     data: Optional[Any]
 
-    messages: Optional[list[dict]] = []
+    # Full history: GET /api/leads/{id}/messages
     lastMessage: Optional[str] = None
+    last_message_at: Optional[datetime] = None
+    message_count: Optional[int] = 0
 
     status: str
     score: float
     confidence: Optional[float]
     risk_flags: Optional[Any]
     enriched: Optional[bool]
+    duplicate_of: Optional[int] = None
 
     created_at: Optional[datetime]
     updated_at: Optional[datetime]
@@ -46,3 +49,32 @@ class LogOut(BaseModel):
     timestamp: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class LeadLogsOut(BaseModel):
+    logs: list[LogOut]
+    next_cursor: Optional[str] = None
+
+
+class MessageCreate(BaseModel):
+    text: str
+    type: str = "chat"
+    role: Optional[str] = None
+    data: Optional[Any] = None
+
+
+class MessageOut(BaseModel):
+    id: int
+    lead_id: int
+    type: Optional[str]
+    role: Optional[str]
+    text: Optional[str]
+    data: Optional[Any]
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LeadMessagesOut(BaseModel):
+    messages: list[MessageOut]
+    next_cursor: Optional[str] = None
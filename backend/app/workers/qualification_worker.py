@@ -0,0 +1,132 @@
+import asyncio
+import os
+import socket
+import uuid
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.database import SessionLocal
+from app.crud.job_crud import lease_jobs, complete_job, fail_job, job_counts
+
+
+# ---------------------------
+# Settings
+# ---------------------------
+QUEUE_WORKERS = int(os.getenv("QUEUE_WORKERS", "4"))                  # 0 = this replica only enqueues
+QUEUE_POLL_INTERVAL = float(os.getenv("QUEUE_POLL_INTERVAL", "1.0"))  # seconds between polls when idle
+QUEUE_VISIBILITY_TIMEOUT = float(os.getenv("QUEUE_VISIBILITY_TIMEOUT", "120"))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "5"))
+QUEUE_RETRY_BASE = float(os.getenv("QUEUE_RETRY_BASE", "5"))         # backoff = base * 2^(attempt-1)
+
+
+_stats = {"leased": 0, "succeeded": 0, "retried": 0, "failed": 0}
+_active = 0
+_wakeup = None
+_loop = None
+_tasks = []
+_instance_id = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+
+
+def notify_new_jobs():
+    """
+    Wake idle workers on this replica right after a job is committed.
+    Callable from any thread (sync routes run in the threadpool).
+    """
+    if _wakeup is not None and not _loop.is_closed():
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+async def _run_job(worker_id: str, job_id: int, lead_id: int, attempts: int):
+    from app.api.internal_routes import trigger_qualification
+
+    db = SessionLocal()
+    try:
+        # Leases that keep expiring (e.g. the replica died mid-job) count as attempts too
+        if attempts > QUEUE_MAX_ATTEMPTS:
+            await run_in_threadpool(fail_job, db, job_id, worker_id, "max attempts exceeded")
+            _stats["failed"] += 1
+            return
+
+        try:
+            result = await trigger_qualification(lead_id, db, job_id=job_id)
+        except Exception as e:
+            result = {"status": "triggered_but_failed", "error": str(e)}
+
+        if result.get("status") == "triggered":
+            await run_in_threadpool(complete_job, db, job_id, worker_id)
+            _stats["succeeded"] += 1
+        elif result.get("error") == "not found" or attempts >= QUEUE_MAX_ATTEMPTS:
+            await run_in_threadpool(fail_job, db, job_id, worker_id, str(result.get("error")))
+            _stats["failed"] += 1
+        else:
+            retry_in = QUEUE_RETRY_BASE * 2 ** (attempts - 1)
+            await run_in_threadpool(fail_job, db, job_id, worker_id, str(result.get("error")), retry_in)
+            _stats["retried"] += 1
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def _worker(n: int):
+    global _active
+    worker_id = f"{_instance_id}-{n}"
+
+    while True:
+        try:
+            db = SessionLocal()
+            try:
+                jobs = await run_in_threadpool(lease_jobs, db, worker_id, 1, QUEUE_VISIBILITY_TIMEOUT)
+            finally:
+                await run_in_threadpool(db.close)
+        except Exception as e:
+            print(f"⚠️ Queue worker {worker_id} could not lease jobs: {e}")
+            jobs = []
+
+        if not jobs:
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), QUEUE_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        for job_id, lead_id, attempts in jobs:
+            _stats["leased"] += 1
+            _active += 1
+            try:
+                await _run_job(worker_id, job_id, lead_id, attempts)
+            except Exception as e:
+                print(f"⚠️ Queue worker {worker_id} failed job {job_id}: {e}")
+            finally:
+                _active -= 1
+
+
+def start_workers():
+    global _wakeup, _loop
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    for n in range(QUEUE_WORKERS):
+        _tasks.append(asyncio.create_task(_worker(n)))
+    if QUEUE_WORKERS:
+        print(f"👷 Started {QUEUE_WORKERS} qualification workers ({_instance_id})")
+
+
+async def stop_workers():
+    # Jobs interrupted here keep their lease and are retried once it expires
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+def queue_stats() -> dict:
+    db = SessionLocal()
+    try:
+        depth = job_counts(db)
+    finally:
+        db.close()
+    return {
+        "workers": QUEUE_WORKERS,
+        "active": _active,
+        "depth": depth,
+        **_stats,
+    }
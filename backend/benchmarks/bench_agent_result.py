@@ -0,0 +1,123 @@
+"""
+Commits per processed lead and latency of applying a qualification result,
+old multi-commit sequence vs. the single-transaction apply_agent_result().
+
+Only the database work is measured; the follow-up email call is the same
+in both and now happens after commit.
+
+    cd backend
+    python benchmarks/bench_agent_result.py --database-url sqlite:///./bench.db -n 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+
+def update_lead_status(db, lead_id, status, score):
+    """The old per-step status update (one commit), kept here for comparison."""
+    from app.crud.rollup_crud import apply_rollups, status_change_deltas
+    from app.models.lead import Lead
+
+    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    if not lead:
+        return None
+
+    apply_rollups(db, status_change_deltas(lead.status, lead.score, status, score))
+    lead.status = status
+    lead.score = score
+    db.commit()
+    return lead
+
+
+def legacy_apply(db, lead_id, decision, score, confidence, risk_flags, signals):
+    """The pre-change agent_result flow, minus the email call."""
+    from app.crud.lead_crud import create_log
+    from app.models.lead import Lead
+
+    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    lead.confidence = confidence
+    lead.risk_flags = risk_flags
+    db.commit()
+
+    if decision in ("HOT", "QUALIFIED", "WARM"):
+        update_lead_status(db, lead_id, decision, score)
+        create_log(db, lead_id, "auto_email_sent", {"status": "sent"})
+    elif decision == "NURTURE":
+        update_lead_status(db, lead_id, "NURTURE", score)
+        create_log(db, lead_id, "nurture_campaign_added", {"score": score})
+    elif decision == "REVIEW":
+        update_lead_status(db, lead_id, "REVIEW", score)
+        create_log(db, lead_id, "manual_review_required", {"score": score})
+    else:
+        update_lead_status(db, lead_id, "NOT_QUALIFIED", score)
+
+    create_log(db, lead_id, "agent_result", {"decision": decision, "signals": signals})
+
+
+def current_apply(db, lead_id, decision, score, confidence, risk_flags, signals):
+    from app.crud.lead_crud import apply_agent_result, create_log, EMAIL_DECISIONS
+
+    apply_agent_result(db, lead_id, decision, score, confidence, risk_flags, signals)
+    if decision in EMAIL_DECISIONS:
+        create_log(db, lead_id, "auto_email_sent", {"status": "sent"})
+
+
+def run(name, apply, lead_ids, engine, SessionLocal):
+    from sqlalchemy import event
+
+    commits = 0
+
+    def on_commit(conn):
+        nonlocal commits
+        commits += 1
+
+    event.listen(engine, "commit", on_commit)
+    decisions = ["HOT", "QUALIFIED", "WARM", "NURTURE", "REVIEW", "NOT_QUALIFIED"]
+    signals = {"email": {"score": 0.9, "type": "business"}, "company": {"score": 0.8}}
+    latencies = []
+
+    db = SessionLocal()
+    try:
+        for i, lead_id in enumerate(lead_ids):
+            start = time.perf_counter()
+            apply(db, lead_id, decisions[i % len(decisions)], 0.8, 0.7, ["phone_voip"], signals)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        db.close()
+        event.remove(engine, "commit", on_commit)
+
+    latencies.sort()
+    print(
+        f"{name:<8} commits/lead={commits / len(lead_ids):.2f} "
+        f"p50={statistics.median(latencies) * 1000:.2f}ms "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("-n", "--leads", type=int, default=1000)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    from app.core.database import Base, engine, SessionLocal
+    from app.crud.lead_crud import bulk_create_leads
+    from app.schemas.lead_schema import LeadCreate
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    lead = LeadCreate(name="Bench", email="bench@example.com", phone="+15550000000")
+    ids = bulk_create_leads(db, [lead] * (args.leads * 2), qualify=False)
+    db.close()
+
+    run("before", legacy_apply, ids[:args.leads], engine, SessionLocal)
+    run("after", current_apply, ids[args.leads:], engine, SessionLocal)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Time GET /api/leads for large unpaged lists with the default ORM +
+LeadOut serialization vs. the LEADS_FAST_JSON row-tuple/orjson path,
+and the wire size with identity, gzip and brotli encoding.
+
+Runs in-process through TestClient against a fresh SQLite file per size,
+so the numbers are server-side work only.
+
+    cd backend
+    python benchmarks/bench_serialization.py --sizes 10000,100000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+
+def seed(n):
+    from app.core.database import Base, engine, SessionLocal
+    from app.crud.lead_crud import bulk_create_leads
+    from app.schemas.lead_schema import LeadCreate
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        batch = []
+        for i in range(n):
+            batch.append(LeadCreate(
+                name=f"Lead {i}", email=f"lead{i}@example.com", phone="+15550000000",
+                company="Example Inc", budget="10k-50k", source="website",
+                data={"message": "Interested in a demo", "utm": {"campaign": "spring", "medium": "cpc"}},
+            ))
+            if len(batch) == 5000:
+                bulk_create_leads(db, batch, qualify=False)
+                batch = []
+        if batch:
+            bulk_create_leads(db, batch, qualify=False)
+    finally:
+        db.close()
+
+
+def timed_get(client, encoding, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        r = client.get("/api/leads", headers={"Accept-Encoding": encoding})
+        latencies.append(time.perf_counter() - start)
+        assert r.status_code == 200, r.text
+    wire = int(r.headers.get("content-length", len(r.content)))
+    return statistics.median(latencies), wire, r
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db", default="./bench_serialization.db")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    os.environ.setdefault("QUEUE_WORKERS", "0")
+    from fastapi.testclient import TestClient
+    from app.main import app
+    import app.api.routes as routes
+
+    encodings = ["identity", "gzip", "br"]
+    print(f"{'rows':>7} {'path':<8} {'encoding':<9} {'p50 ms':>9} {'wire KB':>9}")
+    for n in [int(s) for s in args.sizes.split(",")]:
+        seed(n)
+        with TestClient(app) as client:
+            bodies = {}
+            for fast in (False, True):
+                routes.LEADS_FAST_JSON = fast
+                name = "fast" if fast else "default"
+                for encoding in encodings:
+                    p50, wire, r = timed_get(client, encoding, args.repeat)
+                    print(f"{n:>7} {name:<8} {encoding:<9} {p50 * 1000:>9.1f} {wire / 1024:>9.1f}")
+                bodies[name] = r.content
+
+            same = json.loads(bodies["default"]) == json.loads(bodies["fast"])
+            print(f"{n:>7} bodies identical: {same}")
+
+
+if __name__ == "__main__":
+    main()
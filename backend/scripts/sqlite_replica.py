@@ -0,0 +1,60 @@
+"""
+Poor man's replication for trying DATABASE_READ_URL locally: copy a SQLite
+primary onto a replica file every few seconds, optionally holding each
+snapshot back to simulate replica lag.
+
+    cd backend
+    python scripts/sqlite_replica.py ./primary.db ./replica.db --every 1 --lag 3
+
+    DATABASE_URL=sqlite:///./primary.db \\
+    DATABASE_READ_URL=sqlite:///./replica.db \\
+    uvicorn app.main:app
+
+/metrics -> "read_replicas" shows the lag the backend measures. Stop this
+script (or raise --lag above DATABASE_READ_MAX_LAG) and reads fall back to
+the primary.
+"""
+import argparse
+import os
+import sqlite3
+import time
+from collections import deque
+
+
+def snapshot(src_path: str, dst_path: str):
+    """Consistent copy of src via the SQLite backup API, swapped in atomically."""
+    tmp_path = dst_path + ".tmp"
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(tmp_path)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    return tmp_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("primary")
+    parser.add_argument("replica")
+    parser.add_argument("--every", type=float, default=1.0, help="seconds between snapshots")
+    parser.add_argument("--lag", type=float, default=0.0, help="seconds a snapshot is held back")
+    args = parser.parse_args()
+
+    pending = deque()   # (ready_at, snapshot path)
+    counter = 0
+    print(f"🔁 Replicating {args.primary} -> {args.replica} every {args.every}s, lag {args.lag}s")
+    while True:
+        counter += 1
+        tmp = snapshot(args.primary, f"{args.replica}.{counter}")
+        pending.append((time.monotonic() + args.lag, tmp))
+
+        while pending and pending[0][0] <= time.monotonic():
+            _, path = pending.popleft()
+            os.replace(path, args.replica)
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# app.core.database builds its engines at import time, so point it at a
+# throwaway SQLite file before any test imports the app.
+_db_dir = tempfile.mkdtemp(prefix="matrixlead-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault("QUEUE_WORKERS", "0")
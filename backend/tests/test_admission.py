@@ -0,0 +1,78 @@
+"""
+Admission decisions for lead intake at the shipped defaults: every branch
+(accept, defer, concurrency cap, queue shed) must be reachable.
+"""
+import pytest
+
+from app.core import admission as admission_module
+from app.core.admission import AdmissionController
+from app.core.database import Base, SessionLocal, engine
+from app.core.migrations import upgrade_schema
+from app.crud.job_crud import active_job_counts, enqueue_qualification
+
+
+def decide(pending=0, deferred=0, running=0, source="src"):
+    controller = AdmissionController()
+    controller._queue_depth = lambda: {"PENDING": pending, "DEFERRED": deferred, "RUNNING": running}
+    return controller.admit(source)
+
+
+def test_defaults_order_defer_below_cap_below_shed():
+    assert (admission_module.ADMISSION_DEFER_QUEUE
+            < admission_module.ADMISSION_MAX_CONCURRENT
+            < admission_module.ADMISSION_SHED_QUEUE)
+
+
+def test_accept():
+    assert decide(pending=10, running=50).action == "accept"
+
+
+def test_defer_on_ready_jobs():
+    decision = decide(pending=250, running=50)
+    assert decision.action == "defer"
+    assert decision.defer_seconds == admission_module.ADMISSION_DEFER_SECONDS
+
+
+def test_deferred_jobs_do_not_cause_more_deferral():
+    assert decide(pending=10, deferred=1500, running=50).action == "accept"
+
+
+def test_cap_on_running_plus_ready():
+    decision = decide(pending=300, running=800)
+    assert (decision.action, decision.reason) == ("shed", "concurrency")
+    assert decision.retry_after == admission_module.ADMISSION_RETRY_AFTER
+
+
+def test_shed_on_whole_backlog():
+    decision = decide(pending=300, deferred=1800, running=50)
+    assert (decision.action, decision.reason) == ("shed", "queue")
+
+
+def test_rate_limited_source():
+    controller = AdmissionController()
+    controller._queue_depth = lambda: {"PENDING": 0, "DEFERRED": 0, "RUNNING": 0}
+    burst = int(admission_module.ADMISSION_SOURCE_BURST)
+    assert all(controller.admit("noisy").action == "accept" for _ in range(burst))
+    assert controller.admit("noisy").reason == "rate_limited"
+    assert controller.admit("quiet").action == "accept"
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def test_active_job_counts_split_deferred(db):
+    before = active_job_counts(db)
+    jobs = [enqueue_qualification(db, 990001), enqueue_qualification(db, 990002, delay=600)]
+    db.commit()
+    after = active_job_counts(db)
+    for job in jobs:
+        db.delete(job)
+    db.commit()
+    assert after["PENDING"] - before["PENDING"] == 1
+    assert after["DEFERRED"] - before["DEFERRED"] == 1
@@ -0,0 +1,61 @@
+"""
+agent_result deliveries are keyed on the lead and the backend's run_id: a
+re-run of the same queue job asks the LLMs again and posts a different
+body, which must be replayed rather than rejected or applied twice.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import SessionLocal
+from app.crud.lead_crud import create_lead
+from app.main import app
+from app.models.lead import Lead
+from app.schemas.lead_schema import LeadCreate
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def lead_id(client):
+    db = SessionLocal()
+    try:
+        return create_lead(db, LeadCreate(name="Rae Okafor", email="rae@agent-result.example.com",
+                                          phone="+1 212 555 0147"), qualify=False).id
+    finally:
+        db.close()
+
+
+def post(client, lead_id, run_id, score):
+    return client.post(
+        "/api/internal/agent_result",
+        json={"lead_id": lead_id, "run_id": run_id, "decision": "NURTURE", "score": score, "signals": {}},
+        headers={"Idempotency-Key": f"agent-result-{lead_id}-{run_id}"},
+    )
+
+
+def lead_score(lead_id):
+    db = SessionLocal()
+    try:
+        return db.get(Lead, lead_id).score
+    finally:
+        db.close()
+
+
+def test_rerun_of_same_job_is_replayed(client, lead_id):
+    first = post(client, lead_id, "job-7", 0.61)
+    assert first.status_code == 200 and first.json() == {"status": "ok"}
+
+    rerun = post(client, lead_id, "job-7", 0.74)
+    assert rerun.status_code == 200
+    assert rerun.headers.get("Idempotent-Replayed") == "true"
+    assert lead_score(lead_id) == pytest.approx(0.61)
+
+
+def test_new_run_is_applied(client, lead_id):
+    post(client, lead_id, "job-8", 0.4)
+    assert post(client, lead_id, "job-9", 0.9).headers.get("Idempotent-Replayed") is None
+    assert lead_score(lead_id) == pytest.approx(0.9)
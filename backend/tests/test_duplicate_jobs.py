@@ -0,0 +1,60 @@
+"""
+A duplicate lead gets no qualification job and waits for its original's
+result; when the original's job fails for good it must be queued itself.
+"""
+import pytest
+from sqlalchemy import select
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.migrations import upgrade_schema
+from app.crud.job_crud import fail_job, lease_jobs, latest_job
+from app.crud.lead_crud import create_lead
+from app.models.job import QualificationJob
+from app.models.log import Log
+from app.schemas.lead_schema import LeadCreate
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def make_pair(db, email):
+    original = create_lead(db, LeadCreate(name="Ann Lee", email=email, phone="+1 415 555 0100"))
+    duplicate = create_lead(db, LeadCreate(name="Ann Lee", email=email.upper(), phone="+1 415 555 0101"))
+    assert duplicate.duplicate_of == original.id
+    assert latest_job(db, duplicate.id) is None
+    return original, duplicate
+
+
+def lease_original(db, original):
+    jobs = lease_jobs(db, "test-worker", 100, 60)
+    return next(job_id for job_id, lead_id, _ in jobs if lead_id == original.id)
+
+
+def test_failed_original_queues_waiting_duplicate(db):
+    original, duplicate = make_pair(db, "dup-failed@example.com")
+    job_id = lease_original(db, original)
+
+    fail_job(db, job_id, "test-worker", "max attempts exceeded")
+
+    assert db.get(QualificationJob, job_id).status == "FAILED"
+    job = latest_job(db, duplicate.id)
+    assert job is not None and job.status == "PENDING"
+    assert db.scalar(
+        select(Log).where(Log.lead_id == duplicate.id, Log.action == "duplicate_requeued")
+    ) is not None
+
+
+def test_retried_original_keeps_duplicate_waiting(db):
+    original, duplicate = make_pair(db, "dup-retry@example.com")
+    job_id = lease_original(db, original)
+
+    fail_job(db, job_id, "test-worker", "agents down", retry_in=5)
+
+    assert db.get(QualificationJob, job_id).status == "PENDING"
+    assert latest_job(db, duplicate.id) is None
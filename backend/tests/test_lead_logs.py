@@ -0,0 +1,67 @@
+"""
+GET /api/leads/logs pages each lead with its own cursor, so continuing
+one lead never skips or repeats another lead's logs.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.migrations import upgrade_schema
+from app.crud.lead_crud import get_logs_for_leads
+from app.models.lead import Lead
+from app.models.log import Log
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def make_lead(db, name, log_count, start):
+    lead = Lead(name=name, email=f"{name.lower()}@logs.example.com", phone="+1 415 555 0199")
+    db.add(lead)
+    db.flush()
+    for i in range(log_count):
+        db.add(Log(lead_id=lead.id, action=f"step_{i}", timestamp=start + timedelta(seconds=i)))
+    db.commit()
+    return lead.id
+
+
+def actions(page, lead_id):
+    return [log.action for log in page[lead_id]["logs"]]
+
+
+def test_each_lead_pages_with_its_own_cursor(db):
+    start = datetime(2024, 1, 1)
+    a = make_lead(db, "Alpha", 5, start)
+    b = make_lead(db, "Bravo", 3, start + timedelta(hours=1))
+
+    first = get_logs_for_leads(db, [a, b], per_lead=2)
+    assert actions(first, a) == ["step_0", "step_1"]
+    assert actions(first, b) == ["step_0", "step_1"]
+
+    # Continue only A; B is re-read from its start, not from A's position
+    second = get_logs_for_leads(db, [a, b], per_lead=2, after=f"{a}:{first[a]['next_cursor']}")
+    assert actions(second, a) == ["step_2", "step_3"]
+    assert actions(second, b) == ["step_0", "step_1"]
+
+    after = f"{a}:{second[a]['next_cursor']},{b}:{first[b]['next_cursor']}"
+    third = get_logs_for_leads(db, [a, b], per_lead=2, after=after)
+    assert actions(third, a) == ["step_4"] and third[a]["next_cursor"] is None
+    assert actions(third, b) == ["step_2"] and third[b]["next_cursor"] is None
+
+
+def test_bare_cursor_needs_a_single_lead(db):
+    start = datetime(2024, 3, 1)
+    a = make_lead(db, "Charlie", 3, start)
+    b = make_lead(db, "Delta", 1, start)
+
+    first = get_logs_for_leads(db, [a], per_lead=2)
+    assert actions(get_logs_for_leads(db, [a], per_lead=2, after=first[a]["next_cursor"]), a) == ["step_2"]
+    with pytest.raises(ValueError):
+        get_logs_for_leads(db, [a, b], per_lead=2, after=first[a]["next_cursor"])
@@ -0,0 +1,37 @@
+"""
+Logs are buffered by the log writer unless the caller asks for sync=True,
+which the email paths use because the UI reads those logs back at once.
+"""
+import pytest
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.log_writer import start_log_writer, stop_log_writer
+from app.core.migrations import upgrade_schema
+from app.crud.lead_crud import create_lead, create_log, get_lead_logs
+from app.schemas.lead_schema import LeadCreate
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    start_log_writer(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    stop_log_writer()
+
+
+def test_sync_log_is_readable_immediately(db):
+    lead = create_lead(db, LeadCreate(name="Ines Duarte", email="ines@logs-sync.example.com",
+                                      phone="+351 21 555 0100"), qualify=False)
+
+    assert create_log(db, lead.id, "queued_entry", {}) is None
+    assert create_log(db, lead.id, "manual_email_sent", {"status": "sent"}, sync=True) is not None
+
+    actions = [log.action for log in get_lead_logs(db, lead.id)]
+    assert "manual_email_sent" in actions
+
+    stop_log_writer()
+    actions = [log.action for log in get_lead_logs(db, lead.id)]
+    assert "queued_entry" in actions
@@ -0,0 +1,39 @@
+"""
+Startup migrations run on every replica, so each one must be a no-op once
+applied; reshard_rollups in particular must never drop a sharded table.
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.core.migrations import migration_lock, reshard_rollups
+
+
+@pytest.fixture
+def old_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE lead_rollups (id INTEGER PRIMARY KEY, period VARCHAR(10) NOT NULL, "
+            "bucket DATETIME NOT NULL, metric VARCHAR(50) NOT NULL, count INTEGER NOT NULL, "
+            "CONSTRAINT uq_lead_rollups_period_bucket_metric UNIQUE (period, bucket, metric))"
+        ))
+    yield engine
+    engine.dispose()
+
+
+def test_reshard_runs_once(old_engine):
+    with migration_lock(old_engine):
+        assert reshard_rollups(old_engine) is True
+    columns = {c["name"] for c in inspect(old_engine).get_columns("lead_rollups")}
+    assert "shard" in columns
+
+    with old_engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO lead_rollups (period, bucket, metric, shard, count) "
+            "VALUES ('all', '1970-01-01 00:00:00', 'created', 0, 7)"
+        ))
+    # A second replica starting later keeps the sharded table and its counters
+    with migration_lock(old_engine):
+        assert reshard_rollups(old_engine) is False
+    with old_engine.connect() as conn:
+        assert conn.execute(text("SELECT SUM(count) FROM lead_rollups")).scalar() == 7
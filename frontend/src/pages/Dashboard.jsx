@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { motion } from "framer-motion";
 import {
   LayoutDashboard,
@@ -16,6 +16,12 @@ import axios from "axios";
 import "../index.css";
 
 const API_URL = "http://127.0.0.1:8000/api/leads";
+// Live events are coalesced: new leads are fetched at most every
+// NEW_LEADS_DELAY ms, the summary re-read at most every SUMMARY_DELAY ms
+const NEW_LEADS_DELAY = 500;
+const SUMMARY_DELAY = 2000;
+// More new leads than this in one window (a bulk import) -> read the newest page once
+const NEW_LEADS_ONE_BY_ONE = 20;
 
 
 export default function Dashboard() {
@@ -23,11 +29,101 @@ export default function Dashboard() {
   const [leads, setLeads] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedLead, setSelectedLead] = useState(null);
+  const [summary, setSummary] = useState(null);
 
   useEffect(() => {
     fetchLeads();
+    fetchSummary();
   }, []);
 
+  const newLeadIds = useRef(new Set());
+  const newLeadsTimer = useRef(null);
+  const summaryTimer = useRef(null);
+
+  // Live updates: patch changed leads in place instead of re-polling the list
+  useEffect(() => {
+    const source = new EventSource(`${API_URL}/stream`);
+
+    source.addEventListener("lead_created", (e) => {
+      const event = JSON.parse(e.data);
+      newLeadIds.current.add(event.lead_id);
+      if (!newLeadsTimer.current) {
+        newLeadsTimer.current = setTimeout(fetchNewLeads, NEW_LEADS_DELAY);
+      }
+      scheduleSummary();
+    });
+    source.addEventListener("lead_updated", (e) => {
+      const event = JSON.parse(e.data);
+      setLeads((prev) =>
+        prev.map((l) =>
+          l.id === event.lead_id
+            ? { ...l, status: event.status, score: event.score, confidence: event.confidence }
+            : l
+        )
+      );
+      scheduleSummary();
+    });
+    // Missed more events than the server buffers; start over
+    source.addEventListener("reset", () => {
+      fetchLeads();
+      fetchSummary();
+    });
+
+    return () => {
+      source.close();
+      clearTimeout(newLeadsTimer.current);
+      clearTimeout(summaryTimer.current);
+    };
+  }, []);
+
+  // One summary read per SUMMARY_DELAY however many events arrive
+  const scheduleSummary = () => {
+    if (summaryTimer.current) return;
+    summaryTimer.current = setTimeout(() => {
+      summaryTimer.current = null;
+      fetchSummary();
+    }, SUMMARY_DELAY);
+  };
+
+  // Add the leads announced since the last call to the top of the list
+  const fetchNewLeads = async () => {
+    const ids = [...newLeadIds.current];
+    newLeadIds.current.clear();
+    newLeadsTimer.current = null;
+    if (ids.length === 0) return;
+
+    try {
+      let fresh;
+      if (ids.length <= NEW_LEADS_ONE_BY_ONE) {
+        const responses = await Promise.all(ids.map((id) => axios.get(`${API_URL}/${id}`)));
+        fresh = responses.map((r) => r.data);
+      } else {
+        const res = await axios.get(API_URL, { params: { limit: Math.min(ids.length, 1000) } });
+        fresh = res.data;
+      }
+      setLeads((prev) => {
+        const known = new Set(prev.map((l) => l.id));
+        const added = fresh.filter((l) => !known.has(l.id)).sort((a, b) => b.id - a.id);
+        return [...added, ...prev];
+      });
+    } catch (err) {
+      console.error("🔥 ERROR fetching new leads:", err);
+    }
+  };
+
+  // Server-side counters; the stat cards fall back to counting `leads` if this fails
+  const fetchSummary = async () => {
+    try {
+      const res = await axios.get(`${API_URL}/summary`);
+      setSummary(res.data);
+    } catch (err) {
+      console.error("🔥 ERROR fetching summary:", err);
+    }
+  };
+
+  const countStatus = (status) =>
+    summary ? summary.by_status[status] || 0 : leads.filter((l) => l.status === status).length;
+
   const fetchLeads = async () => {
     try {
       console.log("📡 Fetching leads from:", API_URL);
@@ -78,18 +174,18 @@ export default function Dashboard() {
         {activeTab === "home" && (
           <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4">
 
-            <StatCard label="Total Signals" value={leads.length} icon={Activity} color="blue" />
+            <StatCard label="Total Signals" value={summary ? summary.total : leads.length} icon={Activity} color="blue" />
 
             <StatCard
               label="Active Intercepts"
-              value={leads.filter((l) => l.status === "IN_PROGRESS").length}
+              value={countStatus("IN_PROGRESS")}
               icon={MessageSquare}
               color="yellow"
             />
 
             <StatCard
               label="Qualified Targets"
-              value={leads.filter((l) => l.status === "QUALIFIED").length}
+              value={countStatus("QUALIFIED")}
               icon={CheckCircle}
               color="green"
             />
@@ -152,12 +248,12 @@ export default function Dashboard() {
 
         {/* CHAT TAB */}
         {activeTab === "chat" && (
-          leads.filter((l) => l.messages?.some((m) => m.type === "chat")).length === 0 ? (
+          leads.filter((l) => l.message_count > 0).length === 0 ? (
             <p className="text-gray-500">No chat conversations yet.</p>
           ) : (
             <div className="grid grid-cols-1 xl:grid-cols-2 gap-6">
               {leads
-                .filter((l) => l.messages?.some((m) => m.type === "chat"))
+                .filter((l) => l.message_count > 0)
                 .map((lead, idx) => (
                   <LeadCard
                     key={idx}
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 
 const LeadQualificationForm = () => {
@@ -30,6 +30,8 @@ const LeadQualificationForm = () => {
 
     const [isSubmitting, setIsSubmitting] = useState(false);
     const [result, setResult] = useState(null);
+    // One key per filled-in form: resubmitting after a timeout returns the same lead
+    const idempotencyKey = useRef(crypto.randomUUID());
 
     // --- Configuration: Real World B2B Questions ---
     const questions = {
@@ -192,7 +194,10 @@ ${formData.message}
 
             const response = await fetch('http://localhost:8000/api/leads', {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Idempotency-Key': idempotencyKey.current,
+                },
                 body: JSON.stringify({
                     name: formData.name,
                     email: formData.email,
@@ -218,21 +223,19 @@ ${formData.message}
             if (!response.ok) throw new Error('Failed to submit');
             const lead = await response.json();
 
-            // Poll for the result and logs with retries (up to 10 seconds)
+            // One long-poll request returns as soon as the agents decide (or after 30 seconds)
             let updatedLead = lead;
-            let emailStatus = false;
-            let attempts = 0;
-            const maxAttempts = 10;
-
-            while (attempts < maxAttempts) {
-                attempts++;
-
-                // 1. Check Lead Status
-                const updatedResponse = await fetch(`http://localhost:8000/api/leads`);
-                const leads = await updatedResponse.json();
-                updatedLead = leads.find(l => l.id === lead.id);
+            try {
+                const decisionResponse = await fetch(`http://localhost:8000/api/leads/${lead.id}/decision?wait=30`);
+                if (decisionResponse.ok) updatedLead = await decisionResponse.json();
+            } catch (err) {
+                console.warn("Could not fetch decision", err);
+            }
 
-                // 2. Check Logs for Email
+            // The follow-up email goes out right after a positive decision; give it a few seconds
+            let emailStatus = false;
+            const expectsEmail = updatedLead?.decided && ['HOT', 'QUALIFIED', 'WARM'].includes(updatedLead.status);
+            for (let attempts = 0; expectsEmail && attempts < 5; attempts++) {
                 try {
                     const logsResponse = await fetch(`http://localhost:8000/api/leads/${lead.id}/logs`);
                     const logs = await logsResponse.json();
@@ -244,13 +247,11 @@ ${formData.message}
 
                     if (emailLog) {
                         emailStatus = true;
-                        break; // Exit loop if email confirmed
+                        break;
                     }
                 } catch (err) {
                     console.warn("Could not fetch logs", err);
                 }
-
-                // Wait 1 second before next poll
                 await new Promise(resolve => setTimeout(resolve, 1000));
             }
 
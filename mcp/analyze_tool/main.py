@@ -0,0 +1,139 @@
+from fastapi import APIRouter
+from pydantic import BaseModel
+from dotenv import load_dotenv
+import os, json
+from typing import Optional
+from groq import Groq
+from llm_cache import chat, cache_lookup, cache_store, parse_json_object
+
+from email_tool.main import email_rules, email_finalize, EMAIL_SIGNAL
+from phone_tool.main import phone_rules, phone_finalize, PHONE_SIGNAL
+from name_tool.main import name_rules, name_finalize, NAME_SIGNAL
+from company_tool.main import company_rules, company_finalize, COMPANY_SIGNAL
+from message_tool.main import message_rules, message_finalize, MESSAGE_SIGNAL
+
+load_dotenv()
+client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+router = APIRouter()
+
+# Per-field replies of the combined prompt are cached under each tool's
+# name with this version, so a company seen in one lead is not re-asked
+# in the next one.
+PROMPT_VERSION = "lead-v1"   # bump when the prompt changes
+
+
+class LeadInput(BaseModel):
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    name: Optional[str] = None
+    company: Optional[str] = None
+    message: Optional[str] = None
+
+
+# field -> (tool name, input cleanup, rules, finalize, reply shape)
+SIGNALS = {
+    "email": ("email_reputation", lambda v: v, email_rules, email_finalize, EMAIL_SIGNAL),
+    "phone": ("phone_check", lambda v: v, phone_rules, phone_finalize, PHONE_SIGNAL),
+    "name": ("name_check", str.strip, name_rules, name_finalize, NAME_SIGNAL),
+    "company": ("company_enrich", str.strip, company_rules, company_finalize, COMPANY_SIGNAL),
+    "message": ("intent", str.strip, message_rules, lambda v, data: message_finalize(data), MESSAGE_SIGNAL),
+}
+
+
+def build_prompt(pending: dict) -> str:
+    fields = "\n".join(
+        f'{field}: {json.dumps(value)}\n  shape: {SIGNALS[field][4]}'
+        for field, (value, _) in pending.items()
+    )
+    keys = ", ".join(f'"{field}"' for field in pending)
+    return f"""
+You are a strictly JSON-only API that screens inbound sales leads.
+
+Analyze each lead field below and return ONE JSON object with exactly
+these keys: {keys}. The value of each key is an object in the shape
+given for that field; scores are between 0 and 1.
+
+{fields}
+
+RULES:
+- email: classify the address (business, personal, spammy, disposable, bot).
+- phone: REJECT sequential (123456) or repeated digits (999999).
+- name: is this a real human name?
+- company: is this a real company; estimate size, industry and website.
+- message: the sender's intent, urgency, quality and spam probability.
+- Do NOT include markdown, comments, or text outside the JSON.
+"""
+
+
+@router.post("/tools/analyze_lead")
+def analyze_lead(payload: LeadInput):
+    """
+    All five signals for one lead with at most one LLM call. Rule-based
+    checks and cached replies answer what they can; only the remaining
+    fields go into a single combined prompt. "signals" has the same
+    per-tool shapes as the individual /tools/* routes.
+    """
+    signals = {}
+    pending = {}     # field -> (value, cache_input)
+
+    # -------------------------------------------
+    # 1️⃣ RULES + CACHE (no LLM cost)
+    # -------------------------------------------
+    for field, (tool, clean, rules, finalize, _) in SIGNALS.items():
+        value = getattr(payload, field)
+        if value is None:
+            signals[field] = {}
+            continue
+        # One bad field must not cost the lead its other four signals
+        try:
+            value = clean(value)
+
+            early, cache_input = rules(value)
+            if early is not None:
+                signals[field] = early
+                continue
+
+            hit = cache_lookup(tool, cache_input, PROMPT_VERSION)
+            if hit is not None:
+                signals[field] = finalize(value, parse_json_object(hit))
+                continue
+        except Exception as e:
+            signals[field] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+
+        pending[field] = (value, cache_input)
+
+    if not pending:
+        return {"signals": signals, "llm_calls": 0}
+
+    # -------------------------------------------
+    # 2️⃣ ONE COMBINED LLM CALL
+    # -------------------------------------------
+    error = None
+    try:
+        reply = parse_json_object(chat(client, build_prompt(pending), temperature=0.1)) or {}
+    except Exception as e:
+        print(f"⚠️ analyze_lead LLM error: {e}")
+        reply = {}
+        error = f"LLM error: {e}"
+
+    # -------------------------------------------
+    # 3️⃣ SPLIT BACK INTO PER-TOOL RESULTS
+    # -------------------------------------------
+    for field, (value, cache_input) in pending.items():
+        tool, _, _, finalize, _ = SIGNALS[field]
+        part = reply.get(field)
+        if not isinstance(part, dict):
+            part = None
+        else:
+            cache_store(tool, cache_input, PROMPT_VERSION, json.dumps(part))
+        try:
+            result = finalize(value, part)
+            if error:
+                result["error"] = error
+            signals[field] = result
+        except Exception as e:
+            signals[field] = {"error": f"{type(e).__name__}: {e}"}
+
+    return {"signals": signals, "llm_calls": 1}
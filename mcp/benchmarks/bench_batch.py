@@ -0,0 +1,135 @@
+"""
+Compare throughput of the single-item MCP tool routes with their /batch
+variants against a running MCP service.
+
+Sends the same synthetic inputs (with some duplicates) once as concurrent
+single requests and once as batch requests, clearing the tool's LLM cache
+before each run so both start cold, and prints items/sec and LLM calls.
+Every run makes real Groq calls.
+
+    cd mcp
+    uvicorn main:app --port 9000 &
+    python benchmarks/bench_batch.py --tool company_enrich -n 200
+    python benchmarks/bench_batch.py --tool name_check -n 500 -c 32 --batch-size 250
+"""
+import argparse
+import itertools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+FIRST = ["Ava", "Liam", "Noah", "Emma", "Mia", "Lucas", "Sofia", "Ethan", "Priya", "Kenji", "Amara", "Diego"]
+LAST = ["Patel", "Garcia", "Nguyen", "Smith", "Kowalski", "Okafor", "Tanaka", "Rossi", "Schmidt", "Haddad"]
+WORDS = ["Northwind", "Bluepeak", "Ironleaf", "Brightpath", "Stonebridge", "Redwood", "Silverline", "Clearwater"]
+SUFFIX = ["Labs", "Systems", "Logistics", "Health", "Analytics", "Foods", "Robotics", "Partners"]
+ASKS = ["We need pricing for", "Can we book a demo for", "Looking to roll this out to", "Please send a quote for"]
+
+# tool -> (request field, batch field)
+TOOLS = {
+    "email_reputation": ("email", "emails"),
+    "phone_check": ("phone", "phones"),
+    "name_check": ("name", "names"),
+    "company_enrich": ("company", "companies"),
+    "intent": ("message", "messages"),
+}
+
+
+def make_inputs(tool: str, n: int, duplicates: float, seed: int = 7):
+    rng = random.Random(seed)
+    people = list(itertools.product(FIRST, LAST))
+    companies = [f"{a} {b}" for a, b in itertools.product(WORDS, SUFFIX)]
+    values = []
+    for i in range(n):
+        if values and rng.random() < duplicates:
+            values.append(rng.choice(values))
+            continue
+        first, last = people[i % len(people)]
+        company = companies[i % len(companies)]
+        values.append({
+            "email_reputation": f"{first}.{last}{i}@gmail.com".lower(),
+            "phone_check": f"+1 415 {rng.randint(200, 999)} {rng.randint(1000, 9999)}",
+            "name_check": f"{first} {last}" + ("" if i < len(people) else f" {WORDS[i % len(WORDS)]}"),
+            "company_enrich": company + ("" if i < len(companies) else f" {FIRST[i % len(FIRST)]}"),
+            "intent": f"{rng.choice(ASKS)} our {company} team of {rng.randint(5, 500)} people this quarter",
+        }[tool])
+    return values
+
+
+def clear_cache(url: str, tool: str, token: str):
+    headers = {"X-Admin-Token": token} if token else {}
+    requests.post(f"{url}/admin/cache/invalidate", json={"tool": tool}, headers=headers, timeout=30)
+
+
+def cache_stores(url: str, tool: str, token: str) -> int:
+    headers = {"X-Admin-Token": token} if token else {}
+    stats = requests.get(f"{url}/admin/cache", headers=headers, timeout=30).json()
+    return stats.get("tools", {}).get(tool, {}).get("stores", 0)
+
+
+def run_single(url: str, tool: str, values, concurrency: int, token: str) -> dict:
+    field, _ = TOOLS[tool]
+    clear_cache(url, tool, token)
+    stores = cache_stores(url, tool, token)
+    session = requests.Session()
+    errors = 0
+
+    def one(value):
+        nonlocal errors
+        try:
+            if session.post(f"{url}/tools/{tool}", json={field: value}, timeout=120).status_code >= 400:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, values))
+    elapsed = time.perf_counter() - start
+    # Every completion that came back as JSON was stored in the cache once
+    return {"seconds": elapsed, "llm_calls": cache_stores(url, tool, token) - stores, "errors": errors}
+
+
+def run_batch(url: str, tool: str, values, batch_size: int, token: str) -> dict:
+    _, field = TOOLS[tool]
+    clear_cache(url, tool, token)
+    llm_calls = errors = 0
+
+    start = time.perf_counter()
+    for i in range(0, len(values), batch_size):
+        r = requests.post(f"{url}/tools/{tool}/batch", json={field: values[i:i + batch_size]}, timeout=600)
+        if r.status_code >= 400:
+            errors += len(values[i:i + batch_size])
+            continue
+        body = r.json()
+        llm_calls += body["llm_calls"]
+        errors += sum(1 for result in body["results"] if "error" in result)
+    return {"seconds": time.perf_counter() - start, "llm_calls": llm_calls, "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:9000")
+    parser.add_argument("--tool", choices=sorted(TOOLS), default="company_enrich")
+    parser.add_argument("-n", type=int, default=200, help="inputs per run")
+    parser.add_argument("-c", type=int, default=16, help="concurrent single requests")
+    parser.add_argument("--batch-size", type=int, default=100, help="inputs per batch request")
+    parser.add_argument("--duplicates", type=float, default=0.2, help="share of repeated inputs")
+    parser.add_argument("--admin-token", default="", help="MCP_ADMIN_TOKEN, if the service sets one")
+    args = parser.parse_args()
+
+    values = make_inputs(args.tool, args.n, args.duplicates)
+    print(f"🧪 {args.tool}: {len(values)} inputs, {len(set(values))} unique")
+
+    rows = [
+        ("single", run_single(args.url, args.tool, values, args.c, args.admin_token)),
+        ("batch", run_batch(args.url, args.tool, values, args.batch_size, args.admin_token)),
+    ]
+    print(f"{'mode':<8}{'seconds':>10}{'items/s':>10}{'llm calls':>11}{'errors':>8}")
+    for mode, r in rows:
+        print(f"{mode:<8}{r['seconds']:>10.2f}{len(values) / r['seconds']:>10.1f}{r['llm_calls']:>11}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
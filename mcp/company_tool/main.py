@@ -106,19 +106,27 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import os, json, re
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from groq import Groq
+from llm_cache import normalize_input
+from llm_batch import BatchTool, run_batch
 
 load_dotenv()
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
 router = APIRouter()
 
+PROMPT_VERSION = "company-v1"   # bump when the prompt changes
+
 
 class CompanyInput(BaseModel):
     company: str
 
 
+# Shape asked of the LLM in /tools/analyze_lead
+COMPANY_SIGNAL = """{"is_real": true, "size": "small | medium | large | unknown", "industry": "string or unknown", "website": "URL or null", "score": 0.0, "reason": "short explanation"}"""
+
+
 # -------------------------------
 #  FAST RULE-BASED CHECKS (NO LLM)
 # -------------------------------
@@ -166,6 +174,65 @@ def safe_parse_json(text: str) -> Dict[str, Any]:
         return None
 
 
+def company_rules(company: str):
+    """(result, cache_input): a finished result when the name is obviously fake, else None."""
+    if looks_fake_company(company):
+        return {
+            "company": company,
+            "is_real": False,
+            "size": "unknown",
+            "industry": "unknown",
+            "website": None,
+            "score": 0.1,
+            "reason": "Company name appears generic, placeholder, or invalid."
+        }, None
+    return None, normalize_input(company)
+
+
+def company_finalize(company: str, parsed: Optional[dict]) -> dict:
+    if parsed is None:
+        # Fallback if the model broke JSON
+        return {
+            "company": company,
+            "is_real": False,
+            "size": "unknown",
+            "industry": "unknown",
+            "website": None,
+            "score": 0.4,
+            "reason": "Failed to parse JSON from the model output."
+        }
+
+    cleaned = {
+        "company": company,
+        "is_real": bool(parsed.get("is_real", False)),
+        "size": parsed.get("size", "unknown"),
+        "industry": parsed.get("industry", "unknown"),
+        "website": parsed.get("website", None),
+        "reason": parsed.get("reason", "No explanation provided")
+    }
+
+    # Score normalization
+    try:
+        score = float(parsed.get("score", 0.5))
+        cleaned["score"] = max(0.0, min(1.0, score))
+    except:
+        cleaned["score"] = 0.5
+
+    return cleaned
+
+
+COMPANY_BATCH = BatchTool(
+    "company_enrich",
+    task="Decide whether each company is real and estimate its size, industry and website.",
+    shape=COMPANY_SIGNAL,
+    rules=company_rules,
+    finalize=company_finalize,
+    prompt_version=PROMPT_VERSION,
+    temperature=0.1,
+    clean=str.strip,
+)
+
+
 # -------------------------------
 #  ROUTE: COMPANY ENRICHMENT
 # -------------------------------
@@ -177,16 +244,9 @@ def enrich_company(payload: CompanyInput):
     # -------------------------------
     # 1️⃣ RULE-BASED EARLY RETURN  
     # -------------------------------
-    if looks_fake_company(company):
-        return {
-            "company": company,
-            "is_real": False,
-            "size": "unknown",
-            "industry": "unknown",
-            "website": None,
-            "score": 0.1,
-            "reason": "Company name appears generic, placeholder, or invalid."
-        }
+    early, cache_input = company_rules(company)
+    if early is not None:
+        return early
 
     # -------------------------------
     # 2️⃣ LLM PROMPT
@@ -216,50 +276,24 @@ Respond ONLY in proper JSON:
 """
 
     try:
-        resp = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
+        raw = COMPANY_BATCH.reply(client, company, cache_input, prompt)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM error: {e}")
 
-    raw = resp.choices[0].message.content
-
     # -------------------------------
-    # 3️⃣ TRY PARSING JSON SAFELY
+    # 3️⃣ TRY PARSING JSON SAFELY + NORMALIZE
     # -------------------------------
-    parsed = safe_parse_json(raw)
+    return company_finalize(company, safe_parse_json(raw))
 
-    if parsed is None:
-        # Fallback if the model broke JSON
-        return {
-            "company": company,
-            "is_real": False,
-            "size": "unknown",
-            "industry": "unknown",
-            "website": None,
-            "score": 0.4,
-            "reason": "Failed to parse JSON from the model output."
-        }
 
-    # -------------------------------
-    # 4️⃣ NORMALIZE + VALIDATE OUTPUT
-    # -------------------------------
-    cleaned = {
-        "company": parsed.get("company", company),
-        "is_real": bool(parsed.get("is_real", False)),
-        "size": parsed.get("size", "unknown"),
-        "industry": parsed.get("industry", "unknown"),
-        "website": parsed.get("website", None),
-        "reason": parsed.get("reason", "No explanation provided")
-    }
+# -------------------------------------------
+# BATCH: many company names in packed LLM prompts
+# -------------------------------------------
+class CompanyBatchInput(BaseModel):
+    companies: List[str]
 
-    # Score normalization
-    try:
-        score = float(parsed.get("score", 0.5))
-        cleaned["score"] = max(0.0, min(1.0, score))
-    except:
-        cleaned["score"] = 0.5
 
-    return cleaned
+@router.post("/tools/company_enrich/batch")
+def enrich_company_batch(payload: CompanyBatchInput):
+    """Results in input order; each one has the same shape as /tools/company_enrich."""
+    return run_batch(client, COMPANY_BATCH, payload.companies)
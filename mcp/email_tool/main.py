@@ -96,6 +96,8 @@ import os
 from groq import Groq
 from email_validator import validate_email, EmailNotValidError
 import json
+from typing import List, Optional
+from llm_batch import BatchTool, run_batch
 
 load_dotenv()
 
@@ -103,6 +105,8 @@ router = APIRouter()
 
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
+PROMPT_VERSION = "email-v1"   # bump when the prompt changes
+
 
 class EmailInput(BaseModel):
     email: str
@@ -113,15 +117,15 @@ DISPOSABLE_DOMAINS = {
     "dispostable.com", "fakeinbox.com"
 }
 
+# Shape asked of the LLM in /tools/analyze_lead
+EMAIL_SIGNAL = """{"type": "business | personal | spammy | disposable | bot | unknown", "score": 0.0, "is_likely_genuine": false, "reason": "short explanation"}"""
 
-@router.post("/tools/email_reputation")
-def check_email(payload: EmailInput):
-
-    email = payload.email
 
-    # -------------------------------------------
-    # 1️⃣ BASIC HARD VALIDATION (no LLM cost)
-    # -------------------------------------------
+def email_rules(email: str):
+    """
+    Checks that need no LLM. Returns (result, cache_input): a finished
+    result when the rules decide, else None and the normalized address.
+    """
     try:
         validation = validate_email(email, check_deliverability=True)
         normalized = validation.normalized
@@ -132,7 +136,7 @@ def check_email(payload: EmailInput):
             "score": 0.0,
             "is_likely_genuine": False,
             "reason": str(e)
-        }
+        }, None
 
     domain = normalized.split("@")[-1]
 
@@ -144,7 +148,50 @@ def check_email(payload: EmailInput):
             "score": 0.1,
             "is_likely_genuine": False,
             "reason": "Disposable domain detected"
+        }, None
+
+    return None, normalized.lower()
+
+
+def email_finalize(email: str, data: Optional[dict]) -> dict:
+    """Fill in the fields the aggregator relies on (a cached reply may echo another spelling)."""
+    if data is None:
+        data = {
+            "type": "unknown",
+            "score": 0.5,
+            "is_likely_genuine": False,
+            "reason": "Failed to parse model response"
         }
+    data["email"] = email
+    data.setdefault("score", 0.5)
+    data.setdefault("type", "unknown")
+    data.setdefault("is_likely_genuine", False)
+    data.setdefault("reason", "No reason provided")
+    return data
+
+
+EMAIL_BATCH = BatchTool(
+    "email_reputation",
+    task="Classify each email address: business, personal, spammy, disposable or bot.",
+    shape=EMAIL_SIGNAL,
+    rules=email_rules,
+    finalize=email_finalize,
+    prompt_version=PROMPT_VERSION,
+    temperature=0.1,
+)
+
+
+@router.post("/tools/email_reputation")
+def check_email(payload: EmailInput):
+
+    email = payload.email
+
+    # -------------------------------------------
+    # 1️⃣ BASIC HARD VALIDATION (no LLM cost)
+    # -------------------------------------------
+    early, cache_input = email_rules(email)
+    if early is not None:
+        return early
 
     # -------------------------------------------
     # 2️⃣ LLM ANALYSIS (only when email is valid)
@@ -168,13 +215,7 @@ def check_email(payload: EmailInput):
     """
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
-
-        raw = response.choices[0].message.content.strip()
+        raw = EMAIL_BATCH.reply(client, email, cache_input, prompt).strip()
 
         # -------------------------------------------
         # 3️⃣ Robust JSON parsing (never fails)
@@ -187,13 +228,7 @@ def check_email(payload: EmailInput):
                 data = json.loads(json_str)
             except:
                 # Final fallback
-                data = {
-                    "email": email,
-                    "type": "unknown",
-                    "score": 0.5,
-                    "is_likely_genuine": False,
-                    "reason": "Failed to parse model response"
-                }
+                data = None
 
     except Exception as e:
         # LLM API failure fallback
@@ -206,10 +241,17 @@ def check_email(payload: EmailInput):
         }
 
     # Ensure mandatory fields exist
-    data.setdefault("email", email)
-    data.setdefault("score", 0.5)
-    data.setdefault("type", "unknown")
-    data.setdefault("is_likely_genuine", False)
-    data.setdefault("reason", "No reason provided")
+    return email_finalize(email, data)
 
-    return data
+
+# -------------------------------------------
+# BATCH: many addresses in packed LLM prompts
+# -------------------------------------------
+class EmailBatchInput(BaseModel):
+    emails: List[str]
+
+
+@router.post("/tools/email_reputation/batch")
+def check_email_batch(payload: EmailBatchInput):
+    """Results in input order; each one has the same shape as /tools/email_reputation."""
+    return run_batch(client, EMAIL_BATCH, payload.emails)
@@ -0,0 +1,366 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from fastapi import HTTPException
+from llm_cache import chat, cached_chat, cache_lookup, cache_store, parse_json_object
+
+
+# ---------------------------
+# Multi-item prompts
+# ---------------------------
+# /tools/<tool>/batch takes a list of inputs, answers what it can from the
+# tool's rules and the LLM cache, and packs the rest into numbered prompts
+# ("1": {...}, "2": {...}). A prompt is closed when it reaches
+# BATCH_ITEMS_PER_PROMPT items or the estimated prompt / reply size would
+# pass BATCH_PROMPT_TOKENS / BATCH_REPLY_TOKENS (about 4 characters a token).
+# Replies are cached per item, so single and batch routes share the work.
+
+BATCH_MAX_INPUTS = int(os.getenv("BATCH_MAX_INPUTS", "500"))
+BATCH_ITEMS_PER_PROMPT = int(os.getenv("BATCH_ITEMS_PER_PROMPT", "20"))
+BATCH_PROMPT_TOKENS = int(os.getenv("BATCH_PROMPT_TOKENS", "6000"))
+BATCH_REPLY_TOKENS = int(os.getenv("BATCH_REPLY_TOKENS", "4000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))   # prompts in flight per request
+
+BATCH_PROMPT_VERSION = "batch-v1"   # bump when batch_prompt() changes
+
+# Micro-batching (off by default): concurrent cache misses on a single route
+# wait up to MICROBATCH_MAX_WAIT_MS for company and go out as one packed
+# prompt of at most MICROBATCH_MAX_SIZE items.
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "16"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class BatchTool:
+    """What run_batch needs to know about one tool."""
+
+    def __init__(self, name: str, task: str, shape: str, rules: Callable, finalize: Callable,
+                 prompt_version: str, temperature: float, clean: Callable = lambda v: v):
+        self.name = name                      # cache namespace, e.g. "company_enrich"
+        self.task = task                      # one line telling the model what to judge
+        self.shape = shape                    # JSON shape of one item's reply
+        self.rules = rules                    # value -> (result or None, cache_input)
+        self.finalize = finalize              # (value, parsed or None) -> result
+        self.prompt_version = prompt_version  # the single route's prompt version
+        self.temperature = temperature
+        self.clean = clean                    # same input cleanup as the single route
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
+
+    @property
+    def batch_version(self) -> str:
+        """Cache version of batch-derived replies; bumping either prompt invalidates them."""
+        return f"{self.prompt_version}+{BATCH_PROMPT_VERSION}"
+
+    def cached(self, cache_input: str) -> Optional[dict]:
+        """A reply from the single route or an earlier batch, if either is cached."""
+        for version in (self.prompt_version, self.batch_version):
+            parsed = parse_json_object(
+                cache_lookup(self.name, cache_input, version, temperature=self.temperature)
+            )
+            if parsed is not None:
+                return parsed
+        return None
+
+    def reply(self, client, value: str, cache_input: str, prompt: str) -> str:
+        """
+        Reply text for the single route: cached_chat with the route's own
+        prompt, or, with MICROBATCH_ENABLED, the item's part of a packed
+        prompt shared with concurrent requests (asked on its own when the
+        packed reply left it out).
+        """
+        if not MICROBATCH_ENABLED:
+            return cached_chat(client, self.name, cache_input, prompt,
+                               prompt_version=self.prompt_version, temperature=self.temperature)
+        hit = self.cached(cache_input)
+        if hit is not None:
+            return json.dumps(hit)
+        return self.batcher(client).submit(value, cache_input, prompt)
+
+    def batcher(self, client) -> "MicroBatcher":
+        with self._batcher_lock:
+            if self._batcher is None:
+                self._batcher = _batchers[self.name] = MicroBatcher(client, self)
+            return self._batcher
+
+
+def check_batch_size(values: list):
+    if len(values) > BATCH_MAX_INPUTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BATCH_MAX_INPUTS} inputs per batch, got {len(values)}"
+        )
+
+
+def batch_prompt(tool: BatchTool, values: List[str]) -> str:
+    items = "\n".join(f"{n}: {json.dumps(value)}" for n, value in enumerate(values, 1))
+    return f"""
+You are a strictly JSON-only API.
+
+TASK: {tool.task}
+
+Analyze each numbered item below on its own. Return ONE JSON object whose
+keys are the item numbers ("1" to "{len(values)}") and whose values are
+objects in this shape:
+
+{tool.shape}
+
+ITEMS:
+{items}
+
+Do NOT include markdown, comments, or text outside the JSON.
+"""
+
+
+def pack(tool: BatchTool, values: List[str]) -> List[List[str]]:
+    """Split values into as few prompts as the item and token limits allow, keeping order."""
+    base_tokens = estimate_tokens(batch_prompt(tool, []))
+    reply_tokens_per_item = estimate_tokens(tool.shape) + 4
+    chunks, current, prompt_tokens, reply_tokens = [], [], base_tokens, 0
+
+    for value in values:
+        item_tokens = estimate_tokens(json.dumps(value)) + 2
+        full = current and (
+            len(current) >= BATCH_ITEMS_PER_PROMPT
+            or prompt_tokens + item_tokens > BATCH_PROMPT_TOKENS
+            or reply_tokens + reply_tokens_per_item > BATCH_REPLY_TOKENS
+        )
+        if full:
+            chunks.append(current)
+            current, prompt_tokens, reply_tokens = [], base_tokens, 0
+        current.append(value)
+        prompt_tokens += item_tokens
+        reply_tokens += reply_tokens_per_item
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def ask_chunk(client, tool: BatchTool, values: List[str]) -> List[Optional[dict]]:
+    """One completion for a chunk; the parsed reply for each value (None when missing)."""
+    reply = parse_json_object(
+        chat(client, batch_prompt(tool, values), temperature=tool.temperature)
+    ) or {}
+    parts = []
+    for n in range(1, len(values) + 1):
+        part = reply.get(str(n))
+        parts.append(part if isinstance(part, dict) else None)
+    return parts
+
+
+def run_batch(client, tool: BatchTool, values: List[str]) -> dict:
+    """
+    Results for `values` in input order. Duplicates are analyzed once, and
+    a failure in one input or one prompt only affects the items it covers.
+    """
+    check_batch_size(values)
+    answers = {}                 # cleaned value -> result
+    pending = OrderedDict()      # cache_input -> [cleaned values sharing it]
+    counts = {"inputs": len(values), "unique": 0, "rules": 0, "cached": 0, "llm_items": 0, "llm_calls": 0}
+
+    cleaned = [tool.clean(value) for value in values]
+
+    # -------------------------------------------
+    # 1️⃣ DEDUPE + RULES + CACHE (no LLM cost)
+    # -------------------------------------------
+    for value in dict.fromkeys(cleaned):
+        counts["unique"] += 1
+        try:
+            early, cache_input = tool.rules(value)
+            if early is not None:
+                answers[value] = early
+                counts["rules"] += 1
+                continue
+            hit = tool.cached(cache_input)
+            if hit is not None:
+                answers[value] = tool.finalize(value, hit)
+                counts["cached"] += 1
+                continue
+        except Exception as e:
+            answers[value] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+        pending.setdefault(cache_input, []).append(value)
+
+    # -------------------------------------------
+    # 2️⃣ PACKED LLM CALLS (one per chunk)
+    # -------------------------------------------
+    cache_inputs = list(pending)
+    # The first spelling seen stands in for every input with the same cache key
+    chunks = pack(tool, [pending[key][0] for key in cache_inputs])
+    counts["llm_items"] = len(cache_inputs)
+    counts["llm_calls"] = len(chunks)
+
+    def run(chunk):
+        try:
+            return ask_chunk(client, tool, chunk), None
+        except Exception as e:
+            print(f"⚠️ {tool.name} batch LLM error: {e}")
+            return [None] * len(chunk), f"LLM error: {e}"
+
+    if chunks:
+        with ThreadPoolExecutor(max_workers=max(1, min(BATCH_CONCURRENCY, len(chunks)))) as pool:
+            replies = list(pool.map(run, chunks))
+    else:
+        replies = []
+
+    # -------------------------------------------
+    # 3️⃣ SPLIT BACK + CACHE EACH ITEM
+    # -------------------------------------------
+    position = 0
+    for parts, error in replies:
+        for part in parts:
+            cache_input = cache_inputs[position]
+            position += 1
+            if part is not None:
+                cache_store(tool.name, cache_input, tool.batch_version, json.dumps(part),
+                            temperature=tool.temperature)
+            for value in pending[cache_input]:
+                try:
+                    result = tool.finalize(value, dict(part) if part is not None else None)
+                    if error:
+                        result["error"] = error
+                    answers[value] = result
+                except Exception as e:
+                    answers[value] = {"error": f"{type(e).__name__}: {e}"}
+
+    return {"results": [answers[value] for value in cleaned], **counts}
+
+
+# ---------------------------
+# Micro-batching dispatcher
+# ---------------------------
+class MicroBatcher:
+    """
+    Groups concurrent single-route misses for one tool. The first request
+    into an empty window leads: it waits until MICROBATCH_MAX_SIZE items are
+    queued or MICROBATCH_MAX_WAIT_MS has passed, sends them as one prompt and
+    hands each waiting request its part. A lone item, or one the packed
+    reply left out, uses the route's own prompt, so light traffic sees the
+    same replies as without batching.
+    """
+
+    def __init__(self, client, tool: BatchTool, max_size: int = MICROBATCH_MAX_SIZE,
+                 max_wait_ms: float = MICROBATCH_MAX_WAIT_MS):
+        self.client = client
+        self.tool = tool
+        self.max_size = max(1, max_size)
+        self.max_wait = max_wait_ms / 1000
+        self._cond = threading.Condition()
+        self._queue = OrderedDict()   # cache_input -> (value, prompt, Future)
+        self._leading = False
+        self.stats = defaultdict(int)
+
+    def submit(self, value: str, cache_input: str, prompt: str) -> str:
+        with self._cond:
+            self.stats["requests"] += 1
+            queued = self._queue.get(cache_input)
+            if queued is not None:
+                # Same input already waiting: share its answer
+                self.stats["coalesced"] += 1
+                future = queued[2]
+            else:
+                future = Future()
+                self._queue[cache_input] = (value, prompt, future)
+                if len(self._queue) >= self.max_size:
+                    self._cond.notify()
+            lead = not self._leading
+            self._leading = True
+        if lead:
+            self._lead()
+        return future.result()
+
+    def _lead(self):
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            while len(self._queue) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = [self._queue.popitem(last=False) for _ in range(min(self.max_size, len(self._queue)))]
+            if self._queue:
+                # More arrived than fit: the next window gets its own leader
+                threading.Thread(target=self._lead, daemon=True).start()
+            else:
+                self._leading = False
+        self._send(batch)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return dict(self.stats)
+
+    def _count(self, **increments):
+        with self._cond:
+            for name, n in increments.items():
+                self.stats[name] += n
+
+    def _send_one(self, cache_input, item):
+        """One item with the route's own prompt, as if batching were off."""
+        value, prompt, future = item
+        tool = self.tool
+        try:
+            self._count(llm_calls=1)
+            future.set_result(cached_chat(self.client, tool.name, cache_input, prompt,
+                                          prompt_version=tool.prompt_version,
+                                          temperature=tool.temperature))
+        except BaseException as e:
+            self._count(errors=1)
+            future.set_exception(e)
+
+    def _send(self, batch):
+        tool = self.tool
+        if len(batch) == 1:
+            self._send_one(*batch[0])
+            return
+
+        try:
+            parts = []
+            for chunk in pack(tool, [value for _, (value, _, _) in batch]):
+                self._count(llm_calls=1)
+                parts.extend(ask_chunk(self.client, tool, chunk))
+        except BaseException as e:
+            self._count(errors=1)
+            for _, (_, _, future) in batch:
+                future.set_exception(e)
+            return
+
+        with self._cond:
+            self.stats["batches"] += 1
+            self.stats["batched_items"] += len(batch)
+            self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+
+        missing = []
+        for (cache_input, item), part in zip(batch, parts):
+            if part is None:
+                missing.append((cache_input, item))
+                continue
+            raw = json.dumps(part)
+            cache_store(tool.name, cache_input, tool.batch_version, raw, temperature=tool.temperature)
+            item[2].set_result(raw)
+
+        # Items the packed reply left out get their own prompt
+        for cache_input, item in missing:
+            self._count(retried_single=1)
+            self._send_one(cache_input, item)
+
+
+_batchers = {}
+
+
+def microbatch_stats() -> dict:
+    return {
+        "enabled": MICROBATCH_ENABLED,
+        "max_size": MICROBATCH_MAX_SIZE,
+        "max_wait_ms": MICROBATCH_MAX_WAIT_MS,
+        "tools": {name: b.snapshot() for name, b in _batchers.items()},
+    }
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Optional
+
+
+# ---------------------------
+# Shared LLM result cache
+# ---------------------------
+# Every tool asks cached_chat() instead of calling Groq directly. Replies
+# are content-addressed by (tool, normalized input, prompt version, model,
+# temperature), so "Acme Corp" / "acme corp " hit the same entry. Two tiers:
+#   memory -> per-process LRU (LLM_CACHE_SIZE entries)
+#   sqlite -> LLM_CACHE_DB, shared by the workers on one host, with a TTL
+#             and LRU eviction once it grows past LLM_CACHE_MAX_MB
+# Bump a tool's PROMPT_VERSION when its prompt changes; old entries stop
+# matching and can be dropped with POST /admin/cache/invalidate.
+
+LLM_MODEL = "llama-3.1-8b-instant"
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "10000"))
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "llm_cache.sqlite3")     # empty = memory tier only
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+
+
+def normalize_input(text: str) -> str:
+    """Case- and whitespace-insensitive form of a tool input, used in cache keys."""
+    return re.sub(r"\s+", " ", (text or "").strip()).casefold()
+
+
+def cache_key(tool: str, normalized: str, prompt_version: str, model: str, temperature: float) -> str:
+    material = json.dumps([tool, normalized, prompt_version, model, round(temperature, 3)])
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def parse_json_object(raw: str) -> Optional[dict]:
+    """First {...} block of an LLM reply (markdown fences allowed), or None."""
+    clean = re.sub(r"```json|```", "", raw or "").strip()
+    start, end = clean.find("{"), clean.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(clean[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def is_cacheable(raw: str) -> bool:
+    """Only replies that contain a JSON object are worth replaying."""
+    return parse_json_object(raw) is not None
+
+
+class LLMCache:
+    def __init__(self, path: str = LLM_CACHE_DB, size: int = LLM_CACHE_SIZE,
+                 ttl_hours: float = LLM_CACHE_TTL_HOURS, max_mb: float = LLM_CACHE_MAX_MB):
+        self.size = size
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._memory = OrderedDict()     # key -> (value, expires_at, tool, prompt_version)
+        self._lock = threading.Lock()
+        self.stats = defaultdict(lambda: defaultdict(int))
+        self.evictions = 0
+        self._db = None
+        self._db_bytes = 0
+        if path:
+            self._open(path)
+
+    # ---- sqlite tier ----
+    def _open(self, path: str):
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                tool TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model TEXT NOT NULL,
+                value TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_tool_version ON llm_cache (tool, prompt_version)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)")
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+        self._db_bytes = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM llm_cache").fetchone()[0]
+
+    def _db_get(self, key: str, now: float):
+        row = self._db.execute(
+            "SELECT value, expires_at, tool, prompt_version FROM llm_cache WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        if row is not None:
+            self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return row
+
+    def _db_put(self, key, tool, prompt_version, model, value, now):
+        size = len(value.encode())
+        old = self._db.execute("SELECT bytes FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        self._db.execute(
+            "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, tool, prompt_version, model, value, size, now, now + self.ttl, now),
+        )
+        self._db_bytes += size - (old[0] if old else 0)
+        if self._db_bytes > self.max_bytes:
+            self._db_evict(now)
+
+    def _db_evict(self, now: float):
+        # Expired first, then least recently used until 90% of the bound
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        target = int(self.max_bytes * 0.9)
+        total = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM llm_cache").fetchone()[0]
+        if total > target:
+            cutoff = None
+            running = total
+            for accessed_at, size in self._db.execute(
+                "SELECT accessed_at, bytes FROM llm_cache ORDER BY accessed_at"
+            ):
+                running -= size
+                cutoff = accessed_at
+                if running <= target:
+                    break
+            deleted = self._db.execute("DELETE FROM llm_cache WHERE accessed_at <= ?", (cutoff,)).rowcount
+            self.evictions += deleted
+        self._db_bytes = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM llm_cache").fetchone()[0]
+
+    # ---- memory tier ----
+    def _memory_put(self, key, value, expires_at, tool, prompt_version):
+        self._memory[key] = (value, expires_at, tool, prompt_version)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.size:
+            self._memory.popitem(last=False)
+
+    # ---- public ----
+    def get(self, key: str, tool: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                self._count(tool, "memory_hits", entry[0])
+                return entry[0]
+
+            row = self._db_get(key, now) if self._db is not None else None
+            if row is not None:
+                self._memory_put(key, *row)
+                self._count(tool, "disk_hits", row[0])
+                return row[0]
+
+            self.stats[tool]["misses"] += 1
+            return None
+
+    def put(self, key: str, tool: str, prompt_version: str, model: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, value, now + self.ttl, tool, prompt_version)
+            if self._db is not None:
+                self._db_put(key, tool, prompt_version, model, value, now)
+            self.stats[tool]["stores"] += 1
+            self.stats[tool]["bytes_stored"] += len(value.encode())
+
+    def _count(self, tool: str, kind: str, value: str):
+        self.stats[tool][kind] += 1
+        self.stats[tool]["bytes_served"] += len(value.encode())
+
+    def invalidate(self, tool: Optional[str] = None, prompt_version: Optional[str] = None) -> int:
+        """Drop entries for a tool and/or prompt version (both None = everything)."""
+        def matches(entry_tool, entry_version):
+            return (tool is None or entry_tool == tool) and (
+                prompt_version is None or entry_version == prompt_version
+            )
+
+        with self._lock:
+            stale = [k for k, e in self._memory.items() if matches(e[2], e[3])]
+            for k in stale:
+                del self._memory[k]
+            removed = len(stale)
+            if self._db is not None:
+                where, params = [], []
+                if tool is not None:
+                    where.append("tool = ?")
+                    params.append(tool)
+                if prompt_version is not None:
+                    where.append("prompt_version = ?")
+                    params.append(prompt_version)
+                sql = "DELETE FROM llm_cache" + (" WHERE " + " AND ".join(where) if where else "")
+                removed = max(removed, self._db.execute(sql, params).rowcount)
+                self._db_bytes = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM llm_cache").fetchone()[0]
+        return removed
+
+    def snapshot(self) -> dict:
+        tools = {}
+        for tool, counts in self.stats.items():
+            lookups = counts["memory_hits"] + counts["disk_hits"] + counts["misses"]
+            tools[tool] = {
+                **counts,
+                "hit_rate": round((lookups - counts["misses"]) / lookups, 3) if lookups else 0.0,
+            }
+        return {
+            "enabled": LLM_CACHE_ENABLED,
+            "memory_entries": len(self._memory),
+            "disk_bytes": self._db_bytes if self._db is not None else None,
+            "disk_max_bytes": self.max_bytes if self._db is not None else None,
+            "evictions": self.evictions,
+            "tools": tools,
+        }
+
+
+cache = LLMCache() if LLM_CACHE_ENABLED else None
+
+
+def cache_lookup(tool: str, normalized: str, prompt_version: str,
+                 model: str = LLM_MODEL, temperature: float = 0.1) -> Optional[str]:
+    if cache is None:
+        return None
+    return cache.get(cache_key(tool, normalized, prompt_version, model, temperature), tool)
+
+
+def cache_store(tool: str, normalized: str, prompt_version: str, value: str,
+                model: str = LLM_MODEL, temperature: float = 0.1):
+    if cache is None or not value or not is_cacheable(value):
+        return
+    cache.put(cache_key(tool, normalized, prompt_version, model, temperature), tool, prompt_version, model, value)
+
+
+def chat(client, prompt: str, model: str = LLM_MODEL, temperature: float = 0.1) -> str:
+    response = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+    )
+    return response.choices[0].message.content
+
+
+def cached_chat(client, tool: str, normalized: str, prompt: str, *,
+                prompt_version: str, model: str = LLM_MODEL, temperature: float = 0.1) -> str:
+    """
+    Reply text for a single-message chat completion, served from the cache
+    when this (tool, input, prompt version, model, temperature) was seen
+    before. Errors from the client propagate unchanged and are not cached.
+    """
+    hit = cache_lookup(tool, normalized, prompt_version, model, temperature)
+    if hit is not None:
+        return hit
+
+    raw = chat(client, prompt, model, temperature)
+    cache_store(tool, normalized, prompt_version, raw, model, temperature)
+    return raw
+
+
+def cache_stats() -> dict:
+    return cache.snapshot() if cache is not None else {"enabled": False}
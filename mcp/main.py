@@ -1,5 +1,7 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
 from dotenv import load_dotenv
+from pydantic import BaseModel
+from typing import Optional
 import os
 
 # Import routers from submodules
@@ -9,6 +11,9 @@ from phone_tool.main import router as phone_router
 from name_tool.main import router as name_router
 from message_tool.main import router as message_router
 from aggregator.main import router as aggregator_router
+from analyze_tool.main import router as analyze_router
+from llm_cache import cache, cache_stats
+from llm_batch import microbatch_stats
 
 load_dotenv()
 
@@ -21,7 +26,47 @@ app.include_router(phone_router)
 app.include_router(name_router)
 app.include_router(message_router)
 app.include_router(aggregator_router)
+app.include_router(analyze_router)
 
 @app.get("/")
 def health_check():
     return {"status": "ok", "service": "Unified MCP Service"}
+
+
+# ---------------------------
+# LLM cache admin
+# ---------------------------
+# Set MCP_ADMIN_TOKEN to require it in X-Admin-Token on these routes.
+MCP_ADMIN_TOKEN = os.getenv("MCP_ADMIN_TOKEN")
+
+
+def check_admin(token: Optional[str]):
+    if MCP_ADMIN_TOKEN and token != MCP_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+class CacheInvalidation(BaseModel):
+    tool: Optional[str] = None             # e.g. "company_enrich"
+    prompt_version: Optional[str] = None   # e.g. "company-v1"
+
+
+@app.get("/admin/cache")
+def get_cache_stats(x_admin_token: Optional[str] = Header(None)):
+    check_admin(x_admin_token)
+    return cache_stats()
+
+
+@app.post("/admin/cache/invalidate")
+def invalidate_cache(payload: CacheInvalidation, x_admin_token: Optional[str] = Header(None)):
+    """Drop cached replies for a tool and/or prompt version; an empty body clears everything."""
+    check_admin(x_admin_token)
+    if cache is None:
+        return {"removed": 0, "enabled": False}
+    return {"removed": cache.invalidate(payload.tool, payload.prompt_version)}
+
+
+@app.get("/admin/microbatch")
+def get_microbatch_stats(x_admin_token: Optional[str] = Header(None)):
+    """Requests, LLM calls and batch sizes of the single-route micro-batchers."""
+    check_admin(x_admin_token)
+    return microbatch_stats()
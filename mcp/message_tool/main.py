@@ -82,18 +82,27 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import os, json, re
+from typing import List, Optional
 from groq import Groq
+from llm_cache import normalize_input
+from llm_batch import BatchTool, run_batch
 
 load_dotenv()
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
 router = APIRouter()
 
+PROMPT_VERSION = "intent-v1"   # bump when the prompt changes
+
 
 class MessageInput(BaseModel):
     message: str
 
 
+# Shape asked of the LLM in /tools/analyze_lead
+MESSAGE_SIGNAL = """{"intent": "buying | demo | pricing | support | complaint | spam | unsure", "urgency": 0.0, "quality": 0.0, "spam_probability": 0.0, "score": 0.0, "reason": "short explanation"}"""
+
+
 def looks_spammy(text: str) -> bool:
     """Very cheap rule-based spam detection before LLM call."""
     t = text.lower()
@@ -109,14 +118,8 @@ def looks_spammy(text: str) -> bool:
     return any(w in t for w in spam_words)
 
 
-@router.post("/tools/intent")
-def intent_analysis(payload: MessageInput):
-
-    msg = payload.message.strip()
-
-    # -----------------------------------------
-    # 1️⃣ Short text / obvious spam → NO LLM call 
-    # -----------------------------------------
+def message_rules(msg: str):
+    """(result, cache_input): a finished result for short or obviously spammy text, else None."""
     if len(msg) < 5 or looks_spammy(msg):
         return {
             "intent": "spam" if looks_spammy(msg) else "unsure",
@@ -125,8 +128,54 @@ def intent_analysis(payload: MessageInput):
             "spam_probability": 0.9 if looks_spammy(msg) else 0.5,
             "score": 0.2,
             "reason": "Message too short or contains spam-like patterns."
+        }, None
+    return None, normalize_input(msg)
+
+
+def message_finalize(result: Optional[dict], error: str = "Model returned invalid JSON") -> dict:
+    if result is None:
+        result = {
+            "intent": "unsure",
+            "urgency": 0.3,
+            "quality": 0.3,
+            "spam_probability": 0.5,
+            "score": 0.3,
+            "reason": error
         }
 
+    result.setdefault("intent", "unsure")
+    result.setdefault("urgency", 0.0)
+    result.setdefault("quality", 0.0)
+    result.setdefault("spam_probability", 0.5)
+    result.setdefault("score", 1 - result.get("spam_probability", 0.5))
+    result.setdefault("reason", "No explanation provided")
+    return result
+
+
+MESSAGE_BATCH = BatchTool(
+    "intent",
+    task="Judge each customer message: intent, urgency, quality, spam probability, and a score for how likely it is a genuine, meaningful inquiry.",
+    shape=MESSAGE_SIGNAL,
+    rules=message_rules,
+    finalize=lambda msg, data: message_finalize(data),
+    prompt_version=PROMPT_VERSION,
+    temperature=0.2,
+    clean=str.strip,
+)
+
+
+@router.post("/tools/intent")
+def intent_analysis(payload: MessageInput):
+
+    msg = payload.message.strip()
+
+    # -----------------------------------------
+    # 1️⃣ Short text / obvious spam → NO LLM call 
+    # -----------------------------------------
+    early, cache_input = message_rules(msg)
+    if early is not None:
+        return early
+
     # -----------------------------------------
     # 2️⃣ LLM prompt for real analysis
     # -----------------------------------------
@@ -160,13 +209,7 @@ def intent_analysis(payload: MessageInput):
     """
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2
-        )
-
-        raw = response.choices[0].message.content.strip()
+        raw = MESSAGE_BATCH.reply(client, msg, cache_input, prompt).strip()
 
         # -----------------------------------------
         # 3️⃣ Safe JSON extraction
@@ -186,23 +229,22 @@ def intent_analysis(payload: MessageInput):
         # -----------------------------------------
         # 4️⃣ LLM failed → fallback structure
         # -----------------------------------------
-        result = {
-            "intent": "unsure",
-            "urgency": 0.3,
-            "quality": 0.3,
-            "spam_probability": 0.5,
-            "score": 0.3,
-            "reason": f"LLM error: {str(e)}"
-        }
+        return message_finalize(None, f"LLM error: {str(e)}")
 
     # -----------------------------------------
     # 5️⃣ Ensure all required fields exist
     # -----------------------------------------
-    result.setdefault("intent", "unsure")
-    result.setdefault("urgency", 0.0)
-    result.setdefault("quality", 0.0)
-    result.setdefault("spam_probability", 0.5)
-    result.setdefault("score", 1 - result.get("spam_probability", 0.5))
-    result.setdefault("reason", "No explanation provided")
+    return message_finalize(result)
 
-    return result
+
+# -------------------------------------------
+# BATCH: many messages in packed LLM prompts
+# -------------------------------------------
+class MessageBatchInput(BaseModel):
+    messages: List[str]
+
+
+@router.post("/tools/intent/batch")
+def intent_analysis_batch(payload: MessageBatchInput):
+    """Results in input order; each one has the same shape as /tools/intent."""
+    return run_batch(client, MESSAGE_BATCH, payload.messages)
@@ -82,18 +82,27 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import os, json, re
+from typing import List, Optional
 from groq import Groq
+from llm_cache import normalize_input
+from llm_batch import BatchTool, run_batch
 
 load_dotenv()
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
 router = APIRouter()
 
+PROMPT_VERSION = "name-v1"   # bump when the prompt changes
+
 
 class NameInput(BaseModel):
     name: str
 
 
+# Shape asked of the LLM in /tools/analyze_lead
+NAME_SIGNAL = """{"is_real": true, "suspicion": "normal | rare | bot_like | fake", "reason": "short explanation"}"""
+
+
 # ---------- RULE-BASED PRE-CHECK (FAST, NO LLM) ----------
 def is_test_name(name: str) -> bool:
     test_keywords = ["test", "demo", "sample", "xyz", "abc", "tester", "dummy"]
@@ -113,14 +122,8 @@ def looks_fake_name(name: str) -> bool:
     return False
 
 
-@router.post("/tools/name_check")
-def check_name(payload: NameInput):
-
-    name = payload.name.strip()
-
-    # -------------------------------------------
-    # 1️⃣ RULE-BASED FILTER BEFORE LLM (FREE)
-    # -------------------------------------------
+def name_rules(name: str):
+    """(result, cache_input): a finished result for test/synthetic names, else None."""
     if is_test_name(name):
         return {
             "name": name,
@@ -128,7 +131,7 @@ def check_name(payload: NameInput):
             "score": 0.1,
             "suspicion": "fake",
             "reason": "Common placeholder/test name used in development."
-        }
+        }, None
 
     if looks_fake_name(name):
         return {
@@ -137,8 +140,65 @@ def check_name(payload: NameInput):
             "score": 0.2,
             "suspicion": "fake",
             "reason": "Name appears synthetic or invalid."
+        }, None
+
+    return None, normalize_input(name)
+
+
+def name_finalize(name: str, result: Optional[dict]) -> dict:
+    if result is None:
+        # Fallback when model breaks JSON
+        return {
+            "name": name,
+            "is_real": False,
+            "score": 0.4,
+            "suspicion": "unsure",
+            "reason": "Model returned invalid JSON"
         }
 
+    result["name"] = name
+    result.setdefault("is_real", False)
+    result.setdefault("suspicion", "unsure")
+
+    # Score normalization
+    suspicion = result.get("suspicion", "unsure")
+    result["score"] = {
+        "normal": 0.9,
+        "rare": 0.6,
+        "bot_like": 0.3,
+        "fake": 0.1,
+        "unsure": 0.4
+    }.get(suspicion, 0.4)
+
+    result.setdefault("reason", "No explanation provided")
+
+    return result
+
+
+NAME_BATCH = BatchTool(
+    "name_check",
+    task="Decide whether each name is a real human name (suspicion: normal, rare, bot_like or fake).",
+    shape=NAME_SIGNAL,
+    rules=name_rules,
+    finalize=name_finalize,
+    prompt_version=PROMPT_VERSION,
+    temperature=0.2,
+    clean=str.strip,
+)
+
+
+@router.post("/tools/name_check")
+def check_name(payload: NameInput):
+
+    name = payload.name.strip()
+
+    # -------------------------------------------
+    # 1️⃣ RULE-BASED FILTER BEFORE LLM (FREE)
+    # -------------------------------------------
+    early, cache_input = name_rules(name)
+    if early is not None:
+        return early
+
     # -------------------------------------------
     # 2️⃣ LLM-BASED ANALYSIS
     # -------------------------------------------
@@ -166,13 +226,7 @@ def check_name(payload: NameInput):
     Do NOT include markdown, comments, or text outside JSON.
     """
 
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2
-    )
-
-    raw = response.choices[0].message.content.strip()
+    raw = NAME_BATCH.reply(client, name, cache_input, prompt).strip()
 
     # -------------------------------------------
     # 3️⃣ SAFE JSON EXTRACTION (PREVENT CRASHES)
@@ -189,32 +243,22 @@ def check_name(payload: NameInput):
             else:
                 raise ValueError("JSON not found")
         except:
-            # Fallback when model breaks JSON
-            return {
-                "name": name,
-                "is_real": False,
-                "score": 0.4,
-                "suspicion": "unsure",
-                "reason": "Model returned invalid JSON"
-            }
+            result = None
 
     # -------------------------------------------
     # 4️⃣ ENSURE COMPLETE + NORMALIZED OUTPUT
     # -------------------------------------------
-    result.setdefault("name", name)
-    result.setdefault("is_real", False)
-    result.setdefault("suspicion", "unsure")
+    return name_finalize(name, result)
 
-    # Score normalization
-    suspicion = result.get("suspicion", "unsure")
-    result["score"] = {
-        "normal": 0.9,
-        "rare": 0.6,
-        "bot_like": 0.3,
-        "fake": 0.1,
-        "unsure": 0.4
-    }.get(suspicion, 0.4)
 
-    result.setdefault("reason", "No explanation provided")
+# -------------------------------------------
+# BATCH: many names in packed LLM prompts
+# -------------------------------------------
+class NameBatchInput(BaseModel):
+    names: List[str]
 
-    return result
+
+@router.post("/tools/name_check/batch")
+def check_name_batch(payload: NameBatchInput):
+    """Results in input order; each one has the same shape as /tools/name_check."""
+    return run_batch(client, NAME_BATCH, payload.names)
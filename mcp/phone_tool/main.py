@@ -3,29 +3,107 @@ from pydantic import BaseModel
 import phonenumbers
 from dotenv import load_dotenv
 import os, json
+from typing import List, Optional
 from groq import Groq
+from llm_cache import normalize_input
+from llm_batch import BatchTool, run_batch
 
 load_dotenv()
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
 router = APIRouter()
 
+PROMPT_VERSION = "phone-v1"   # bump when the prompt changes
+
+# Shape asked of the LLM in /tools/analyze_lead
+PHONE_SIGNAL = """{"score": 0.95, "is_genuine": true, "type": "mobile | landline | voip | unknown", "reason": "short explanation"}"""
+
 class PhoneInput(BaseModel):
     phone: str
 
-@router.post("/tools/phone_check")
-def check_phone(payload: PhoneInput):
 
-    number = payload.phone
-
-    # -------- BASIC CHECK USING phonenumbers --------
+def phone_metadata(number: str):
+    """(parsed, valid, region) from phonenumbers; parsed is None when it can't parse."""
     try:
         parsed = phonenumbers.parse(number, None)
         valid = phonenumbers.is_valid_number(parsed)
         region = phonenumbers.region_code_for_number(parsed)
     except:
-        valid = False
-        region = None
+        return None, False, None
+    return parsed, valid, region
+
+
+def phone_rules(number: str):
+    """
+    (result, cache_input). Input with too few digits to be any phone number
+    is rejected without the LLM. Otherwise the cache key is the E.164 form
+    when phonenumbers can parse it, so one number in any formatting shares
+    a cache entry.
+    """
+    if sum(c.isdigit() for c in number or "") < 7:
+        return {
+            "score": 0.1,
+            "is_genuine": False,
+            "type": "invalid",
+            "reason": "Too few digits for a phone number",
+            "parsed_valid": False,
+            "region": None
+        }, None
+
+    parsed, _, _ = phone_metadata(number)
+    if parsed is None:
+        return None, normalize_input(number)
+    return None, phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+
+
+def phone_finalize(number: str, result: Optional[dict]) -> dict:
+    if result is None:
+        result = {
+            "score": 0.5,
+            "is_genuine": False,
+            "type": "unknown",
+            "reason": "Model returned invalid JSON"
+        }
+
+    # -------- ENSURE aggregator compatibility --------
+    if "score" not in result:
+        result["score"] = 0.5
+
+    if "is_genuine" not in result:
+        # Fallback logic
+        result["is_genuine"] = result.get("score", 0) > 0.6
+
+    if "reason" not in result:
+        result["reason"] = "Auto-generated reasoning"
+
+    # -------- ADD phonenumbers metadata --------
+    _, valid, region = phone_metadata(number)
+    result["parsed_valid"] = valid
+    result["region"] = region
+
+    return result
+
+
+PHONE_BATCH = BatchTool(
+    "phone_check",
+    task="Decide whether each phone number is genuine (real, reachable) or fake/dummy. REJECT sequential (123456) or repeated digits (999999).",
+    shape=PHONE_SIGNAL,
+    rules=phone_rules,
+    finalize=phone_finalize,
+    prompt_version=PROMPT_VERSION,
+    temperature=0.1,
+)
+
+
+@router.post("/tools/phone_check")
+def check_phone(payload: PhoneInput):
+
+    number = payload.phone
+
+    # -------- BASIC CHECK USING phonenumbers --------
+    early, cache_input = phone_rules(number)
+    if early is not None:
+        return early
 
     # -------- LLM PROMPT --------
     prompt = f"""
@@ -49,13 +127,7 @@ def check_phone(payload: PhoneInput):
     }}
     """
 
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",       # UPDATED MODEL
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.1
-    )
-
-    raw_output = response.choices[0].message.content
+    raw_output = PHONE_BATCH.reply(client, number, cache_input, prompt)
     print(f"DEBUG LLM OUTPUT: {raw_output}")  # 🔥 Debugging
 
     # -------- SAFE JSON EXTRACTION --------
@@ -84,19 +156,17 @@ def check_phone(payload: PhoneInput):
                 "reason": f"Model returned invalid JSON. Raw: {raw_output[:50]}..."
             }
 
-    # -------- ENSURE aggregator compatibility --------
-    if "score" not in result:
-        result["score"] = 0.5
+    return phone_finalize(number, result)
 
-    if "is_genuine" not in result:
-        # Fallback logic
-        result["is_genuine"] = result.get("score", 0) > 0.6
 
-    if "reason" not in result:
-        result["reason"] = "Auto-generated reasoning"
+# -------------------------------------------
+# BATCH: many numbers in packed LLM prompts
+# -------------------------------------------
+class PhoneBatchInput(BaseModel):
+    phones: List[str]
 
-    # -------- ADD phonenumbers metadata --------
-    result["parsed_valid"] = valid
-    result["region"] = region
 
-    return result
+@router.post("/tools/phone_check/batch")
+def check_phone_batch(payload: PhoneBatchInput):
+    """Results in input order; each one has the same shape as /tools/phone_check."""
+    return run_batch(client, PHONE_BATCH, payload.phones)